@@ -0,0 +1,57 @@
+"""
+Measure end to end publication throughput over a loopback RawSocket connection,
+frames sent during the same event loop iteration share a single write.
+
+Usage: python benchmarks/aio.py
+"""
+
+import asyncio
+import time
+
+from wampproto import messages
+from wampproto.aio import RawSocketServer, connect_rawsocket
+from wampproto.serializers import registry
+
+PUBLICATIONS = 50_000
+SERIALIZERS = {
+    "json": registry.JSON_SERIALIZER_ID,
+    "msgpack": registry.MSGPACK_SERIALIZER_ID,
+    "cbor": registry.CBOR_SERIALIZER_ID,
+}
+
+
+async def run(serializer_id: int) -> float:
+    server = RawSocketServer()
+    await server.start()
+    port = server.sockets[0].getsockname()[1]
+    subscriber = await connect_rawsocket("realm1", port=port, serializer_id=serializer_id)
+    publisher = await connect_rawsocket("realm1", port=port, serializer_id=serializer_id)
+
+    await subscriber.send(messages.Subscribe(messages.SubscribeFields(1, "io.xconn.topic")))
+    await subscriber.receive()
+
+    start = time.perf_counter()
+    for i in range(1, PUBLICATIONS + 1):
+        publisher.send_nowait(messages.Publish(messages.PublishFields(i, "io.xconn.topic", args=[i])))
+        if i % 1000 == 0:
+            await asyncio.sleep(0)
+
+    for _ in range(PUBLICATIONS):
+        await subscriber.receive()
+
+    elapsed = time.perf_counter() - start
+    subscriber.close()
+    publisher.close()
+    server.close()
+    await server.wait_closed()
+    return elapsed
+
+
+def main():
+    for name, serializer_id in SERIALIZERS.items():
+        elapsed = asyncio.run(run(serializer_id))
+        print(f"{name:<8} {PUBLICATIONS / elapsed:>10,.0f} publications/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Compare dispatching CALL/YIELD round trips one message at a time with receive_batch,
+counting the writes a transport would issue (one per recipient per dispatch).
+
+Usage: python benchmarks/batch.py
+"""
+
+import time
+
+from wampproto import messages
+from wampproto.dealer import Dealer
+from wampproto.types import SessionDetails
+
+CALLS = 50_000
+BATCH_SIZES = (1, 16, 256)
+CALLEE, CALLER = 1, 2
+
+
+def setup() -> Dealer:
+    dealer = Dealer()
+    dealer.add_session(SessionDetails(CALLEE, "realm1", "callee", "authrole"))
+    dealer.add_session(SessionDetails(CALLER, "realm1", "caller", "authrole"))
+    dealer.receive_message(CALLEE, messages.Register(messages.RegisterFields(1, "io.xconn.echo")))
+    return dealer
+
+
+def run_single(dealer: Dealer, calls: list[messages.Call]) -> int:
+    writes = 0
+    for call in calls:
+        invocation = dealer.receive_message(CALLER, call).message
+        dealer.receive_message(CALLEE, messages.Yield(messages.YieldFields(invocation.request_id, args=[1])))
+        writes += 2
+
+    return writes
+
+
+def run_batched(dealer: Dealer, calls: list[messages.Call], size: int) -> int:
+    writes = 0
+    for offset in range(0, len(calls), size):
+        outgoing = dealer.receive_batch(CALLER, calls[offset : offset + size])
+        yields = [messages.Yield(messages.YieldFields(inv.request_id, args=[1])) for inv in outgoing[CALLEE]]
+        results = dealer.receive_batch(CALLEE, yields)
+        writes += len(outgoing) + len(results)
+
+    return writes
+
+
+def main():
+    calls = [messages.Call(messages.CallFields(i, "io.xconn.echo", args=[i])) for i in range(1, CALLS + 1)]
+
+    print(f"{'mode':<16}{'calls/s':>12}{'writes':>10}")
+    dealer = setup()
+    start = time.perf_counter()
+    writes = run_single(dealer, calls)
+    elapsed = time.perf_counter() - start
+    print(f"{'receive_message':<16}{CALLS / elapsed:>12,.0f}{writes:>10,}")
+
+    for size in BATCH_SIZES:
+        dealer = setup()
+        start = time.perf_counter()
+        writes = run_batched(dealer, calls, size)
+        elapsed = time.perf_counter() - start
+        print(f"{f'batch {size}':<16}{CALLS / elapsed:>12,.0f}{writes:>10,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Compare the per-frame cost of finding the parser of a message with the former
+match statement and with the dispatch table in to_message, for the first and
+the last arms of the match.
+
+Usage: python benchmarks/dispatch.py
+"""
+
+import timeit
+
+from wampproto import messages
+from wampproto.serializers.serializer import MESSAGE_TYPES, to_message
+
+NUMBER = 500_000
+
+FRAMES = {
+    "Hello": [1, "realm1", {"roles": {"caller": {}}}],
+    "Welcome": [2, 1, {"roles": {"dealer": {}}}],
+    "Cancel": [49, 1, {}],
+    "Interrupt": [69, 1, {}],
+}
+
+
+def match_dispatch(message_type: int) -> type[messages.Message]:
+    match message_type:
+        case messages.Hello.TYPE:
+            return messages.Hello
+        case messages.Welcome.TYPE:
+            return messages.Welcome
+        case messages.Abort.TYPE:
+            return messages.Abort
+        case messages.Challenge.TYPE:
+            return messages.Challenge
+        case messages.Authenticate.TYPE:
+            return messages.Authenticate
+        case messages.Goodbye.TYPE:
+            return messages.Goodbye
+        case messages.Call.TYPE:
+            return messages.Call
+        case messages.Invocation.TYPE:
+            return messages.Invocation
+        case messages.Yield.TYPE:
+            return messages.Yield
+        case messages.Result.TYPE:
+            return messages.Result
+        case messages.Register.TYPE:
+            return messages.Register
+        case messages.Registered.TYPE:
+            return messages.Registered
+        case messages.Unregister.TYPE:
+            return messages.Unregister
+        case messages.Unregistered.TYPE:
+            return messages.Unregistered
+        case messages.Subscribe.TYPE:
+            return messages.Subscribe
+        case messages.Subscribed.TYPE:
+            return messages.Subscribed
+        case messages.Unsubscribe.TYPE:
+            return messages.Unsubscribe
+        case messages.Unsubscribed.TYPE:
+            return messages.Unsubscribed
+        case messages.Publish.TYPE:
+            return messages.Publish
+        case messages.Published.TYPE:
+            return messages.Published
+        case messages.Event.TYPE:
+            return messages.Event
+        case messages.Error.TYPE:
+            return messages.Error
+        case messages.Cancel.TYPE:
+            return messages.Cancel
+        case messages.Interrupt.TYPE:
+            return messages.Interrupt
+        case _:
+            raise ValueError("unknown message type")
+
+
+def main():
+    print(f"{'message':<12}{'match (ns)':>12}{'table (ns)':>12}{'to_message (ns)':>18}")
+    for name, frame in FRAMES.items():
+        message_type = frame[0]
+        matched = timeit.timeit(lambda: match_dispatch(message_type), number=NUMBER) / NUMBER * 1e9
+        table = timeit.timeit(lambda: MESSAGE_TYPES.get(message_type), number=NUMBER) / NUMBER * 1e9
+        parsed = timeit.timeit(lambda: to_message(frame), number=NUMBER) / NUMBER * 1e9
+        print(f"{name:<12}{matched:>12.0f}{table:>12.0f}{parsed:>18.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Compare serializing EVENT, RESULT and INVOCATION by encoding the list built
+by marshal() with the marshal_fast() path the serializers take for them.
+
+Usage: python benchmarks/encode.py
+"""
+
+import timeit
+
+import cbor2
+import msgpack
+
+from wampproto import messages, serializers
+
+NUMBER = 100_000
+
+MESSAGES = {
+    "Event": messages.Event(messages.EventFields(1, 2, args=["sensor-1", 21.5], kwargs={"unit": "C"})),
+    "Result": messages.Result(messages.ResultFields(1, args=[42])),
+    "Invocation": messages.Invocation(messages.InvocationFields(1, 2, args=[1, 2], details={"caller": 3})),
+}
+
+JSON = serializers.JSONSerializer()
+PACKER = msgpack.Packer()
+
+# serializer mapped to a function encoding the marshaled message the way it did before the fast path
+SERIALIZERS = {
+    "json": (JSON, lambda message: JSON.backend.dumps(message.marshal())),
+    "msgpack": (serializers.MsgPackSerializer(), lambda message: PACKER.pack(message.marshal())),
+    "cbor": (serializers.CBORSerializer(), lambda message: cbor2.dumps(message.marshal())),
+}
+
+
+def main():
+    print(f"{'message':<12}{'serializer':<12}{'marshal (ns)':>14}{'fast path (ns)':>16}")
+    for name, message in MESSAGES.items():
+        for serializer_name, (serializer, marshaled) in SERIALIZERS.items():
+            assert marshaled(message) == serializer.serialize(message)
+            slow = timeit.timeit(lambda: marshaled(message), number=NUMBER) / NUMBER * 1e9
+            fast = timeit.timeit(lambda: serializer.serialize(message), number=NUMBER) / NUMBER * 1e9
+            print(f"{name:<12}{serializer_name:<12}{slow:>14.0f}{fast:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Compare serializing an EVENT once per subscriber with serializing it once per publication,
+and with filling in a template with per-subscriber details.
+
+Usage: python benchmarks/fanout.py
+"""
+
+import time
+
+from wampproto import messages
+from wampproto.broker import Broker
+from wampproto.serializers import JSONSerializer, MsgPackSerializer, CBORSerializer
+from wampproto.types import SessionDetails
+
+SUBSCRIBERS = 10_000
+TOPIC = "io.xconn.topic"
+
+
+def setup() -> tuple[Broker, messages.Publish]:
+    broker = Broker()
+    for session_id in range(1, SUBSCRIBERS + 1):
+        broker.add_session(SessionDetails(session_id, "realm1", "authid", "authrole"))
+        broker.receive_message(session_id, messages.Subscribe(messages.SubscribeFields(1, TOPIC)))
+
+    publish = messages.Publish(
+        messages.PublishFields(1, TOPIC, args=[{"id": i, "name": "sensor"} for i in range(20)], kwargs={"unit": "C"})
+    )
+    return broker, publish
+
+
+def main():
+    broker, publish = setup()
+    print(f"{'serializer':<20}{'per subscriber (ms)':>22}{'shared (ms)':>14}{'template (ms)':>16}")
+    for serializer in (JSONSerializer(), MsgPackSerializer(), CBORSerializer()):
+        publication = broker.receive_publish(1, publish)
+        start = time.perf_counter()
+        for _ in publication.recipients:
+            serializer.serialize(publication.event)
+        per_subscriber = (time.perf_counter() - start) * 1e3
+
+        publication = broker.receive_publish(1, publish)
+        start = time.perf_counter()
+        for _ in publication.recipients:
+            publication.serialize(serializer)
+        shared = (time.perf_counter() - start) * 1e3
+
+        publication = broker.receive_publish(1, publish)
+        start = time.perf_counter()
+        for recipient in publication.recipients:
+            publication.serialize_with_details(serializer, {"recipient": recipient})
+        template = (time.perf_counter() - start) * 1e3
+
+        print(f"{type(serializer).__name__:<20}{per_subscriber:>22.1f}{shared:>14.1f}{template:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Measure the cost of keeping an event history for a topic on publishing, and of
+replaying the stored events to a new subscriber with the template encoded when
+they were stored against serializing each replayed event from scratch.
+
+Usage: python benchmarks/history.py
+"""
+
+import timeit
+
+from wampproto import messages
+from wampproto.broker import Broker
+from wampproto.serializers import CBORSerializer, JSONSerializer, MsgPackSerializer
+from wampproto.types import SessionDetails
+
+NUMBER = 100_000
+DEPTH = 1000
+PAYLOAD = {"sensor": "temperature", "values": list(range(32)), "unit": "celsius"}
+
+
+def publish_cost(history: bool) -> float:
+    broker = Broker()
+    broker.add_session(SessionDetails(1, "realm1", "authid", "authrole"))
+    broker.receive_message(1, messages.Subscribe(messages.SubscribeFields(1, "io.xconn.topic")))
+    if history:
+        broker.enable_history("io.xconn.topic", DEPTH)
+
+    publish = messages.Publish(messages.PublishFields(1, "io.xconn.topic", kwargs=PAYLOAD))
+    return timeit.timeit(lambda: broker.receive_publish(1, publish), number=NUMBER) / NUMBER
+
+
+def main():
+    print(f"publish without history {publish_cost(False) * 1e6:6.2f}us")
+    print(f"publish with history    {publish_cost(True) * 1e6:6.2f}us")
+
+    for serializer in (JSONSerializer(), MsgPackSerializer(), CBORSerializer()):
+        broker = Broker()
+        broker.add_session(SessionDetails(1, "realm1", "authid", "authrole"))
+        broker.enable_history("io.xconn.topic", DEPTH, serializer=serializer)
+        for i in range(1, DEPTH + 1):
+            broker.receive_publish(1, messages.Publish(messages.PublishFields(i, "io.xconn.topic", kwargs=PAYLOAD)))
+
+        subscribe = messages.Subscribe(messages.SubscribeFields(1, "io.xconn.topic"))
+        subscription_id = broker.receive_message(1, subscribe).message.subscription_id
+
+        def replay():
+            return [publication.serialize(serializer) for publication in broker.get_events(1, subscription_id)]
+
+        def encode():
+            return [serializer.serialize(publication.event) for publication in broker.get_events(1, subscription_id)]
+
+        replayed = timeit.timeit(replay, number=20) / 20
+        encoded = timeit.timeit(encode, number=20) / 20
+        name = type(serializer).__name__
+        print(f"{name:<20} replay {DEPTH} events: template {replayed * 1e3:6.2f}ms  serialize {encoded * 1e3:6.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
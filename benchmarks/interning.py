@@ -0,0 +1,55 @@
+"""
+Compare parsing CALLs and looking their procedure up in a dict keyed by URI,
+the way the dealer does, with and without URI interning, and the memory held
+by the URIs of parsed messages.
+
+Usage: python benchmarks/interning.py
+"""
+
+import timeit
+import tracemalloc
+
+from wampproto import messages
+from wampproto.messages import interning
+from wampproto.serializers import JSONSerializer
+
+NUMBER = 200_000
+URIS = [f"com.example.service{i}.procedure.with.a.long.name" for i in range(2_000)]
+KEPT = 50_000
+
+
+def run(label: str) -> None:
+    serializer = JSONSerializer()
+    registrations = {uri: i for i, uri in enumerate(URIS)}
+    frames = [serializer.serialize(messages.Call(messages.CallFields(1, uri))) for uri in URIS]
+    wamp_messages = [serializer.backend.loads(frame) for frame in frames]
+
+    def parse():
+        for wamp_message in wamp_messages:
+            registrations[messages.Call.parse(wamp_message).uri]
+
+    per_call = timeit.timeit(parse, number=NUMBER // len(URIS)) / NUMBER * 1e9
+
+    tracemalloc.start()
+    kept = [serializer.deserialize(frames[i % len(frames)]) for i in range(KEPT)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+
+    print(f"{label:<12}{per_call:>18.0f}{size / KEPT:>22.0f}")
+
+
+def main():
+    print(f"{'interning':<12}{'parse+lookup (ns)':>18}{'bytes per message':>22}")
+    run("disabled")
+
+    interning.enable_uri_interning(max_size=len(URIS))
+    run("fifo")
+
+    interning.enable_uri_interning(max_size=len(URIS), eviction=interning.EVICT_LRU)
+    run("lru")
+    interning.disable_uri_interning()
+
+
+if __name__ == "__main__":
+    main()
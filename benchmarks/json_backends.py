@@ -0,0 +1,43 @@
+"""
+Compare the installed JSON backends on the messages exchanged most often, a
+CALL with nested arguments and an EVENT with a mix of scalars and strings.
+
+Usage: python benchmarks/json_backends.py
+"""
+
+import timeit
+
+from wampproto import messages
+from wampproto.serializers import json
+from wampproto.serializers.json import JSONSerializer
+
+NUMBER = 50_000
+
+MESSAGES = {
+    "Call": messages.Call(
+        messages.CallFields(
+            1,
+            "com.example.orders.create",
+            args=[{"id": i, "name": f"item-{i}", "price": i * 1.25, "tags": ["a", "b"]} for i in range(20)],
+            kwargs={"customer": "müller", "express": True},
+        )
+    ),
+    "Event": messages.Event(
+        messages.EventFields(1, 2, args=["sensor-1", 21.5, 1_700_000_000, None], kwargs={"unit": "°C"})
+    ),
+}
+
+
+def main():
+    print(f"{'message':<10}{'backend':<10}{'serialize (us)':>16}{'deserialize (us)':>18}")
+    for name, message in MESSAGES.items():
+        for backend in json.BACKENDS:
+            serializer = JSONSerializer(backend=backend)
+            data = serializer.serialize(message)
+            serialize = timeit.timeit(lambda: serializer.serialize(message), number=NUMBER) / NUMBER * 1e6
+            deserialize = timeit.timeit(lambda: serializer.deserialize(data), number=NUMBER) / NUMBER * 1e6
+            print(f"{name:<10}{backend:<10}{serialize:>16.2f}{deserialize:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
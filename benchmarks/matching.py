@@ -0,0 +1,55 @@
+"""
+Publish to a broker holding 100k mixed exact, prefix and wildcard subscriptions.
+
+Matching walks the components of the published URI, so the time per publish
+should stay flat as the number of subscriptions grows.
+
+Usage: python benchmarks/matching.py
+"""
+
+import random
+import time
+
+from wampproto import messages
+from wampproto.broker import Broker
+from wampproto.types import SessionDetails
+
+PUBLISHES = 20_000
+
+
+def build(count: int) -> Broker:
+    rng = random.Random(42)
+    broker = Broker()
+    broker.add_session(SessionDetails(1, "realm1", "authid", "authrole"))
+    for i in range(count):
+        app, device = rng.randrange(100), rng.randrange(1000)
+        kind = i % 3
+        if kind == 0:
+            topic, match = f"com.app{app}.device{device}.temperature", "exact"
+        elif kind == 1:
+            topic, match = f"com.app{app}.device{device}", "prefix"
+        else:
+            topic, match = f"com.app{app}..{i}", "wildcard"
+
+        subscribe = messages.Subscribe(messages.SubscribeFields(i + 1, topic, options={"match": match}))
+        broker.receive_message(1, subscribe)
+
+    return broker
+
+
+def main():
+    topics = [f"com.app{i % 100}.device{i % 1000}.temperature" for i in range(PUBLISHES)]
+    publishes = [messages.Publish(messages.PublishFields(1, topic, args=[21.5])) for topic in topics]
+
+    print(f"{'subscriptions':>14}{'us/publish':>12}")
+    for count in (1_000, 10_000, 100_000):
+        broker = build(count)
+        start = time.perf_counter()
+        for publish in publishes:
+            broker.receive_publish(1, publish)
+        elapsed = time.perf_counter() - start
+        print(f"{count:>14}{elapsed / PUBLISHES * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Report the memory used per EVENT and INVOCATION message.
+
+The "before" numbers come from a replica of the previous layout, where each
+message was a plain object wrapping a separate fields object, both carrying
+an instance __dict__.
+
+Usage: python benchmarks/memory.py
+"""
+
+import tracemalloc
+
+from wampproto import messages
+
+COUNT = 100_000
+
+
+class LegacyFields:
+    def __init__(self, request_id, registration_id, args, kwargs, details):
+        self._request_id = request_id
+        self._registration_id = registration_id
+        self._args = args
+        self._kwargs = kwargs
+        self._details = details
+        self._serializer = None
+        self._payload = None
+
+
+class LegacyMessage:
+    def __init__(self, fields):
+        self._fields = fields
+
+
+def legacy(i, args, kwargs, details):
+    return LegacyMessage(LegacyFields(i, i, args, kwargs, details))
+
+
+def event(i, args, kwargs, details):
+    return messages.Event(messages.EventFields(i, i, args, kwargs, details))
+
+
+def invocation(i, args, kwargs, details):
+    return messages.Invocation(messages.InvocationFields(i, i, args, kwargs, details))
+
+
+def measure(factory) -> float:
+    # share the payload between all messages so only the message objects are measured
+    args, kwargs, details = ["hello"], {"key": "value"}, {}
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    # start ids above the small int cache so every message owns its ints, like real traffic
+    keep = [factory(i, args, kwargs, details) for i in range(1 << 20, (1 << 20) + COUNT)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # exclude the list holding the messages and the integers
+    overhead = len(keep) * 8 + COUNT * 28
+    return (after - before - overhead) / COUNT
+
+
+def main():
+    print(f"{'layout':<24}{'bytes/message':>14}")
+    print(f"{'wrapper + __dict__':<24}{measure(legacy):>14.1f}")
+    print(f"{'Event (slots)':<24}{measure(event):>14.1f}")
+    print(f"{'Invocation (slots)':<24}{measure(invocation):>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
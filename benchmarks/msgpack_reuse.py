@@ -0,0 +1,59 @@
+"""
+Compare serializing with a new msgpack Packer per message against the Packer
+kept by MsgPackSerializer, and deserializing a buffer of concatenated messages
+one by one against MsgPackSerializer.feed. Also reports the memory held by a
+serializer, which matters as routers keep one per session.
+
+Usage: python benchmarks/msgpack_reuse.py
+"""
+
+import timeit
+import tracemalloc
+
+import msgpack
+
+from wampproto import messages
+from wampproto.serializers.msgpack import MsgPackSerializer
+from wampproto.serializers.serializer import to_message
+
+NUMBER = 100_000
+BATCH = 100
+SESSIONS = 1_000
+
+CALL = messages.Call(messages.CallFields(1, "com.example.add", args=[1, 2], kwargs={"precision": 2}))
+
+
+def main():
+    serializer = MsgPackSerializer()
+    per_call = timeit.timeit(lambda: msgpack.dumps(CALL.marshal()), number=NUMBER) / NUMBER * 1e9
+    reused = timeit.timeit(lambda: serializer.serialize(CALL), number=NUMBER) / NUMBER * 1e9
+    print(f"serialize, new packer (ns):      {per_call:.0f}")
+    print(f"serialize, reused packer (ns):   {reused:.0f}")
+
+    frames = [serializer.serialize(CALL) for _ in range(BATCH)]
+    stream = b"".join(frames)
+    number = NUMBER // BATCH
+
+    def one_by_one():
+        unpacker = msgpack.Unpacker()
+        unpacker.feed(stream)
+        return [to_message(wamp_message) for wamp_message in unpacker]
+
+    separate = timeit.timeit(lambda: [to_message(msgpack.loads(frame)) for frame in frames], number=number)
+    streamed = timeit.timeit(one_by_one, number=number)
+    fed = timeit.timeit(lambda: serializer.feed(stream), number=number)
+    print(f"deserialize, per message (ns):   {separate / number / BATCH * 1e9:.0f}")
+    print(f"deserialize, new unpacker (ns):  {streamed / number / BATCH * 1e9:.0f}")
+    print(f"deserialize, feed (ns):          {fed / number / BATCH * 1e9:.0f}")
+
+    tracemalloc.start()
+    serializers = [MsgPackSerializer() for _ in range(SESSIONS)]
+    for s in serializers:
+        s.feed(frames[0])
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"memory per serializer (bytes):   {size / SESSIONS:.0f}")
+
+
+if __name__ == "__main__":
+    main()
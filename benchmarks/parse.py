@@ -0,0 +1,53 @@
+"""
+Compare the compiled per-message decoders with the generic validation spec walk.
+
+Usage: python benchmarks/parse.py
+"""
+
+import timeit
+
+from wampproto import messages
+from wampproto.messages import util
+
+NUMBER = 200_000
+
+CALL = [48, 7814135, {}, "io.xconn.echo", ["hello", 42], {"key": "value"}]
+EVENT = [36, 5512315355, 4429313566, {}, ["hello", 42], {"key": "value"}]
+PUBLISH = [16, 239714735, {}, "io.xconn.topic", ["hello", 42], {"key": "value"}]
+
+
+def parse_call_spec(msg):
+    f = util.validate_message(msg, messages.Call.TYPE, messages.Call.VALIDATION_SPEC)
+    return messages.Call(messages.CallFields(f.request_id, f.uri, f.args, f.kwargs, f.options))
+
+
+def parse_event_spec(msg):
+    f = util.validate_message(msg, messages.Event.TYPE, messages.Event.VALIDATION_SPEC)
+    return messages.Event(messages.EventFields(f.subscription_id, f.publication_id, f.args, f.kwargs, f.details))
+
+
+def parse_publish_spec(msg):
+    f = util.validate_message(msg, messages.Publish.TYPE, messages.Publish.VALIDATION_SPEC)
+    return messages.Publish(messages.PublishFields(f.request_id, f.uri, f.args, f.kwargs, f.options))
+
+
+def bench(func, msg) -> float:
+    return min(timeit.repeat(lambda: func(msg), number=NUMBER, repeat=5)) / NUMBER * 1e9
+
+
+def main():
+    cases = [
+        ("Call.parse", parse_call_spec, messages.Call.parse, CALL),
+        ("Event.parse", parse_event_spec, messages.Event.parse, EVENT),
+        ("Publish.parse", parse_publish_spec, messages.Publish.parse, PUBLISH),
+    ]
+
+    print(f"{'message':<16}{'spec (ns)':>12}{'compiled (ns)':>16}{'speedup':>10}")
+    for name, spec_func, compiled_func, msg in cases:
+        spec = bench(spec_func, msg)
+        compiled = bench(compiled_func, msg)
+        print(f"{name:<16}{spec:>12.0f}{compiled:>16.0f}{spec / compiled:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Publish a storm of events to a fast subscriber, whose events are taken after
+every publication, and a slow one that never catches up. Without queues the
+slow subscriber's events pile up in the transport, with a bounded queue their
+number stays at the queue size whatever the policy.
+
+Usage: python benchmarks/queues.py
+"""
+
+import time
+
+from wampproto import broker as broker_module
+from wampproto import messages
+from wampproto.broker import Broker
+from wampproto.types import SessionDetails
+
+PUBLICATIONS = 100_000
+QUEUE_SIZE = 1000
+TOPICS = 10
+PUBLISHER, FAST, SLOW = 1, 2, 3
+
+
+def setup(queue_size: int | None, policy: str) -> Broker:
+    broker = Broker(queue_size=queue_size, overflow_policy=policy)
+    broker.add_session(SessionDetails(PUBLISHER, "realm1", "publisher", "authrole"), queue_size=None)
+    broker.add_session(SessionDetails(FAST, "realm1", "fast", "authrole"))
+    broker.add_session(SessionDetails(SLOW, "realm1", "slow", "authrole"))
+    for session_id in (FAST, SLOW):
+        broker.receive_message(
+            session_id, messages.Subscribe(messages.SubscribeFields(1, "io.xconn", options={"match": "prefix"}))
+        )
+
+    return broker
+
+
+def run(queue_size: int | None, policy: str) -> tuple[float, int, int]:
+    broker = setup(queue_size, policy)
+    publishes = [
+        messages.Publish(messages.PublishFields(i, f"io.xconn.topic{i % TOPICS}", args=[i]))
+        for i in range(1, PUBLICATIONS + 1)
+    ]
+
+    # what a transport without queues would have to buffer for the slow subscriber
+    buffered = 0
+    start = time.perf_counter()
+    for publish in publishes:
+        publication = broker.receive_publish(PUBLISHER, publish)
+        for pub in publication.pattern_publications:
+            if SLOW in pub.recipients:
+                buffered += 1
+
+        if queue_size is not None:
+            broker.take_events(FAST)
+
+    elapsed = time.perf_counter() - start
+    backlog = broker.pending_events(SLOW) if queue_size is not None else buffered
+    return elapsed, backlog, broker.dropped_events
+
+
+def main():
+    cases = [("unbounded", None, broker_module.OVERFLOW_DROP_OLDEST)]
+    cases.extend((policy, QUEUE_SIZE, policy) for policy in broker_module.OVERFLOW_POLICIES)
+    for name, queue_size, policy in cases:
+        elapsed, backlog, dropped = run(queue_size, policy)
+        print(
+            f"{name:<12} {elapsed / PUBLICATIONS * 1e6:6.2f}us/publish  "
+            f"slow subscriber backlog {backlog:>7}  dropped {dropped:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
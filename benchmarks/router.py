@@ -0,0 +1,70 @@
+"""
+Measure the per-message cost of Router.receive against calling Broker and Dealer
+directly after an isinstance chain, and the cost of sessions joining and leaving
+thousands of lazily created realms that are then evicted.
+
+Usage: python benchmarks/router.py
+"""
+
+import time
+import timeit
+
+from wampproto import messages
+from wampproto.broker import Broker
+from wampproto.dealer import Dealer
+from wampproto.router import Router
+from wampproto.types import SessionDetails
+
+NUMBER = 200_000
+REALMS = 10_000
+
+
+def isinstance_dispatch(broker: Broker, dealer: Dealer, session_id: int, message: messages.Message):
+    if isinstance(message, messages.Publish):
+        return broker.receive_publish(session_id, message)
+    elif isinstance(message, (messages.Subscribe, messages.Unsubscribe)):
+        return broker.receive_message(session_id, message)
+    elif isinstance(message, messages.Cancel):
+        return dealer.receive_cancel(session_id, message)
+    elif isinstance(message, (messages.Call, messages.Yield, messages.Register, messages.Unregister)):
+        return dealer.receive_message(session_id, message)
+
+    raise ValueError("message type not supported")
+
+
+def main():
+    details = SessionDetails(1, "realm1", "authid", "authrole")
+    router = Router()
+    realm = router.add_session(details)
+    broker, dealer = Broker(), Dealer()
+    broker.add_session(details)
+    dealer.add_session(details)
+
+    call = messages.Call(messages.CallFields(1, "io.xconn.missing"))
+    publish = messages.Publish(messages.PublishFields(1, "io.xconn.topic"))
+    for name, message in (("PUBLISH", publish), ("CALL", call)):
+        direct = timeit.timeit(lambda: isinstance_dispatch(broker, dealer, 1, message), number=NUMBER)
+        routed = timeit.timeit(lambda: router.receive(1, message), number=NUMBER)
+        per_realm = timeit.timeit(lambda: realm.receive(1, message), number=NUMBER)
+        print(
+            f"{name:<8} isinstance {direct / NUMBER * 1e9:6.0f}ns  "
+            f"Router.receive {routed / NUMBER * 1e9:6.0f}ns  Realm.receive {per_realm / NUMBER * 1e9:6.0f}ns"
+        )
+
+    now = [0.0]
+    router = Router(idle_timeout=60, clock=lambda: now[0])
+    start = time.perf_counter()
+    for sid in range(1, REALMS + 1):
+        router.add_session(SessionDetails(sid, f"realm{sid}", "authid", "authrole"))
+
+    for sid in range(1, REALMS + 1):
+        router.remove_session(sid)
+
+    now[0] = 60.0
+    evicted = router.evict_idle()
+    elapsed = time.perf_counter() - start
+    print(f"{REALMS} realms joined, left and evicted: {elapsed * 1e3:.1f}ms ({len(evicted)} evicted)")
+
+
+if __name__ == "__main__":
+    main()
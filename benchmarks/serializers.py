@@ -0,0 +1,63 @@
+"""
+Report the throughput of the JSON, msgpack and CBOR serializers, serializing
+and deserializing single messages, and deserializing a buffer of concatenated
+messages through feed where the serializer supports it.
+
+Usage: python benchmarks/serializers.py
+"""
+
+import time
+
+from wampproto import messages, serializers
+from wampproto.acceptor import ROUTER_ROLES
+
+DURATION = 0.5
+BATCH = 100
+
+MESSAGES = {
+    "Call": messages.Call(
+        messages.CallFields(1, "com.example.add", args=[1, 2, "three"], kwargs={"precision": 2, "round": True})
+    ),
+    "Event": messages.Event(
+        messages.EventFields(1, 2, args=[{"sensor": "s-1", "value": 21.5, "tags": ["a", "b"]}], kwargs={})
+    ),
+    "Welcome": messages.Welcome(messages.WelcomeFields(1, ROUTER_ROLES, "john", "user", "anonymous")),
+}
+
+SERIALIZERS = {
+    "json": serializers.JSONSerializer,
+    "msgpack": serializers.MsgPackSerializer,
+    "cbor": serializers.CBORSerializer,
+}
+
+
+def throughput(func, count: int = 1) -> float:
+    """return how many times per second func processes count messages"""
+    calls = 0
+    start = time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < DURATION:
+        func()
+        calls += 1
+
+    return calls * count / elapsed
+
+
+def main():
+    print(f"{'message':<10}{'serializer':<12}{'serialize/s':>14}{'deserialize/s':>16}{'feed/s':>12}")
+    for name, message in MESSAGES.items():
+        for serializer_name, serializer_type in SERIALIZERS.items():
+            serializer = serializer_type()
+            data = serializer.serialize(message)
+            serialized = throughput(lambda: serializer.serialize(message))
+            deserialized = throughput(lambda: serializer.deserialize(data))
+
+            fed = "-"
+            if hasattr(serializer, "feed"):
+                stream = data * BATCH
+                fed = f"{throughput(lambda: serializer.feed(stream), BATCH):,.0f}"
+
+            print(f"{name:<10}{serializer_name:<12}{serialized:>14,.0f}{deserialized:>16,.0f}{fed:>12}")
+
+
+if __name__ == "__main__":
+    main()
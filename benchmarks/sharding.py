@@ -0,0 +1,76 @@
+"""
+Compare publishing through a single Broker with a ShardedRouter whose shards run
+in the router process and in worker processes. Each publication goes to a topic
+with several subscribers, batches spread over all shards.
+
+Usage: python benchmarks/sharding.py
+"""
+
+import time
+
+from wampproto import messages
+from wampproto.broker import Broker
+from wampproto.sharding import ShardedRouter
+from wampproto.types import SessionDetails
+
+TOPICS = 64
+SUBSCRIBERS = 8
+PUBLICATIONS = 20_000
+BATCH_SIZE = 256
+SHARDS = (2, 4)
+PUBLISHER = 1
+
+
+def sessions() -> list[SessionDetails]:
+    return [SessionDetails(sid, "realm1", f"session{sid}", "authrole") for sid in range(1, SUBSCRIBERS + 2)]
+
+
+def subscribes() -> list[messages.Subscribe]:
+    return [messages.Subscribe(messages.SubscribeFields(i, f"io.xconn.topic{i}")) for i in range(1, TOPICS + 1)]
+
+
+def publishes() -> list[messages.Publish]:
+    return [
+        messages.Publish(
+            messages.PublishFields(i, f"io.xconn.topic{i % TOPICS + 1}", args=[i], kwargs={"value": "x" * 64})
+        )
+        for i in range(1, PUBLICATIONS + 1)
+    ]
+
+
+def run(receive_batch, batch: list[messages.Publish]) -> float:
+    start = time.perf_counter()
+    for offset in range(0, len(batch), BATCH_SIZE):
+        receive_batch(PUBLISHER, batch[offset : offset + BATCH_SIZE])
+
+    return time.perf_counter() - start
+
+
+def main():
+    batch = publishes()
+
+    broker = Broker()
+    for details in sessions():
+        broker.add_session(details)
+        if details.session_id != PUBLISHER:
+            broker.receive_batch(details.session_id, subscribes())
+
+    elapsed = run(broker.receive_batch, batch)
+    print(f"{'broker':<24} {PUBLICATIONS / elapsed:>12,.0f} publications/s")
+
+    for shards in SHARDS:
+        for processes in (False, True):
+            with ShardedRouter(shards, processes=processes) as router:
+                for details in sessions():
+                    router.add_session(details)
+                    if details.session_id != PUBLISHER:
+                        router.receive_batch(details.session_id, subscribes())
+
+                elapsed = run(router.receive_batch, batch)
+
+            name = f"{shards} {'process' if processes else 'local'} shards"
+            print(f"{name:<24} {PUBLICATIONS / elapsed:>12,.0f} publications/s")
+
+
+if __name__ == "__main__":
+    main()
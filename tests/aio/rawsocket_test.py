@@ -0,0 +1,269 @@
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+from wampproto import messages, uris
+from wampproto.aio import RawSocketServer, connect_rawsocket
+from wampproto.aio.rawsocket import RawSocketProtocol
+from wampproto.router import Router
+from wampproto.serializers import JSONSerializer, MsgPackSerializer, registry
+from wampproto.transports import rawsocket
+
+
+class RecordingTransport(asyncio.Transport):
+    def __init__(self):
+        super().__init__()
+        self.writes: list[bytes] = []
+        self.closed = False
+
+    def write(self, data: bytes) -> None:
+        self.writes.append(data)
+
+    def is_closing(self) -> bool:
+        return self.closed
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class EchoProtocol(RawSocketProtocol):
+    def __init__(self, serializer):
+        super().__init__(rawsocket.FrameDecoder(serializer))
+        self.received = []
+
+    def message_received(self, message: messages.Message) -> None:
+        self.received.append(message)
+
+
+def feed(protocol: RawSocketProtocol, data: bytes) -> None:
+    buffer = protocol.get_buffer(len(data))
+    buffer[: len(data)] = data
+    protocol.buffer_updated(len(data))
+
+
+async def start_server() -> tuple[RawSocketServer, int]:
+    server = RawSocketServer()
+    await server.start()
+    return server, server.sockets[0].getsockname()[1]
+
+
+@pytest.mark.parametrize(
+    "serializer_id",
+    [registry.JSON_SERIALIZER_ID, registry.MSGPACK_SERIALIZER_ID, registry.CBOR_SERIALIZER_ID],
+)
+def test_pubsub(serializer_id: int):
+    async def run():
+        server, port = await start_server()
+        subscriber = await connect_rawsocket("realm1", port=port)
+        publisher = await connect_rawsocket("realm1", port=port, serializer_id=serializer_id)
+        assert subscriber.session_details.realm == "realm1"
+
+        await subscriber.send(messages.Subscribe(messages.SubscribeFields(1, "io.xconn.topic")))
+        subscribed = await subscriber.receive()
+        assert isinstance(subscribed, messages.Subscribed)
+
+        await publisher.send(
+            messages.Publish(messages.PublishFields(1, "io.xconn.topic", args=["hello"], options={"acknowledge": True}))
+        )
+        assert isinstance(await publisher.receive(), messages.Published)
+        event = await subscriber.receive()
+        assert event.subscription_id == subscribed.subscription_id
+        assert event.args == ["hello"]
+
+        subscriber.close()
+        publisher.close()
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(run())
+
+
+def test_rpc_over_unix_socket():
+    async def run():
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "router.sock")
+            server = RawSocketServer()
+            await server.start_unix(path)
+            callee = await connect_rawsocket("realm1", path=path)
+            caller = await connect_rawsocket("realm1", path=path, serializer_id=registry.JSON_SERIALIZER_ID)
+
+            await callee.send(messages.Register(messages.RegisterFields(1, "io.xconn.echo")))
+            assert isinstance(await callee.receive(), messages.Registered)
+
+            await caller.send(messages.Call(messages.CallFields(1, "io.xconn.echo", args=[1, 2])))
+            invocation = await callee.receive()
+            await callee.send(messages.Yield(messages.YieldFields(invocation.request_id, args=invocation.args)))
+            result = await caller.receive()
+            assert result.request_id == 1
+            assert result.args == [1, 2]
+
+            await caller.send(messages.Goodbye(messages.GoodbyeFields({}, uris.CLOSE_REALM)))
+            goodbye = await caller.receive()
+            assert goodbye.reason == uris.GOODBYE_AND_OUT
+            with pytest.raises(ConnectionResetError):
+                await caller.receive()
+
+            assert len(server.connections) == 1
+            callee.close()
+            with pytest.raises(ConnectionResetError):
+                await callee.receive()
+
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(run())
+
+
+def test_call_timeout_and_idle_realms():
+    async def run():
+        server = RawSocketServer(Router(idle_timeout=0.05))
+        await server.start()
+        port = server.sockets[0].getsockname()[1]
+        callee = await connect_rawsocket("realm1", port=port)
+        caller = await connect_rawsocket("realm1", port=port)
+
+        await callee.send(messages.Register(messages.RegisterFields(1, "io.xconn.hang")))
+        assert isinstance(await callee.receive(), messages.Registered)
+
+        # the callee never answers
+        await caller.send(messages.Call(messages.CallFields(1, "io.xconn.hang", options={"timeout": 50})))
+        invocation = await callee.receive()
+        error = await asyncio.wait_for(caller.receive(), 1)
+        assert error.uri == uris.TIMEOUT
+        interrupt = await callee.receive()
+        assert isinstance(interrupt, messages.Interrupt)
+        assert interrupt.request_id == invocation.request_id
+
+        temporary = await connect_rawsocket("realm2", port=port)
+        assert "realm2" in server.router
+        temporary.close()
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if "realm2" not in server.router:
+                break
+
+        assert "realm2" not in server.router
+        assert "realm1" in server.router
+
+        callee.close()
+        caller.close()
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(run())
+
+
+def test_slow_subscriber_backpressure():
+    async def run(path: str):
+        # kernel buffers of Unix sockets are small, unlike those of loopback TCP
+        server = RawSocketServer()
+        await server.start_unix(path)
+        subscriber = await connect_rawsocket("realm1", path=path)
+        publisher = await connect_rawsocket("realm1", path=path)
+        await subscriber.send(messages.Subscribe(messages.SubscribeFields(1, "io.xconn.topic")))
+        assert isinstance(await subscriber.receive(), messages.Subscribed)
+
+        # the subscriber stops reading
+        subscriber._protocol._transport.pause_reading()
+        count, payload = 200, "x" * 65536
+
+        async def publish():
+            for i in range(count):
+                await publisher.send(messages.Publish(messages.PublishFields(i + 1, "io.xconn.topic", args=[payload])))
+
+        task = asyncio.ensure_future(publish())
+        await asyncio.sleep(0.5)
+        # the server stopped reading from the publisher instead of buffering its events
+        assert not task.done()
+        peer = server.connections[subscriber.session_details.session_id]
+        assert peer._transport.get_write_buffer_size() < 1 << 20
+        assert server.connections[publisher.session_details.session_id]._reading_paused
+
+        subscriber._protocol._transport.resume_reading()
+        for i in range(count):
+            event = await asyncio.wait_for(subscriber.receive(), 5)
+            assert event.publication_id is not None
+
+        await asyncio.wait_for(task, 5)
+        subscriber.close()
+        publisher.close()
+        server.close()
+        await server.wait_closed()
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(os.path.join(directory, "router.sock")))
+
+
+def test_unsupported_serializer():
+    async def run():
+        server, port = await start_server()
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(rawsocket.Handshake(9).to_bytes())
+        reply = await reader.readexactly(rawsocket.HEADER_SIZE)
+        with pytest.raises(rawsocket.HandshakeError) as exc_info:
+            rawsocket.Handshake.from_bytes(reply)
+
+        assert exc_info.value.code == rawsocket.ERROR_SERIALIZER_UNSUPPORTED
+        writer.close()
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(run())
+
+
+def test_write_coalescing():
+    async def run():
+        serializer = MsgPackSerializer()
+        protocol = EchoProtocol(serializer)
+        transport = RecordingTransport()
+        protocol.connection_made(transport)
+
+        events = [messages.Event(messages.EventFields(1, i, args=[i])) for i in range(1, 101)]
+        for event in events:
+            protocol.send_message(event)
+
+        assert transport.writes == []
+        await asyncio.sleep(0)
+        assert transport.writes == [rawsocket.encode_frames(serializer, events)]
+
+        # frames are decoded whatever way the stream is split
+        data = transport.writes[0]
+        feed(protocol, data[:7])
+        feed(protocol, data[7:])
+        assert [message.args for message in protocol.received] == [[i] for i in range(1, 101)]
+
+    asyncio.run(run())
+
+
+def test_backpressure():
+    async def run():
+        protocol = EchoProtocol(JSONSerializer())
+        protocol.connection_made(RecordingTransport())
+        await protocol.drain()
+
+        protocol.pause_writing()
+        drain = asyncio.ensure_future(protocol.drain())
+        await asyncio.sleep(0)
+        assert not drain.done()
+
+        protocol.resume_writing()
+        await drain
+
+        protocol.pause_writing()
+        drain = asyncio.ensure_future(protocol.drain())
+        protocol.connection_lost(None)
+        with pytest.raises(ConnectionResetError):
+            await drain
+
+    asyncio.run(run())
+
+
+def test_read_buffer_reuse():
+    protocol = EchoProtocol(MsgPackSerializer())
+    assert protocol.get_buffer(-1) is protocol.get_buffer(-1)
+
+    # lazily deserialized messages reference the buffer they were read from
+    protocol = EchoProtocol(MsgPackSerializer(lazy=True))
+    assert protocol.get_buffer(-1) is not protocol.get_buffer(-1)
@@ -1,7 +1,16 @@
 import pytest
 
-from wampproto import messages
-from wampproto.broker import Broker
+from wampproto import messages, uris
+from wampproto.broker import (
+    Broker,
+    EventHistory,
+    EventQueue,
+    OVERFLOW_COALESCE,
+    OVERFLOW_DISCONNECT,
+    OVERFLOW_DROP_NEWEST,
+    OVERFLOW_DROP_OLDEST,
+)
+from wampproto.serializers import JSONSerializer, MsgPackSerializer, CBORSerializer
 from wampproto.types import MessageWithRecipient, SessionDetails
 
 
@@ -136,3 +145,441 @@ def test_publishing_to_topic():
         broker.receive_publish(5, publish)
 
     assert str(exc.value) == "cannot publish, session 5 doesn't exist"
+
+
+def test_publish_disclose_me():
+    broker = Broker()
+    topic_name = "io.xconn.test"
+    subscriber = SessionDetails(1, "realm1", "subscriber", "anonymous")
+    publisher = SessionDetails(2, "realm1", "publisher", "admin")
+    broker.add_session(subscriber)
+    broker.add_session(publisher)
+
+    broker.receive_message(subscriber.session_id, messages.Subscribe(messages.SubscribeFields(1, topic_name)))
+
+    publish = messages.Publish(messages.PublishFields(1, topic_name, options={"disclose_me": True}))
+    publication = broker.receive_publish(publisher.session_id, publish)
+    assert publication.event.details == {
+        "publisher": publisher.session_id,
+        "publisher_authid": publisher.authid,
+        "publisher_authrole": publisher.authrole,
+    }
+
+    publish = messages.Publish(messages.PublishFields(2, topic_name))
+    publication = broker.receive_publish(publisher.session_id, publish)
+    assert publication.event.details == {}
+
+
+@pytest.mark.parametrize("serializer", [JSONSerializer(), MsgPackSerializer(), CBORSerializer()])
+def test_publication_serialize_once(serializer):
+    broker = Broker()
+    topic_name = "io.xconn.test"
+    for session_id in range(1, 4):
+        broker.add_session(SessionDetails(session_id, "realm1", "authid", "authrole"))
+        broker.receive_message(session_id, messages.Subscribe(messages.SubscribeFields(1, topic_name)))
+
+    publish = messages.Publish(messages.PublishFields(1, topic_name, args=[1, 2], kwargs={"foo": "bar"}))
+    publication = broker.receive_publish(1, publish)
+    assert publication.recipients == [1, 2, 3]
+
+    data = publication.serialize(serializer)
+    assert data == serializer.serialize(publication.event)
+    assert publication.serialize(serializer) is data
+
+    details = {"publisher": 1}
+    event = messages.Event(
+        messages.EventFields(
+            publication.event.subscription_id, publication.event.publication_id, [1, 2], {"foo": "bar"}, details
+        )
+    )
+    assert publication.serialize_with_details(serializer, details) == serializer.serialize(event)
+
+
+def test_pattern_based_subscriptions():
+    broker = Broker()
+    broker.add_session(SessionDetails(1, "realm1", "authid", "authrole"))
+    broker.add_session(SessionDetails(2, "realm1", "authid", "authrole"))
+
+    prefix = messages.Subscribe(messages.SubscribeFields(1, "io.xconn", options={"match": "prefix"}))
+    prefix_subscribed = broker.receive_message(1, prefix).message
+    wildcard = messages.Subscribe(messages.SubscribeFields(2, "io..test", options={"match": "wildcard"}))
+    wildcard_subscribed = broker.receive_message(2, wildcard).message
+    exact = messages.Subscribe(messages.SubscribeFields(3, "io.xconn.test"))
+    broker.receive_message(2, exact)
+
+    assert broker.has_subscription("io.xconn", "prefix")
+    assert broker.has_subscription("io..test", "wildcard")
+    assert not broker.has_subscription("io.xconn")
+
+    publication = broker.receive_publish(1, messages.Publish(messages.PublishFields(1, "io.xconn.test", args=[1])))
+    assert publication.recipients == [2]
+    assert publication.event.details == {}
+
+    by_subscription = {p.event.subscription_id: p for p in publication.pattern_publications}
+    assert by_subscription.keys() == {prefix_subscribed.subscription_id, wildcard_subscribed.subscription_id}
+    assert by_subscription[prefix_subscribed.subscription_id].recipients == [1]
+    assert by_subscription[wildcard_subscribed.subscription_id].recipients == [2]
+    for pattern_publication in publication.pattern_publications:
+        assert pattern_publication.event.details == {"topic": "io.xconn.test"}
+        assert pattern_publication.event.args == [1]
+        assert pattern_publication.event.publication_id == publication.event.publication_id
+
+    publication = broker.receive_publish(1, messages.Publish(messages.PublishFields(1, "io.xconnect")))
+    assert publication.event is None
+    assert [p.recipients for p in publication.pattern_publications] == [[1]]
+
+    unsubscribe = messages.Unsubscribe(messages.UnsubscribeFields(4, prefix_subscribed.subscription_id))
+    broker.receive_message(1, unsubscribe)
+    assert not broker.has_subscription("io.xconn", "prefix")
+
+    broker.remove_session(2)
+    assert not broker.has_subscription("io..test", "wildcard")
+    assert not broker.has_subscription("io.xconn.test")
+
+
+def test_subscribe_invalid_match_policy():
+    broker = Broker()
+    broker.add_session(SessionDetails(1, "realm1", "authid", "authrole"))
+
+    subscribe = messages.Subscribe(messages.SubscribeFields(1, "io.xconn", options={"match": "regex"}))
+    error = broker.receive_message(1, subscribe).message
+    assert isinstance(error, messages.Error)
+    assert error.message_type == messages.Subscribe.TYPE
+    assert error.uri == "wamp.error.invalid_argument"
+
+
+def test_receive_batch():
+    broker = Broker()
+    broker.add_session(SessionDetails(1, "realm1", "authid", "authrole"))
+    broker.add_session(SessionDetails(2, "realm1", "authid", "authrole"))
+
+    results = broker.receive_batch(
+        1,
+        [
+            messages.Subscribe(messages.SubscribeFields(1, "io.xconn.test")),
+            messages.Subscribe(messages.SubscribeFields(2, "io.xconn", options={"match": "prefix"})),
+        ],
+    )
+    assert list(results.keys()) == [1]
+    assert [type(msg) for msg in results[1]] == [messages.Subscribed, messages.Subscribed]
+
+    broker.receive_message(2, messages.Subscribe(messages.SubscribeFields(1, "io.xconn.test")))
+
+    results = broker.receive_batch(
+        2,
+        [
+            messages.Publish(messages.PublishFields(1, "io.xconn.test", args=[1], options={"acknowledge": True})),
+            messages.Publish(messages.PublishFields(2, "io.xconn.other", args=[2])),
+        ],
+    )
+    assert [(type(msg), msg.args) for msg in results[1]] == [
+        (messages.Event, [1]),
+        (messages.Event, [1]),
+        (messages.Event, [2]),
+    ]
+    assert [type(msg) for msg in results[2]] == [messages.Event, messages.Published]
+
+
+def test_payload_passthrough():
+    broker = Broker()
+    broker.add_session(SessionDetails(1, "realm1", "authid", "authrole"))
+    broker.receive_message(1, messages.Subscribe(messages.SubscribeFields(1, "io.xconn.test")))
+    broker.receive_message(1, messages.Subscribe(messages.SubscribeFields(2, "io.xconn", options={"match": "prefix"})))
+
+    options = {"ppt_scheme": "x_custom", "ppt_serializer": "cbor", "acknowledge": True}
+    payload = memoryview(b"opaque")
+    publish = messages.Publish(messages.PublishFields(1, "io.xconn.test", options=options, payload=payload))
+    publication = broker.receive_publish(1, publish)
+
+    for pub in (publication, *publication.pattern_publications):
+        assert pub.event.payload is payload
+        assert pub.event.payload_serializer == 3
+        assert pub.event.args is None
+        assert pub.event.details["ppt_scheme"] == "x_custom"
+        assert pub.event.details["ppt_serializer"] == "cbor"
+        assert "acknowledge" not in pub.event.details
+
+
+def test_lazy_arguments_forwarded():
+    broker = Broker()
+    broker.add_session(SessionDetails(1, "realm1", "authid", "authrole"))
+    broker.receive_message(1, messages.Subscribe(messages.SubscribeFields(1, "io.xconn.test")))
+
+    publish = messages.Publish(messages.PublishFields(1, "io.xconn.test", args=[1, 2], kwargs={"three": 3}))
+    publish = MsgPackSerializer(lazy=True).deserialize(MsgPackSerializer().serialize(publish))
+    publication = broker.receive_publish(1, publish)
+    assert publication.event.raw_arguments is publish.raw_arguments
+
+    event = publication.event
+    details = {"publisher": 1}
+    for serializer in (JSONSerializer(), MsgPackSerializer(), CBORSerializer()):
+        expected = messages.Event(
+            messages.EventFields(event.subscription_id, event.publication_id, [1, 2], {"three": 3})
+        )
+        assert publication.serialize(serializer) == serializer.serialize(expected)
+
+        expected.details.update(details)
+        assert publication.serialize_with_details(serializer, details) == serializer.serialize(expected)
+
+
+def test_pattern_publications_share_template():
+    broker = Broker()
+    broker.add_session(SessionDetails(1, "realm1", "authid", "authrole"))
+    broker.receive_message(1, messages.Subscribe(messages.SubscribeFields(1, "io.xconn.test")))
+    broker.receive_message(1, messages.Subscribe(messages.SubscribeFields(2, "io.xconn", options={"match": "prefix"})))
+    broker.receive_message(
+        1, messages.Subscribe(messages.SubscribeFields(3, "io..test", options={"match": "wildcard"}))
+    )
+
+    publish = messages.Publish(messages.PublishFields(1, "io.xconn.test", args=["a", 1], kwargs={"b": [2]}))
+    publication = broker.receive_publish(1, publish)
+    assert len(publication.pattern_publications) == 2
+
+    for serializer in (JSONSerializer(), MsgPackSerializer(), CBORSerializer()):
+        template = publication.template(serializer)
+        for pub in (publication, *publication.pattern_publications):
+            assert pub.template(serializer) is template
+            assert pub.serialize(serializer) == serializer.serialize(pub.event)
+
+
+def test_invalid_uri():
+    broker = Broker(uri_validator=uris.URIValidator(strict=True))
+    broker.add_session(SessionDetails(1, "realm1", "authid", "authrole"))
+
+    subscribe = messages.Subscribe(messages.SubscribeFields(1, "io.xconn..test"))
+    error = broker.receive_message(1, subscribe).message
+    assert isinstance(error, messages.Error)
+    assert error.uri == uris.INVALID_URI
+    assert error.message_type == messages.Subscribe.TYPE
+
+    wildcard = messages.Subscribe(messages.SubscribeFields(2, "io.xconn..test", options={"match": "wildcard"}))
+    assert isinstance(broker.receive_message(1, wildcard).message, messages.Subscribed)
+
+    publish = messages.Publish(messages.PublishFields(3, "io.xconn.Test"))
+    publication = broker.receive_publish(1, publish)
+    assert publication.event is None
+    assert publication.ack is None
+
+    publish = messages.Publish(messages.PublishFields(4, "io.xconn.Test", options={"acknowledge": True}))
+    publication = broker.receive_publish(1, publish)
+    assert publication.ack.recipient == 1
+    assert publication.ack.message.uri == uris.INVALID_URI
+    assert publication.ack.message.request_id == 4
+
+
+def event(publication_id: int, subscription_id: int = 1) -> messages.Event:
+    return messages.Event(messages.EventFields(subscription_id, publication_id))
+
+
+@pytest.mark.parametrize(
+    "policy, kept, dropped",
+    [
+        (OVERFLOW_DROP_OLDEST, [3, 4, 5], 2),
+        (OVERFLOW_DROP_NEWEST, [1, 2, 3], 2),
+        (OVERFLOW_DISCONNECT, [], 5),
+        (OVERFLOW_COALESCE, [3, 4, 5], 2),
+    ],
+)
+def test_event_queue_overflow(policy: str, kept: list[int], dropped: int):
+    queue = EventQueue(3, policy)
+    for publication_id in range(1, 6):
+        queue.push((1, f"topic{publication_id}"), event(publication_id))
+
+    assert [e.publication_id for e in queue.take()] == kept
+    assert queue.dropped == dropped
+    assert queue.overflowed == (policy == OVERFLOW_DISCONNECT)
+    assert len(queue) == 0
+
+
+def test_event_queue_coalesce():
+    queue = EventQueue(3, OVERFLOW_COALESCE)
+    queue.push((1, "topic1"), event(1))
+    queue.push((1, "topic2"), event(2))
+    queue.push((2, "topic1"), event(3, 2))
+    queue.push((1, "topic1"), event(4))
+
+    # only the latest event per subscription and topic is kept, in order of publication
+    assert [e.publication_id for e in queue.take(2)] == [2, 3]
+    assert [e.publication_id for e in queue.take(2)] == [4]
+    assert queue.dropped == 1
+
+    with pytest.raises(ValueError):
+        EventQueue(0)
+
+    with pytest.raises(ValueError):
+        EventQueue(1, "unknown")
+
+
+def test_event_queues():
+    broker = Broker(queue_size=2)
+    broker.add_session(SessionDetails(1, "realm1", "publisher", "authrole"), queue_size=None)
+    broker.add_session(SessionDetails(2, "realm1", "slow", "authrole"))
+    broker.add_session(SessionDetails(3, "realm1", "fast", "authrole"), queue_size=4)
+    broker.add_session(SessionDetails(4, "realm1", "direct", "authrole"))
+    broker.add_session(SessionDetails(5, "realm1", "strict", "authrole"), overflow_policy=OVERFLOW_DISCONNECT)
+    broker.queues.pop(4)
+    for session_id in range(2, 6):
+        broker.receive_message(session_id, messages.Subscribe(messages.SubscribeFields(1, "io.xconn.test")))
+
+    for request_id in range(1, 4):
+        publish = messages.Publish(messages.PublishFields(request_id, "io.xconn.test", options={"acknowledge": True}))
+        publication = broker.receive_publish(1, publish)
+        assert publication.recipients == [4]
+        assert publication.ack.recipient == 1
+        assert publication.queued == ([2, 3, 5] if request_id < 3 else [2, 3])
+        assert publication.overflowed == ([5] if request_id == 3 else [])
+
+    # the subscription took the first ID
+    assert broker.pending_events(2) == 2
+    assert [e.publication_id for e in broker.take_events(3, limit=2)] == [2, 3]
+    assert [e.publication_id for e in broker.take_events(3)] == [4]
+    assert [e.publication_id for e in broker.take_events(2)] == [3, 4]
+    assert broker.take_events(5) == []
+    assert broker.queues[2].dropped == 1
+    assert broker.dropped_events == 4
+
+    with pytest.raises(ValueError) as exc:
+        broker.take_events(4)
+
+    assert str(exc.value) == "session 4 has no event queue"
+
+    broker.remove_session(2)
+    assert broker.pending_events(2) == 0
+
+    with pytest.raises(ValueError):
+        Broker(queue_size=1, overflow_policy="unknown")
+
+
+def test_event_queues_batch():
+    broker = Broker(queue_size=8)
+    broker.add_session(SessionDetails(1, "realm1", "authid", "authrole"))
+    broker.receive_message(1, messages.Subscribe(messages.SubscribeFields(1, "io.xconn", options={"match": "prefix"})))
+
+    publish = messages.Publish(messages.PublishFields(2, "io.xconn.test", options={"acknowledge": True}))
+    results = broker.receive_batch(1, [publish])
+    assert [type(message) for message in results[1]] == [messages.Published]
+
+    events = broker.take_events(1)
+    assert len(events) == 1
+    assert events[0].details == {"topic": "io.xconn.test"}
+
+
+def test_event_history():
+    broker = Broker()
+    broker.add_session(SessionDetails(1, "realm1", "authid", "authrole"))
+    broker.add_session(SessionDetails(2, "realm1", "authid", "authrole"))
+    broker.enable_history("io.xconn.test", depth=2)
+    broker.receive_message(2, messages.Subscribe(messages.SubscribeFields(1, "io.xconn.test")))
+    for i in range(3):
+        broker.receive_publish(
+            1, messages.Publish(messages.PublishFields(i + 1, "io.xconn.test", args=[i], options={"retain": i == 0}))
+        )
+
+    # not stored
+    broker.receive_publish(1, messages.Publish(messages.PublishFields(4, "io.xconn.other")))
+
+    subscribe = messages.Subscribe(messages.SubscribeFields(5, "io.xconn", options={"match": "prefix"}))
+    pattern_id = broker.receive_message(1, subscribe).message.subscription_id
+
+    events = broker.get_events(2, 1)
+    assert [(pub.event.subscription_id, pub.event.args) for pub in events] == [(1, [1]), (1, [2])]
+    assert events[0].recipients == [2]
+    assert [pub.event.args for pub in broker.get_events(2, 1, limit=1)] == [[2]]
+    assert broker.get_events(2, 1, limit=0) == []
+
+    events = broker.get_events(1, pattern_id)
+    assert [(pub.event.subscription_id, pub.event.details) for pub in events] == [
+        (pattern_id, {"topic": "io.xconn.test"}),
+        (pattern_id, {"topic": "io.xconn.test"}),
+    ]
+
+    retained = broker.get_retained(2, 1)
+    assert len(retained) == 1
+    assert retained[0].event.args == [0]
+    assert retained[0].event.details == {"retained": True}
+
+    with pytest.raises(ValueError) as exc:
+        broker.get_events(2, 99)
+
+    assert str(exc.value) == "subscription 99 doesn't exist"
+
+    broker.disable_history("io.xconn.test")
+    assert broker.get_events(2, 1) == []
+
+
+@pytest.mark.parametrize("serializer", [JSONSerializer(), MsgPackSerializer(), CBORSerializer()])
+def test_event_history_replay(serializer):
+    broker = Broker()
+    broker.add_session(SessionDetails(1, "realm1", "authid", "authrole"))
+    history = broker.enable_history("io.xconn.test", depth=4, serializer=serializer)
+    broker.receive_publish(
+        1, messages.Publish(messages.PublishFields(1, "io.xconn.test", args=["hello"], kwargs={"a": 1}))
+    )
+    assert len(history) == 1
+
+    broker.receive_message(1, messages.Subscribe(messages.SubscribeFields(2, "io.xconn.test")))
+    (publication,) = broker.get_events(1, 2)
+    # replayed events are encoded from the template stored with the event
+    assert publication.serialize(serializer) == serializer.serialize(publication.event)
+
+
+def test_event_history_limits():
+    serializer = MsgPackSerializer()
+    history = EventHistory(depth=10, max_bytes=100, serializer=serializer)
+    broker = Broker()
+    broker.add_session(SessionDetails(1, "realm1", "authid", "authrole"))
+    broker.histories["io.xconn.test"] = history
+
+    for i in range(10):
+        broker.receive_publish(1, messages.Publish(messages.PublishFields(i + 1, "io.xconn.test", args=["x" * 20])))
+
+    assert 0 < history.bytes <= 100
+    assert len(history) < 10
+    assert [entry.publication_id for entry in history.events()][-1] == 10
+    # the limit counts the events as encoded by the serializer of the history
+    assert history.bytes == sum(entry.size for entry in history.events())
+
+    # larger than the whole history
+    broker.receive_publish(
+        1, messages.Publish(messages.PublishFields(11, "io.xconn.test", args=["x" * 200], options={"retain": True}))
+    )
+    assert history.events()[-1].publication_id == 10
+    assert history.retained.publication_id == 11
+
+    retained_only = EventHistory(depth=0)
+    assert len(retained_only) == 0
+
+    with pytest.raises(ValueError):
+        EventHistory(depth=-1)
+
+
+def test_event_history_detached():
+    serializer = MsgPackSerializer()
+    broker = Broker()
+    broker.add_session(SessionDetails(1, "realm1", "authid", "authrole"))
+    history = broker.enable_history("io.xconn.test", depth=1, serializer=serializer)
+
+    data = bytearray(serializer.serialize(messages.Publish(messages.PublishFields(1, "io.xconn.test", args=["x"]))))
+    publish = MsgPackSerializer(lazy=True).deserialize(memoryview(data))
+    broker.receive_publish(1, publish)
+
+    (entry,) = history.events()
+    # nothing references the buffer the lazily deserialized arguments were read from
+    data[:] = bytes(len(data))
+    assert entry.size == history.bytes
+    broker.receive_message(1, messages.Subscribe(messages.SubscribeFields(2, "io.xconn.test")))
+    (publication,) = broker.get_events(1, 2)
+    assert publication.event.args == ["x"]
+    assert entry.size == len(serializer.serialize(publication.event))
+
+
+def test_get_retained_batch():
+    broker = Broker()
+    broker.add_session(SessionDetails(1, "realm1", "authid", "authrole"))
+    broker.enable_history("io.xconn.test", depth=0)
+    broker.receive_publish(1, messages.Publish(messages.PublishFields(1, "io.xconn.test", options={"retain": True})))
+
+    subscribe = messages.Subscribe(messages.SubscribeFields(2, "io.xconn.test", options={"get_retained": True}))
+    results = broker.receive_batch(1, [subscribe])
+    assert [type(message) for message in results[1]] == [messages.Subscribed, messages.Event]
+    assert results[1][1].subscription_id == results[1][0].subscription_id
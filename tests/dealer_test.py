@@ -1,6 +1,7 @@
 import pytest
 
-from wampproto import messages
+from wampproto import messages, types, uris
+from wampproto.serializers import MsgPackSerializer
 from wampproto.dealer import Dealer, OPTION_RECEIVE_PROGRESS, OPTION_PROGRESS
 from wampproto.types import SessionDetails
 
@@ -222,3 +223,401 @@ def test_progressive_call_invocations():
     msg = dealer.receive_message(caller_details.session_id, call)
     assert isinstance(msg.message, messages.Invocation)
     assert OPTION_PROGRESS not in msg.message.details
+
+
+def _shared_dealer(policy: str, callees: int = 3) -> Dealer:
+    dealer = Dealer()
+    dealer.add_session(SessionDetails(100, "realm1", "caller", "authrole"))
+    for session_id in range(1, callees + 1):
+        dealer.add_session(SessionDetails(session_id, "realm1", "callee", "authrole"))
+        register = messages.Register(messages.RegisterFields(1, "foo.bar", options={"invoke": policy}))
+        registered = dealer.receive_message(session_id, register)
+        assert isinstance(registered.message, messages.Registered)
+
+    return dealer
+
+
+def _call(dealer: Dealer, request_id: int) -> types.MessageWithRecipient:
+    return dealer.receive_message(100, messages.Call(messages.CallFields(request_id, "foo.bar")))
+
+
+@pytest.mark.parametrize(
+    "policy, expected",
+    [
+        ("roundrobin", [1, 2, 3, 1, 2, 3]),
+        ("first", [1, 1, 1, 1, 1, 1]),
+        ("last", [3, 3, 3, 3, 3, 3]),
+        ("least_busy", [1, 2, 3, 1, 2, 3]),
+    ],
+)
+def test_shared_registration_policies(policy, expected):
+    dealer = _shared_dealer(policy)
+    assert [_call(dealer, request_id).recipient for request_id in range(1, 7)] == expected
+
+
+def test_shared_registration_random():
+    dealer = _shared_dealer("random")
+    assert {_call(dealer, request_id).recipient for request_id in range(1, 50)} <= {1, 2, 3}
+
+
+def test_shared_registration_least_busy():
+    dealer = _shared_dealer("least_busy")
+    invocations = [_call(dealer, request_id) for request_id in range(1, 4)]
+    assert [invocation.recipient for invocation in invocations] == [1, 2, 3]
+    assert dealer.inflight_by_callee == {1: 1, 2: 1, 3: 1}
+
+    # callee 2 finishes its invocation and becomes the least busy one
+    yield_ = messages.Yield(messages.YieldFields(invocations[1].message.request_id))
+    dealer.receive_message(2, yield_)
+    assert dealer.inflight_by_callee == {1: 1, 3: 1}
+    assert _call(dealer, 4).recipient == 2
+    assert _call(dealer, 5).recipient == 1
+
+    # a removed callee is never selected again
+    dealer.remove_session(1)
+    assert {_call(dealer, request_id).recipient for request_id in range(6, 10)} == {2, 3}
+
+
+def test_shared_registration_unregister():
+    dealer = _shared_dealer("roundrobin", callees=2)
+    registration_id = dealer.registrations_by_procedure["foo.bar"].id
+
+    unregister = messages.Unregister(messages.UnregisterFields(2, registration_id))
+    assert isinstance(dealer.receive_message(1, unregister).message, messages.Unregistered)
+    assert dealer.has_registration("foo.bar")
+    assert [_call(dealer, request_id).recipient for request_id in range(1, 4)] == [2, 2, 2]
+
+    assert isinstance(dealer.receive_message(2, unregister).message, messages.Unregistered)
+    assert not dealer.has_registration("foo.bar")
+
+
+def test_shared_registration_errors():
+    dealer = _shared_dealer("roundrobin", callees=1)
+    dealer.add_session(SessionDetails(2, "realm1", "callee", "authrole"))
+
+    register = messages.Register(messages.RegisterFields(2, "foo.bar", options={"invoke": "roundrobin"}))
+    error = dealer.receive_message(1, register).message
+    assert error.uri == "wamp.error.procedure_already_exists"
+
+    register = messages.Register(messages.RegisterFields(2, "foo.bar", options={"invoke": "random"}))
+    error = dealer.receive_message(2, register).message
+    assert error.uri == "wamp.error.procedure_exists_with_different_invocation_policy"
+
+    register = messages.Register(messages.RegisterFields(2, "foo.bar", options={"invoke": "fastest"}))
+    error = dealer.receive_message(2, register).message
+    assert error.uri == "wamp.error.invalid_argument"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_call_timeout():
+    clock = FakeClock()
+    dealer = Dealer(clock=clock)
+    dealer.add_session(SessionDetails(1, "realm1", "callee", "authrole"))
+    dealer.add_session(SessionDetails(2, "realm1", "caller", "authrole"))
+    dealer.receive_message(1, messages.Register(messages.RegisterFields(1, "foo.bar")))
+
+    slow = dealer.receive_message(2, messages.Call(messages.CallFields(1, "foo.bar", options={"timeout": 1000})))
+    fast = dealer.receive_message(2, messages.Call(messages.CallFields(2, "foo.bar", options={"timeout": 500})))
+    dealer.receive_message(2, messages.Call(messages.CallFields(3, "foo.bar")))
+    assert dealer.next_deadline() == 0.5
+
+    # the fast call completes in time, its deadline is skipped
+    dealer.receive_message(1, messages.Yield(messages.YieldFields(fast.message.request_id)))
+    assert dealer.next_deadline() == 1.0
+    assert dealer.expire(0.9) == []
+
+    clock.now = 1.0
+    expired = dealer.expire()
+    assert len(expired) == 2
+
+    error, interrupt = expired
+    assert error.recipient == 2
+    assert isinstance(error.message, messages.Error)
+    assert error.message.message_type == messages.Call.TYPE
+    assert error.message.request_id == 1
+    assert error.message.uri == "wamp.error.timeout"
+
+    assert interrupt.recipient == 1
+    assert isinstance(interrupt.message, messages.Interrupt)
+    assert interrupt.message.request_id == slow.message.request_id
+    assert interrupt.message.options == {"mode": "killnowait", "reason": "wamp.error.timeout"}
+
+    assert slow.message.request_id not in dealer.pending_calls
+    assert (2, 1) not in dealer.call_to_invocation_id
+    assert dealer.next_deadline() is None
+    assert dealer.expire(10) == []
+
+    # a late yield for the expired call is dropped, once
+    assert dealer.receive_message(1, messages.Yield(messages.YieldFields(slow.message.request_id))) is None
+    with pytest.raises(ValueError):
+        dealer.receive_message(1, messages.Yield(messages.YieldFields(slow.message.request_id)))
+
+
+def test_call_timeout_callee_never_answers():
+    clock = FakeClock()
+    dealer = Dealer(clock=clock, abandoned_timeout=1)
+    dealer.add_session(SessionDetails(1, "realm1", "callee", "authrole"))
+    dealer.add_session(SessionDetails(2, "realm1", "caller", "authrole"))
+    dealer.receive_message(1, messages.Register(messages.RegisterFields(1, "foo.bar")))
+
+    # one call every millisecond, each timing out after 10ms
+    for i in range(1, 10_001):
+        clock.now = i / 1000
+        dealer.expire()
+        dealer.receive_message(2, messages.Call(messages.CallFields(i, "foo.bar", options={"timeout": 10})))
+
+    assert len(dealer.pending_calls) <= 10
+    # only the calls abandoned during the last second are remembered
+    assert 900 < len(dealer._abandoned_invocations) <= 1000
+
+    clock.now = 100.0
+    dealer.expire()
+    assert dealer.pending_calls == {}
+    assert len(dealer._abandoned_invocations) == len(dealer._abandoned_expiry) <= 10
+
+    clock.now = 101.0
+    dealer.expire()
+    assert dealer._abandoned_invocations == {}
+    assert len(dealer._abandoned_expiry) == 0
+
+
+def test_remove_session_with_pending_calls():
+    clock = FakeClock()
+    dealer = Dealer(clock=clock)
+    dealer.add_session(SessionDetails(1, "realm1", "callee", "authrole"))
+    dealer.add_session(SessionDetails(2, "realm1", "caller", "authrole"))
+    dealer.add_session(SessionDetails(3, "realm1", "callee", "authrole"))
+    dealer.receive_message(
+        1, messages.Register(messages.RegisterFields(1, "foo.bar", options={"invoke": "least_busy"}))
+    )
+    dealer.receive_message(3, messages.Register(messages.RegisterFields(1, "foo.baz")))
+    dealer.receive_message(2, messages.Call(messages.CallFields(1, "foo.bar", options={"timeout": 1000})))
+    invocation = dealer.receive_message(2, messages.Call(messages.CallFields(2, "foo.baz")))
+
+    # the callee leaves, its caller gets an error
+    (error,) = dealer.remove_session(1)
+    assert error.recipient == 2
+    assert error.message.message_type == messages.Call.TYPE
+    assert error.message.request_id == 1
+    assert error.message.uri == "wamp.error.canceled"
+    assert (2, 1) not in dealer.call_to_invocation_id
+    assert dealer.inflight_by_callee == {3: 1}
+
+    # the timeout of the ended call doesn't interrupt the removed session
+    clock.now = 10.0
+    assert dealer.expire() == []
+
+    # the caller leaves, the callee is interrupted
+    (interrupt,) = dealer.remove_session(2)
+    assert interrupt.recipient == 3
+    assert isinstance(interrupt.message, messages.Interrupt)
+    assert interrupt.message.request_id == invocation.message.request_id
+    assert interrupt.message.options == {"mode": "killnowait", "reason": "wamp.error.canceled"}
+    assert dealer.pending_calls == {}
+    assert dealer.call_to_invocation_id == {}
+    assert dealer.inflight_by_callee == {}
+
+    # the late yield of the interrupted callee is dropped
+    assert dealer.receive_message(3, messages.Yield(messages.YieldFields(invocation.message.request_id))) is None
+
+
+def test_call_invalid_timeout():
+    dealer = Dealer()
+    dealer.add_session(SessionDetails(1, "realm1", "callee", "authrole"))
+    dealer.receive_message(1, messages.Register(messages.RegisterFields(1, "foo.bar")))
+
+    for timeout in (-1, True, 10**400, 1.5, "100"):
+        call = messages.Call(messages.CallFields(1, "foo.bar", options={"timeout": timeout}))
+        error = dealer.receive_message(1, call)
+        assert error.message.uri == "wamp.error.invalid_argument"
+
+    assert dealer.pending_calls == {}
+
+
+def _setup_cancel() -> tuple[Dealer, types.MessageWithRecipient]:
+    dealer = Dealer()
+    dealer.add_session(SessionDetails(1, "realm1", "callee", "authrole"))
+    dealer.add_session(SessionDetails(2, "realm1", "caller", "authrole"))
+    dealer.receive_message(1, messages.Register(messages.RegisterFields(1, "foo.bar")))
+    invocation = dealer.receive_message(2, messages.Call(messages.CallFields(5, "foo.bar")))
+    return dealer, invocation
+
+
+def test_cancel_skip():
+    dealer, invocation = _setup_cancel()
+
+    msgs = dealer.receive_cancel(2, messages.Cancel(messages.CancelFields(5, {"mode": "skip"})))
+    assert len(msgs) == 1
+    assert msgs[0].recipient == 2
+    assert msgs[0].message.message_type == messages.Call.TYPE
+    assert msgs[0].message.request_id == 5
+    assert msgs[0].message.uri == "wamp.error.canceled"
+    assert dealer.pending_calls == {}
+    assert dealer.call_to_invocation_id == {}
+    assert dealer.inflight_by_callee == {}
+
+    # the callee still finishes the work, its result is dropped
+    assert dealer.receive_message(1, messages.Yield(messages.YieldFields(invocation.message.request_id))) is None
+
+
+def test_cancel_kill():
+    dealer, invocation = _setup_cancel()
+
+    msgs = dealer.receive_cancel(2, messages.Cancel(messages.CancelFields(5, {"mode": "kill"})))
+    assert len(msgs) == 1
+    assert msgs[0].recipient == 1
+    assert isinstance(msgs[0].message, messages.Interrupt)
+    assert msgs[0].message.request_id == invocation.message.request_id
+    assert msgs[0].message.options == {"mode": "kill", "reason": "wamp.error.canceled"}
+
+    # canceling twice doesn't interrupt again
+    assert dealer.receive_cancel(2, messages.Cancel(messages.CancelFields(5, {"mode": "kill"}))) == []
+
+    error = messages.Error(
+        messages.ErrorFields(messages.Invocation.TYPE, invocation.message.request_id, "wamp.error.canceled")
+    )
+    msg = dealer.receive_message(1, error)
+    assert msg.recipient == 2
+    assert msg.message.message_type == messages.Call.TYPE
+    assert msg.message.request_id == 5
+    assert msg.message.uri == "wamp.error.canceled"
+    assert dealer.pending_calls == {}
+
+
+def test_cancel_killnowait():
+    dealer, invocation = _setup_cancel()
+
+    error, interrupt = dealer.receive_cancel(2, messages.Cancel(messages.CancelFields(5)))
+    assert error.recipient == 2
+    assert error.message.uri == "wamp.error.canceled"
+    assert interrupt.recipient == 1
+    assert interrupt.message.request_id == invocation.message.request_id
+    assert interrupt.message.options == {"mode": "killnowait", "reason": "wamp.error.canceled"}
+    assert dealer.pending_calls == {}
+
+    error = messages.Error(
+        messages.ErrorFields(messages.Invocation.TYPE, invocation.message.request_id, "wamp.error.canceled")
+    )
+    assert dealer.receive_message(1, error) is None
+    with pytest.raises(ValueError):
+        dealer.receive_message(1, error)
+
+
+def test_cancel_completed_call():
+    dealer, invocation = _setup_cancel()
+    dealer.receive_message(1, messages.Yield(messages.YieldFields(invocation.message.request_id)))
+
+    assert dealer.receive_cancel(2, messages.Cancel(messages.CancelFields(5))) == []
+
+    msgs = dealer.receive_cancel(2, messages.Cancel(messages.CancelFields(5, {"mode": "abort"})))
+    assert msgs[0].message.uri == "wamp.error.invalid_argument"
+
+
+def test_receive_batch():
+    dealer = Dealer()
+    dealer.add_session(SessionDetails(1, "realm1", "callee", "authrole"))
+    dealer.add_session(SessionDetails(2, "realm1", "caller", "authrole"))
+    dealer.receive_message(1, messages.Register(messages.RegisterFields(1, "foo.bar")))
+
+    results = dealer.receive_batch(
+        2,
+        [
+            messages.Call(messages.CallFields(1, "foo.bar")),
+            messages.Call(messages.CallFields(2, "foo.bar")),
+            messages.Call(messages.CallFields(3, "foo.baz")),
+            messages.Cancel(messages.CancelFields(2)),
+        ],
+    )
+    assert [type(msg) for msg in results[1]] == [messages.Invocation, messages.Invocation, messages.Interrupt]
+    assert [(msg.request_id, msg.uri) for msg in results[2]] == [(3, uris.NO_SUCH_PROCEDURE), (2, uris.CANCELED)]
+
+    first, second, _ = results[1]
+    results = dealer.receive_batch(
+        1,
+        [
+            messages.Yield(messages.YieldFields(first.request_id)),
+            messages.Yield(messages.YieldFields(second.request_id)),
+        ],
+    )
+    # the yield for the canceled call is dropped
+    assert list(results.keys()) == [2]
+    assert [(type(msg), msg.request_id) for msg in results[2]] == [(messages.Result, 1)]
+
+
+def test_payload_passthrough():
+    dealer = Dealer()
+    dealer.add_session(SessionDetails(1, "realm1", "callee", "authrole"))
+    dealer.add_session(SessionDetails(2, "realm1", "caller", "authrole"))
+    dealer.receive_message(1, messages.Register(messages.RegisterFields(1, "foo.bar")))
+
+    options = {"ppt_scheme": "x_custom", "ppt_serializer": "msgpack", "receive_progress": True}
+    payload = memoryview(b"request")
+    call = messages.Call(messages.CallFields(1, "foo.bar", options=options, payload=payload))
+    invocation = dealer.receive_message(2, call).message
+    assert invocation.payload is payload
+    assert invocation.payload_serializer == 2
+    assert invocation.args is None
+    assert invocation.details == {"ppt_scheme": "x_custom", "ppt_serializer": "msgpack", "receive_progress": True}
+
+    yield_ = messages.Yield(messages.YieldFields(invocation.request_id, options=options, payload=b"response"))
+    result = dealer.receive_message(1, yield_).message
+    assert result.payload == b"response"
+    assert result.options["ppt_scheme"] == "x_custom"
+
+    call = messages.Call(messages.CallFields(2, "foo.bar", options=options, payload=payload))
+    invocation = dealer.receive_message(2, call).message
+    details = {"ppt_scheme": "x_custom"}
+    error = messages.Error(
+        messages.ErrorFields(
+            messages.Invocation.TYPE, invocation.request_id, "foo.error", details=details, payload=b"e"
+        )
+    )
+    error = dealer.receive_message(1, error).message
+    assert error.payload == b"e"
+    assert error.details == details
+
+
+def test_lazy_arguments_forwarded():
+    dealer = Dealer()
+    dealer.add_session(SessionDetails(1, "realm1", "callee", "authrole"))
+    dealer.add_session(SessionDetails(2, "realm1", "caller", "authrole"))
+    dealer.receive_message(1, messages.Register(messages.RegisterFields(1, "foo.bar")))
+
+    serializer = MsgPackSerializer(lazy=True)
+    call = messages.Call(messages.CallFields(1, "foo.bar", args=[b"x" * 1024], kwargs={"key": "value"}))
+    call = serializer.deserialize(serializer.serialize(call))
+    raw = call.raw_arguments
+
+    invocation = dealer.receive_message(2, call).message
+    assert invocation.raw_arguments is raw
+    # the callee gets the arguments without them having been decoded
+    assert call.raw_arguments is raw
+    invocation = serializer.deserialize(serializer.serialize(invocation))
+    assert invocation.args == [b"x" * 1024]
+    assert invocation.kwargs == {"key": "value"}
+
+
+def test_invalid_uri():
+    dealer = Dealer(uri_validator=uris.URIValidator())
+    dealer.add_session(SessionDetails(1, "realm1", "authid", "authrole"))
+
+    register = messages.Register(messages.RegisterFields(1, "io.xconn..test"))
+    error = dealer.receive_message(1, register).message
+    assert isinstance(error, messages.Error)
+    assert error.message_type == messages.Register.TYPE
+    assert error.uri == uris.INVALID_URI
+
+    call = messages.Call(messages.CallFields(2, "io.xconn test"))
+    error = dealer.receive_message(1, call).message
+    assert error.message_type == messages.Call.TYPE
+    assert error.uri == uris.INVALID_URI
+
+    call = messages.Call(messages.CallFields(3, "io.xconn.test"))
+    assert dealer.receive_message(1, call).message.uri == uris.NO_SUCH_PROCEDURE
@@ -24,25 +24,17 @@ class Authenticator(auth.IServerAuthenticator):
     "serializer", [serializers.JSONSerializer(), serializers.CBORSerializer(), serializers.MsgPackSerializer()]
 )
 def test_join_no_auth(serializer):
-    serializer_is_json = isinstance(serializer, serializers.JSONSerializer)
-
     authenticator = auth.AnonymousAuthenticator("anonymous", {})
     j = joiner.Joiner("realm1", serializer, authenticator)
     hello = j.send_hello()
     assert hello is not None
-    if serializer_is_json:
-        assert isinstance(hello, str)
-    else:
-        assert isinstance(hello, bytes)
+    assert isinstance(hello, bytes)
 
     a = acceptor.Acceptor(serializer)
     data, final = a.receive(hello)
     assert data is not None
     assert final
-    if serializer_is_json:
-        assert isinstance(data, str)
-    else:
-        assert isinstance(data, bytes)
+    assert isinstance(data, bytes)
 
     # for WAMP joiner, when the call to Joiner.receive() returns None
     # that means the session has been joined
@@ -61,8 +53,6 @@ def test_join_no_auth(serializer):
     ],
 )
 def test_join_auth(serializer, authenticator):
-    serializer_is_json = isinstance(serializer, serializers.JSONSerializer)
-
     j = joiner.Joiner("realm1", serializer, authenticator)
     hello = j.send_hello()
     assert hello is not None
@@ -71,10 +61,7 @@ def test_join_auth(serializer, authenticator):
     data, final = a.receive(hello)
     assert data is not None
     assert final is False
-    if serializer_is_json:
-        assert isinstance(hello, str)
-    else:
-        assert isinstance(hello, bytes)
+    assert isinstance(hello, bytes)
 
     data = j.receive(data)
     assert data is not None
@@ -84,10 +71,7 @@ def test_join_auth(serializer, authenticator):
     data, final = a.receive(data)
     assert data is not None
     assert final
-    if serializer_is_json:
-        assert isinstance(data, str)
-    else:
-        assert isinstance(data, bytes)
+    assert isinstance(data, bytes)
 
     data = j.receive(data)
     assert data is None
@@ -0,0 +1,57 @@
+from wampproto.matching import PrefixTrie, WildcardTrie
+
+
+def test_prefix_trie_match():
+    trie = PrefixTrie()
+    for pattern in ["com.app", "com.app.em", "com.app.topic.", "com", "", "org.app"]:
+        trie.insert(pattern, pattern)
+
+    assert len(trie) == 6
+    assert sorted(trie.match("com.app.emergency")) == ["", "com", "com.app", "com.app.em"]
+    assert sorted(trie.match("com.app.topic.foo")) == ["", "com", "com.app", "com.app.topic."]
+    assert sorted(trie.match("com.app.topic")) == ["", "com", "com.app"]
+    assert sorted(trie.match("com.apple")) == ["", "com", "com.app"]
+    assert sorted(trie.match("co")) == [""]
+    assert sorted(trie.match("org.app2.x")) == ["", "org.app"]
+
+
+def test_prefix_trie_remove():
+    trie = PrefixTrie()
+    trie.insert("com.app.topic", 1)
+    trie.insert("com.app", 2)
+
+    assert trie.get("com.app.topic") == 1
+    assert "com.app" in trie
+    assert trie.remove("com.app.topic") == 1
+    assert trie.remove("com.app.topic") is None
+    assert trie.match("com.app.topic") == [2]
+
+    assert trie.remove("com.app") == 2
+    assert len(trie) == 0
+    assert trie.match("com.app.topic") == []
+    # all nodes are pruned once empty
+    assert trie._root.children == {}
+
+
+def test_wildcard_trie_match():
+    trie = WildcardTrie()
+    for pattern in ["com..update", "com.app.update", "..update", "com.app.", "com.app"]:
+        trie.insert(pattern, pattern)
+
+    assert sorted(trie.match("com.app.update")) == ["..update", "com..update", "com.app.", "com.app.update"]
+    assert sorted(trie.match("org.app.update")) == ["..update"]
+    assert trie.match("com.app.update.more") == []
+    assert trie.match("com.app") == ["com.app"]
+
+
+def test_wildcard_trie_remove():
+    trie = WildcardTrie()
+    trie.insert("com..update", 1)
+    trie.insert("com.app.update", 2)
+
+    assert trie.remove("com..update") == 1
+    assert trie.remove("com..update") is None
+    assert trie.match("com.app.update") == [2]
+    assert trie.remove("com.app.update") == 2
+    assert len(trie) == 0
+    assert trie._root.children == {}
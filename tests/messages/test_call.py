@@ -320,3 +320,17 @@ def test_marshal_with_all_options():
 
     assert isinstance(message[5], dict)
     assert message[5] == kwargs
+
+
+def test_call_from_fields():
+    fields = messages.CallFields(367, "io.xconn.ping", args=[1], kwargs={"a": 1}, options={"timeout": 10})
+    call = messages.Call(fields)
+
+    assert isinstance(call, messages.CallFields)
+    assert call.request_id == fields.request_id
+    assert call.uri == fields.uri
+    assert call.args == fields.args
+    assert call.kwargs == fields.kwargs
+    assert call.options == fields.options
+    assert not hasattr(call, "__dict__")
+    assert not hasattr(fields, "__dict__")
@@ -0,0 +1,64 @@
+import pytest
+
+from wampproto import messages
+from wampproto.messages import util
+
+
+@pytest.mark.parametrize(
+    "message_class, msg",
+    [
+        (messages.Call, "msg"),
+        (messages.Call, [48]),
+        (messages.Call, [48, 1, {}, "io.xconn.test", [], {}, 7]),
+        (messages.Call, [47, 1, {}, "io.xconn.test"]),
+        (messages.Call, [48, 0, {}, "io.xconn.test"]),
+        (messages.Call, [48, "1", [], 5, {}, []]),
+        (messages.Call, [48, 1, {}, "io.xconn.test", None]),
+        (messages.Event, [36, 1, 2**53 + 1, {}, [1]]),
+        (messages.Event, [36, 1, 1, {}, [1], "kwargs"]),
+        (messages.Publish, [16, 1, {}, None, {}]),
+        (messages.Error, [8, "48", 1, {}, "wamp.error"]),
+        (messages.Hello, [1, 1, {"roles": {"foo": {}}, "authid": 1}]),
+        (messages.Welcome, [2, 1, {"roles": {}}]),
+    ],
+)
+def test_decoder_errors_match_validation_spec(message_class, msg):
+    with pytest.raises(ValueError) as expected:
+        util.validate_message(msg, message_class.TYPE, message_class.VALIDATION_SPEC)
+
+    with pytest.raises(ValueError) as actual:
+        message_class.parse(msg)
+
+    assert actual.value.args == expected.value.args
+
+
+def test_decoder_builds_fields():
+    fields = messages.Call.DECODER([48, 1, {"receive_progress": True}, "io.xconn.test", [1], {"a": 1}])
+    assert isinstance(fields, messages.CallFields)
+    assert fields.request_id == 1
+    assert fields.uri == "io.xconn.test"
+    assert fields.args == [1]
+    assert fields.kwargs == {"a": 1}
+    assert fields.options == {"receive_progress": True}
+
+    fields = messages.Event.DECODER([36, 1, 2, {}])
+    assert isinstance(fields, messages.EventFields)
+    assert fields.args is None
+    assert fields.kwargs is None
+
+
+def test_decoder_with_details_validator():
+    details = {"roles": {"caller": {}}, "authid": "foo", "authmethods": ["ticket"]}
+    fields = messages.Hello.DECODER([1, "realm1", details])
+    assert isinstance(fields, messages.HelloFields)
+    assert fields.realm == "realm1"
+    assert fields.roles == {"caller": {}}
+    assert fields.authid == "foo"
+    assert fields.authmethods == ["ticket"]
+    assert fields.authextra is None
+
+
+def test_decoder_builds_message():
+    call = messages.Call.DECODER([48, 1, {}, "io.xconn.test"], messages.Call)
+    assert isinstance(call, messages.Call)
+    assert call.marshal() == [48, 1, {}, "io.xconn.test"]
@@ -0,0 +1,63 @@
+import pytest
+
+from wampproto import messages
+from wampproto.messages import interning
+from wampproto.serializers import JSONSerializer
+
+
+def test_intern():
+    table = interning.URITable(max_size=8)
+    assert table.eviction == interning.EVICT_FIFO
+
+    uri = "".join(["io.xconn.", "test"])
+
+    assert table.intern(uri) is uri
+    assert table.intern("".join(["io.xconn.", "test"])) is uri
+    assert table.hits == 1
+    assert table.misses == 1
+    assert len(table) == 1
+
+
+@pytest.mark.parametrize(
+    "eviction, kept",
+    [
+        # "a" was used again, so "b" is the least recently used
+        (interning.EVICT_LRU, ["a", "c", "d"]),
+        (interning.EVICT_FIFO, ["b", "c", "d"]),
+        (interning.EVICT_NONE, ["a", "b", "c"]),
+    ],
+)
+def test_eviction(eviction, kept):
+    table = interning.URITable(max_size=3, eviction=eviction)
+    for uri in ("a", "b", "c", "a", "d"):
+        table.intern(uri)
+
+    assert [uri for uri in "abcd" if uri in table] == kept
+    assert len(table) == 3
+
+
+def test_invalid_table():
+    with pytest.raises(ValueError, match="at least 1"):
+        interning.URITable(max_size=0)
+
+    with pytest.raises(ValueError, match="invalid eviction policy 'random'"):
+        interning.URITable(eviction="random")
+
+
+def test_parse_interns_uris():
+    serializer = JSONSerializer()
+    data = serializer.serialize(messages.Call(messages.CallFields(1, "io.xconn.test")))
+    subscribe = serializer.serialize(messages.Subscribe(messages.SubscribeFields(2, "io.xconn.test")))
+
+    assert serializer.deserialize(data).uri is not serializer.deserialize(data).uri
+
+    table = interning.enable_uri_interning(max_size=16)
+    try:
+        first = serializer.deserialize(data)
+        assert serializer.deserialize(data).uri is first.uri
+        assert serializer.deserialize(subscribe).topic is first.uri
+        assert table.hits == 2
+    finally:
+        interning.disable_uri_interning()
+
+    assert interning.uri_table is None
@@ -0,0 +1,258 @@
+import pytest
+
+from wampproto import messages, uris
+from wampproto.acceptor import Acceptor
+from wampproto.router import Realm, Router
+from wampproto.types import SessionDetails
+
+
+def test_realm_dispatch():
+    realm = Realm("realm1")
+    realm.add_session(SessionDetails(1, "realm1", "callee", "authrole"))
+    realm.add_session(SessionDetails(2, "realm1", "caller", "authrole"))
+
+    registered = realm.receive(1, messages.Register(messages.RegisterFields(1, "io.xconn.echo")))
+    assert isinstance(registered[1][0], messages.Registered)
+
+    invocation = realm.receive(2, messages.Call(messages.CallFields(1, "io.xconn.echo", args=[1])))[1][0]
+    assert isinstance(invocation, messages.Invocation)
+
+    result = realm.receive(1, messages.Yield(messages.YieldFields(invocation.request_id, args=[1])))
+    assert result[2][0].args == [1]
+
+    results = realm.receive_batch(
+        2,
+        [
+            messages.Subscribe(messages.SubscribeFields(2, "io.xconn.topic")),
+            messages.Publish(messages.PublishFields(3, "io.xconn.topic", options={"acknowledge": True})),
+        ],
+    )
+    # publishers aren't excluded from the subscribers of the topic
+    assert [type(message) for message in results[2]] == [messages.Subscribed, messages.Event, messages.Published]
+
+    realm.receive(2, messages.Call(messages.CallFields(4, "io.xconn.echo")))
+    results = realm.receive(2, messages.Cancel(messages.CancelFields(4)))
+    assert results[2][0].uri == uris.CANCELED
+
+    with pytest.raises(ValueError) as exc:
+        realm.receive(1, messages.Hello(messages.HelloFields("realm1", {})))
+
+    assert str(exc.value) == "message type Hello not supported"
+
+
+def test_realm_dispatch_subclass():
+    class TracedPublish(messages.Publish):
+        pass
+
+    realm = Realm("realm1")
+    realm.add_session(SessionDetails(1, "realm1", "authid", "authrole"))
+    results = realm.receive(
+        1, TracedPublish(messages.PublishFields(1, "io.xconn.topic", options={"acknowledge": True}))
+    )
+    assert isinstance(results[1][0], messages.Published)
+    assert Realm.HANDLERS[TracedPublish] is Realm.HANDLERS[messages.Publish]
+
+
+def test_lazy_realms():
+    router = Router()
+    router.add_session(SessionDetails(1, "realm1", "authid", "authrole"))
+    router.add_session(SessionDetails(2, "realm2", "authid", "authrole"))
+    assert len(router) == 2
+
+    with pytest.raises(ValueError) as exc:
+        router.add_session(SessionDetails(1, "realm2", "authid", "authrole"))
+
+    assert str(exc.value) == "cannot add session twice"
+
+    router.receive(1, messages.Subscribe(messages.SubscribeFields(1, "io.xconn.topic")))
+    # realms don't share state
+    results = router.receive(2, messages.Publish(messages.PublishFields(1, "io.xconn.topic")))
+    assert results == {}
+
+    strict = Router(auto_create=False)
+    with pytest.raises(ValueError) as exc:
+        strict.add_session(SessionDetails(1, "realm1", "authid", "authrole"))
+
+    assert str(exc.value) == "realm realm1 doesn't exist"
+    strict.add_realm("realm1")
+    assert strict.add_session(SessionDetails(1, "realm1", "authid", "authrole")) is strict.get_realm("realm1")
+
+
+def test_evict_idle():
+    now = [0.0]
+    router = Router(idle_timeout=10, clock=lambda: now[0])
+    router.add_realm("static")
+    for sid in range(1, 4):
+        router.add_session(SessionDetails(sid, f"realm{sid}", "authid", "authrole"))
+
+    router.add_session(SessionDetails(10, "static", "authid", "authrole"))
+    router.remove_session(10)
+    router.remove_session(1)
+    now[0] = 5.0
+    router.remove_session(2)
+
+    assert router.evict_idle() == []
+    now[0] = 10.0
+    assert router.evict_idle() == ["realm1"]
+
+    # a session joining again keeps the realm
+    router.add_session(SessionDetails(4, "realm2", "authid", "authrole"))
+    now[0] = 100.0
+    assert router.evict_idle() == []
+    assert sorted(router.realms) == ["realm2", "realm3", "static"]
+
+    assert Router().evict_idle(now=1e9) == []
+
+
+def test_goodbye():
+    router = Router()
+    router.add_session(SessionDetails(1, "realm1", "authid", "authrole"))
+    results = router.receive(1, messages.Goodbye(messages.GoodbyeFields({}, uris.CLOSE_REALM)))
+    assert results[1][0].reason == uris.GOODBYE_AND_OUT
+
+    with pytest.raises(ValueError) as exc:
+        router.receive(1, messages.Subscribe(messages.SubscribeFields(1, "io.xconn.topic")))
+
+    assert str(exc.value) == "session 1 doesn't exist"
+
+
+def test_remove_session_ends_calls():
+    router = Router()
+    router.add_session(SessionDetails(1, "realm1", "callee", "authrole"))
+    router.add_session(SessionDetails(2, "realm1", "caller", "authrole"))
+    router.receive(1, messages.Register(messages.RegisterFields(1, "io.xconn.echo")))
+    router.receive(2, messages.Call(messages.CallFields(1, "io.xconn.echo")))
+
+    results = router.receive(1, messages.Goodbye(messages.GoodbyeFields({}, uris.CLOSE_REALM)))
+    assert results[1][0].reason == uris.GOODBYE_AND_OUT
+    assert results[2][0].uri == uris.CANCELED
+    assert router.remove_session(2) == {}
+
+
+def test_goodbye_batch():
+    router = Router()
+    router.add_session(SessionDetails(1, "realm1", "authid", "authrole"))
+    router.add_session(SessionDetails(2, "realm1", "authid", "authrole"))
+    results = router.receive_batch(
+        1,
+        [
+            messages.Subscribe(messages.SubscribeFields(1, "io.xconn.topic")),
+            messages.Goodbye(messages.GoodbyeFields({}, uris.CLOSE_REALM)),
+            messages.Publish(messages.PublishFields(2, "io.xconn.topic")),
+        ],
+    )
+    assert [type(message) for message in results[1]] == [messages.Subscribed, messages.Goodbye]
+    assert results[1][1].reason == uris.GOODBYE_AND_OUT
+    assert not router.get_realm("realm1").broker.has_subscription("io.xconn.topic")
+
+    results = router.receive_batch(2, [messages.Goodbye(messages.GoodbyeFields({}, uris.CLOSE_REALM))])
+    assert results[2][0].reason == uris.GOODBYE_AND_OUT
+
+    with pytest.raises(ValueError) as exc:
+        router.receive_batch(2, [])
+
+    assert str(exc.value) == "session 2 doesn't exist"
+
+
+def test_attach():
+    acceptor = Acceptor()
+    acceptor.receive_message(messages.Hello(messages.HelloFields("realm1", {"caller": {}}, "authid", ["anonymous"])))
+
+    router = Router()
+    realm = router.attach(acceptor)
+    assert realm.name == "realm1"
+    assert router.realm_of(acceptor.get_session_details().session_id) is realm
+
+
+def test_expire():
+    now = [0.0]
+    router = Router(clock=lambda: now[0])
+    router.add_session(SessionDetails(1, "realm1", "callee", "authrole"))
+    router.add_session(SessionDetails(2, "realm1", "caller", "authrole"))
+    router.add_session(SessionDetails(3, "realm2", "idle", "authrole"))
+    router.receive(1, messages.Register(messages.RegisterFields(1, "io.xconn.slow")))
+    router.receive(2, messages.Call(messages.CallFields(1, "io.xconn.slow", options={"timeout": 100})))
+
+    assert router.next_deadline() == 0.1
+
+    now[0] = 1.0
+    expired = router.expire()
+    assert [result.recipient for result in expired] == [2, 1]
+    assert router.next_deadline() is None
+
+
+def test_expire_visits_due_realms():
+    now = [0.0]
+    router = Router(clock=lambda: now[0])
+    for sid in range(1, 1001):
+        router.add_session(SessionDetails(sid, f"realm{sid}", "authid", "authrole"))
+
+    visited = []
+    for sid, timeout in ((1, 1000), (2, 2000)):
+        realm = router.realm_of(sid)
+        expire = realm.dealer.expire
+        realm.dealer.expire = lambda now, expire=expire, name=realm.name: visited.append(name) or expire(now)
+        router.receive(sid, messages.Register(messages.RegisterFields(1, "io.xconn.slow")))
+        router.receive_batch(
+            sid,
+            [
+                messages.Call(messages.CallFields(1, "io.xconn.slow", options={"timeout": timeout})),
+                messages.Call(messages.CallFields(2, "io.xconn.slow", options={"timeout": timeout * 2})),
+            ],
+        )
+
+    assert router.next_deadline() == 1.0
+    now[0] = 1.0
+    assert len(router.expire()) == 2
+    assert visited == ["realm1"]
+    # the second call of realm1 is still tracked
+    assert router.next_deadline() == 2.0
+
+    now[0] = 10.0
+    assert len(router.expire()) == 6
+    assert sorted(visited) == ["realm1", "realm1", "realm2"]
+    assert router.next_deadline() is None
+
+
+def test_event_history():
+    realm = Realm("realm1")
+    realm.add_session(SessionDetails(1, "realm1", "publisher", "authrole"))
+    realm.add_session(SessionDetails(2, "realm1", "subscriber", "authrole"))
+
+    # without histories the meta procedure is left to the dealer
+    results = realm.receive(2, messages.Call(messages.CallFields(1, uris.SUBSCRIPTION_GET_EVENTS, args=[1])))
+    assert results[2][0].uri == uris.NO_SUCH_PROCEDURE
+
+    realm.broker.enable_history("io.xconn.topic", depth=10)
+    for i in range(3):
+        realm.receive(
+            1, messages.Publish(messages.PublishFields(i + 1, "io.xconn.topic", args=[i], options={"retain": True}))
+        )
+
+    results = realm.receive(
+        2,
+        messages.Subscribe(messages.SubscribeFields(2, "io.xconn", options={"match": "prefix", "get_retained": True})),
+    )
+    subscribed, event = results[2]
+    assert event.subscription_id == subscribed.subscription_id
+    assert event.args == [2]
+    assert event.details == {"topic": "io.xconn.topic", "retained": True}
+
+    call = messages.Call(messages.CallFields(3, uris.SUBSCRIPTION_GET_EVENTS, args=[subscribed.subscription_id, 2]))
+    result = realm.receive(2, call)[2][0]
+    assert isinstance(result, messages.Result)
+    assert result.args == [
+        [
+            {"publication": 2, "topic": "io.xconn.topic", "args": [1], "kwargs": None},
+            {"publication": 3, "topic": "io.xconn.topic", "args": [2], "kwargs": None},
+        ]
+    ]
+
+    results = realm.receive(2, messages.Call(messages.CallFields(4, uris.SUBSCRIPTION_GET_EVENTS, args=[99])))
+    assert results[2][0].uri == uris.NO_SUCH_SUBSCRIPTION
+
+    sid = subscribed.subscription_id
+    invalid = [None, [], [True], ["1"], [1.0], [sid, "5"], [sid, 2.5], [sid, False], [sid, -1], [sid, 1, 2]]
+    for args in invalid:
+        results = realm.receive(2, messages.Call(messages.CallFields(5, uris.SUBSCRIPTION_GET_EVENTS, args=args)))
+        assert results[2][0].uri == uris.INVALID_ARGUMENT, args
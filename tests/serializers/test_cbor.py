@@ -12,3 +12,64 @@ def test_serializer():
     assert isinstance(obj, messages.Hello)
     assert obj.realm == hello.realm
     assert obj.roles == hello.roles
+
+
+def test_feed():
+    serializer = serializers.CBORSerializer()
+    call = messages.Call(messages.CallFields(4, "io.xconn.test", args=["x" * 10_000]))
+    data = b"".join(serializer.serialize(messages.Call(messages.CallFields(i, "io.xconn.test"))) for i in range(1, 4))
+    data += serializer.serialize(call)
+
+    received = serializer.feed(data[:-100])
+    assert [message.request_id for message in received] == [1, 2, 3]
+    assert serializer.feed(b"") == []
+
+    received = serializer.feed(memoryview(data)[-100:])
+    assert len(received) == 1
+    assert received[0].args == call.args
+
+
+def test_feed_split():
+    serializer = serializers.CBORSerializer()
+    kwargs = {"nested": [{"a": 1.5, "b": None, "c": True}, b"\x00" * 300, -(1 << 40)], "text": "é" * 100}
+    calls = [messages.Call(messages.CallFields(i, "io.xconn.test", args=[i], kwargs=kwargs)) for i in range(1, 4)]
+    data = b"".join(serializer.serialize(call) for call in calls)
+
+    # one byte at a time
+    received = []
+    for i in range(len(data)):
+        received.extend(serializer.feed(data[i : i + 1]))
+
+    assert [message.request_id for message in received] == [1, 2, 3]
+    assert received[2].kwargs == kwargs
+
+
+def test_feed_indefinite_lengths_and_tags():
+    serializer = serializers.CBORSerializer()
+    # [48, 1, {}, "io.xconn.test", [_ "ab", "c"], {_ "k": tag 1(0)}] with indefinite lengths
+    data = bytes([0x86, 0x18, 48, 0x01, 0xA0, 0x6D]) + b"io.xconn.test"
+    data += bytes([0x9F, 0x7F, 0x62]) + b"ab" + bytes([0x61]) + b"c" + bytes([0xFF, 0xFF])
+    data += bytes([0xBF, 0x61]) + b"k" + bytes([0xC1, 0x00, 0xFF])
+
+    assert serializer.feed(data[:-1]) == []
+    (call,) = serializer.feed(data[-1:] + data)[:1]
+    assert call.args == ["abc"]
+    assert call.kwargs["k"].timestamp() == 0
+    assert len(serializer.feed(b"")) == 0
+
+
+def test_feed_large_message_in_chunks():
+    serializer = serializers.CBORSerializer()
+    kwargs = {"x": "y" * (1 << 20)}
+    call = messages.Call(messages.CallFields(1, "io.xconn.test", args=list(range(20_000)), kwargs=kwargs))
+    data = serializer.serialize(call)
+
+    received = []
+    for i in range(0, len(data), 4096):
+        received.extend(serializer.feed(data[i : i + 4096]))
+
+    assert len(received) == 1
+    assert received[0].args == call.args
+    assert received[0].kwargs == kwargs
+    assert serializer._buffer == bytearray()
+    assert serializer._scanner.position == 0
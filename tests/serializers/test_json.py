@@ -1,4 +1,8 @@
+import pytest
+
+from wampproto import messages
 from wampproto.messages.hello import Hello
+from wampproto.serializers import json
 from wampproto.serializers.json import JSONSerializer
 
 
@@ -7,9 +11,45 @@ def test_serializer():
     hello = Hello.parse([1, "realm1", {"roles": {"callee": {}}}])
 
     data = serializer.serialize(hello)
-    assert isinstance(data, str)
+    assert isinstance(data, bytes)
 
     obj = serializer.deserialize(data)
     assert isinstance(obj, Hello)
     assert obj.realm == hello.realm
     assert obj.roles == hello.roles
+
+
+BACKENDS = list(json.BACKENDS)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_backend_output(backend):
+    call = messages.Call(messages.CallFields(1, "io.xconn.test", args=["héllo", 1.5, None, 2**70], kwargs={"a": True}))
+
+    data = JSONSerializer(backend=backend).serialize(call)
+    assert data == b'[48,1,{},"io.xconn.test",["h\xc3\xa9llo",1.5,null,1180591620717411303424],{"a":true}]'
+
+    received = JSONSerializer(backend=backend).deserialize(data)
+    assert received.args == ["héllo", 1.5, None, 2**70]
+    assert received.kwargs == {"a": True}
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_backend_binary(backend):
+    serializer = JSONSerializer(backend=backend)
+    event = messages.Event(messages.EventFields(1, 2, args=[b"\x00\xff", {"nested": [b"abc"]}], kwargs={"k": b""}))
+
+    data = serializer.serialize(event)
+    assert data == b'[36,1,2,{},["\\u0000AP8=",{"nested":["\\u0000YWJj"]}],{"k":"\\u0000"}]'
+
+    received = serializer.deserialize(data)
+    assert received.args == [b"\x00\xff", {"nested": [b"abc"]}]
+    assert received.kwargs == {"k": b""}
+
+    lazy = JSONSerializer(lazy=True, backend=backend).deserialize(data)
+    assert lazy.args == [b"\x00\xff", {"nested": [b"abc"]}]
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError, match="JSON backend 'unknown' is not available"):
+        JSONSerializer(backend="unknown")
@@ -1,4 +1,6 @@
-from wampproto.messages import Hello
+import msgpack
+
+from wampproto.messages import Call, CallFields, Hello
 from wampproto.serializers.msgpack import MsgPackSerializer
 
 
@@ -13,3 +15,28 @@ def test_serializer():
     assert isinstance(obj, Hello)
     assert obj.realm == hello.realm
     assert obj.roles == hello.roles
+
+
+def test_serialize_reuses_packer():
+    serializer = MsgPackSerializer()
+    call = Call(CallFields(1, "io.xconn.test", args=[1, "two", b"\x03"], kwargs={"four": 4.0}))
+    hello = Hello.parse([1, "realm1", {"roles": {"callee": {}}}])
+
+    assert serializer.serialize(call) == msgpack.dumps(call.marshal())
+    assert serializer.serialize(hello) == msgpack.dumps(hello.marshal())
+    assert serializer.serialize(call) == msgpack.dumps(call.marshal())
+
+
+def test_feed():
+    serializer = MsgPackSerializer()
+    call = Call(CallFields(1, "io.xconn.test", args=["x" * 10_000]))
+    data = b"".join(serializer.serialize(Call(CallFields(i, "io.xconn.test"))) for i in range(1, 4))
+    data += serializer.serialize(call)
+
+    received = serializer.feed(data[:-100])
+    assert [message.request_id for message in received] == [1, 2, 3]
+    assert serializer.feed(b"") == []
+
+    received = serializer.feed(memoryview(data)[-100:])
+    assert len(received) == 1
+    assert received[0].args == call.args
@@ -0,0 +1,61 @@
+import pytest
+
+from wampproto import serializers
+from wampproto.acceptor import Acceptor
+from wampproto.joiner import Joiner
+from wampproto.serializers import registry
+from wampproto.session import WAMPSession
+
+
+def test_get_serializer():
+    assert isinstance(serializers.get_serializer("wamp.2.json"), serializers.JSONSerializer)
+    assert isinstance(serializers.get_serializer("wamp.2.msgpack"), serializers.MsgPackSerializer)
+    assert isinstance(serializers.get_serializer("wamp.2.cbor"), serializers.CBORSerializer)
+
+    # every connection gets its own instance
+    assert serializers.get_serializer("wamp.2.cbor") is not serializers.get_serializer("wamp.2.cbor")
+
+    with pytest.raises(ValueError, match="unsupported subprotocol 'wamp.2.ubjson'"):
+        serializers.get_serializer("wamp.2.ubjson")
+
+
+def test_get_rawsocket_serializer():
+    assert isinstance(serializers.get_rawsocket_serializer(1), serializers.JSONSerializer)
+    assert isinstance(serializers.get_rawsocket_serializer(2), serializers.MsgPackSerializer)
+    assert isinstance(serializers.get_rawsocket_serializer(3), serializers.CBORSerializer)
+
+    with pytest.raises(ValueError, match="unsupported rawsocket serializer id 4"):
+        serializers.get_rawsocket_serializer(4)
+
+
+def test_negotiate_subprotocol():
+    assert serializers.subprotocols() == ["wamp.2.msgpack", "wamp.2.cbor", "wamp.2.json"]
+
+    assert serializers.negotiate_subprotocol(["wamp.2.json", "wamp.2.cbor"]) == "wamp.2.cbor"
+    assert serializers.negotiate_subprotocol(["wamp.2.json", "wamp.2.msgpack", "wamp.2.cbor"]) == "wamp.2.msgpack"
+    assert serializers.negotiate_subprotocol(["wamp.2.json"]) == "wamp.2.json"
+    assert serializers.negotiate_subprotocol(["wamp.2.ubjson"]) is None
+    assert serializers.negotiate_subprotocol([]) is None
+
+
+def test_register_serializer():
+    serializers.register_serializer("wamp.2.json.lazy", None, lambda: serializers.JSONSerializer(lazy=True), 40)
+    try:
+        assert serializers.subprotocols()[0] == "wamp.2.json.lazy"
+        assert serializers.negotiate_subprotocol(["wamp.2.msgpack", "wamp.2.json.lazy"]) == "wamp.2.json.lazy"
+
+        with pytest.raises(ValueError, match="subprotocol 'wamp.2.json.lazy' is already registered"):
+            serializers.register_serializer("wamp.2.json.lazy", None, serializers.JSONSerializer)
+
+        with pytest.raises(ValueError, match="rawsocket id 1 is already registered"):
+            serializers.register_serializer("wamp.2.json.other", 1, serializers.JSONSerializer)
+
+        assert "wamp.2.json.other" not in registry.SUBPROTOCOLS
+    finally:
+        del registry.SUBPROTOCOLS["wamp.2.json.lazy"]
+
+
+def test_default_serializer_not_shared():
+    assert Joiner("realm1")._serializer is not Joiner("realm1")._serializer
+    assert Acceptor()._serializer is not Acceptor()._serializer
+    assert WAMPSession()._serializer is not WAMPSession()._serializer
@@ -1,6 +1,8 @@
 import pytest
 
-from wampproto.serializers.serializer import to_message
+from wampproto import messages
+from wampproto.serializers import JSONSerializer, MsgPackSerializer, CBORSerializer
+from wampproto.serializers.serializer import to_message, register_message_type, MESSAGE_TYPES
 
 
 def test_to_message_with_invalid_type():
@@ -72,3 +74,228 @@ def test_to_message_with_goodbye():
     goodbye = to_message([6, details, reason])
     assert goodbye.details == details
     assert goodbye.reason == reason
+
+
+@pytest.mark.parametrize("serializer", [JSONSerializer(), MsgPackSerializer(), CBORSerializer()])
+@pytest.mark.parametrize(
+    "message",
+    [
+        messages.Event(messages.EventFields(1, 2)),
+        messages.Event(messages.EventFields(1, 2, args=["a", 1], kwargs={"b": None}, details={"topic": "io"})),
+        messages.Result(messages.ResultFields(1, args=list(range(30)))),
+    ],
+)
+def test_join_items_matches_serialize(serializer, message):
+    items = [serializer.serialize_item(value) for value in message.marshal()]
+    assert serializer.join_items(items) == serializer.serialize(message)
+
+
+@pytest.mark.parametrize("serializer", [JSONSerializer(), MsgPackSerializer(), CBORSerializer()])
+@pytest.mark.parametrize(
+    "message",
+    [
+        messages.Event(messages.EventFields(1, 2)),
+        messages.Event(messages.EventFields(1, 2, args=[b"\x01", "é"])),
+        messages.Event(messages.EventFields(1, 2, kwargs={"a": [1.5, True]}, details={"topic": "io.xconn"})),
+        messages.Result(messages.ResultFields(1)),
+        messages.Result(messages.ResultFields(1, args=[None], kwargs={}, options={"progress": True})),
+        messages.Invocation(messages.InvocationFields(1, 2)),
+        messages.Invocation(messages.InvocationFields(1, 2, args=[{"nested": [1, 2]}], details={"caller": 3})),
+        messages.Invocation(messages.InvocationFields(1, 2, kwargs={"k": "v"})),
+    ],
+)
+def test_marshal_fast_matches_marshal(serializer, message):
+    items = message.marshal_fast()
+    assert list(items) == message.marshal()
+
+    encoded = [serializer.serialize_item(value) for value in message.marshal()]
+    assert serializer.serialize(message) == serializer.join_items(encoded)
+
+
+def test_marshal_fast_unsupported():
+    assert messages.Call(messages.CallFields(1, "io.xconn.test")).marshal_fast() is None
+
+    payload = messages.Event(messages.EventFields(1, 2, args=[b"\x00"], details=dict(PPT_OPTIONS)))
+    assert payload.marshal_fast() is None
+
+    lazy = JSONSerializer(lazy=True).deserialize(b'[50,1,{},["a"]]')
+    assert lazy.marshal_fast() is None
+    assert JSONSerializer().serialize(lazy) == b'[50,1,{},["a"]]'
+
+
+@pytest.mark.parametrize("serializer", [JSONSerializer(), MsgPackSerializer(), CBORSerializer()])
+def test_template(serializer):
+    event = messages.Event(messages.EventFields(1, 2, args=[{"large": "x" * 100}], kwargs={"k": b"\x01"}))
+    template = serializer.template(event.marshal(), (1, 3))
+
+    for subscription_id, details in ((1, {}), (300, {"topic": "io.xconn.test"}), (2**40, {"publisher": 7})):
+        expected = messages.Event(messages.EventFields(subscription_id, 2, event.args, event.kwargs, details))
+        assert template.fill(subscription_id, details) == serializer.serialize(expected)
+
+    details = serializer.serialize_item({"publisher": 7})
+    expected = messages.Event(messages.EventFields(5, 2, event.args, event.kwargs, {"publisher": 7}))
+    assert template.fill_encoded(serializer.serialize_item(5), details) == serializer.serialize(expected)
+
+    with pytest.raises(ValueError, match="template takes 2 values but 1 were given"):
+        template.fill(1)
+
+
+PPT_OPTIONS = {"ppt_scheme": "x_custom", "ppt_serializer": "cbor"}
+PAYLOAD = b"\x00\x01opaque\xff"
+
+
+@pytest.mark.parametrize("serializer", [JSONSerializer(), MsgPackSerializer(), CBORSerializer()])
+@pytest.mark.parametrize(
+    "message",
+    [
+        messages.Call(messages.CallFields(1, "io.xconn.test", options=PPT_OPTIONS, payload=PAYLOAD)),
+        messages.Invocation(messages.InvocationFields(1, 2, details=PPT_OPTIONS, payload=PAYLOAD)),
+        messages.Yield(messages.YieldFields(1, options=PPT_OPTIONS, payload=PAYLOAD)),
+        messages.Result(messages.ResultFields(1, options=PPT_OPTIONS, payload=PAYLOAD)),
+        messages.Publish(messages.PublishFields(1, "io.xconn.test", options=PPT_OPTIONS, payload=PAYLOAD)),
+        messages.Event(messages.EventFields(1, 2, details=PPT_OPTIONS, payload=PAYLOAD)),
+        messages.Error(messages.ErrorFields(48, 1, "io.xconn.error", details=PPT_OPTIONS, payload=PAYLOAD)),
+    ],
+)
+def test_payload_passthrough(serializer, message):
+    deserialized = serializer.deserialize(serializer.serialize(message))
+
+    assert type(deserialized) is type(message)
+    assert deserialized.payload_is_binary()
+    assert isinstance(deserialized.payload, memoryview)
+    assert deserialized.payload == PAYLOAD
+    assert deserialized.payload_serializer == 3
+    assert deserialized.args is None
+    assert deserialized.kwargs is None
+
+
+def test_payload_passthrough_json_binary_convention():
+    call = messages.Call(messages.CallFields(1, "io.xconn.test", options=PPT_OPTIONS, payload=b"hello"))
+    data = JSONSerializer().serialize(call)
+    assert data == b'[48,1,{"ppt_scheme":"x_custom","ppt_serializer":"cbor"},"io.xconn.test",["\\u0000aGVsbG8="]]'
+
+
+def test_payload_passthrough_requires_binary_args():
+    # a ppt_scheme with regular arguments isn't a passthrough payload
+    call = to_message([48, 1, {"ppt_scheme": "x_custom"}, "io.xconn.test", ["hello"]])
+    assert not call.payload_is_binary()
+    assert call.payload is None
+    assert call.args == ["hello"]
+
+    call = to_message([48, 1, {}, "io.xconn.test", [b"hello"]])
+    assert not call.payload_is_binary()
+    assert call.args == [b"hello"]
+
+
+@pytest.mark.parametrize("serializer_type", [JSONSerializer, MsgPackSerializer, CBORSerializer])
+def test_lazy_deserialize(serializer_type):
+    eager = serializer_type()
+    lazy = serializer_type(lazy=True)
+
+    call = messages.Call(messages.CallFields(1, "io.xconn.test", args=[1, "two"], kwargs={"three": 3}))
+    data = eager.serialize(call)
+
+    deserialized = lazy.deserialize(data)
+    assert deserialized.request_id == 1
+    assert deserialized.uri == "io.xconn.test"
+    assert deserialized.raw_arguments is not None
+    # spliced back as is for the same serializer type
+    assert serializer_type().serialize(deserialized) == data
+
+    assert deserialized.args == [1, "two"]
+    assert deserialized.kwargs == {"three": 3}
+    assert deserialized.raw_arguments is None
+
+
+@pytest.mark.parametrize("serializer_type", [JSONSerializer, MsgPackSerializer, CBORSerializer])
+def test_lazy_deserialize_other_serializer(serializer_type):
+    event = messages.Event(messages.EventFields(1, 2, args=[{"id": 1}], details={"topic": "io.xconn.test"}))
+    deserialized = serializer_type(lazy=True).deserialize(serializer_type().serialize(event))
+
+    for other in (JSONSerializer(), MsgPackSerializer(), CBORSerializer()):
+        assert other.serialize(deserialized) == other.serialize(event)
+        assert other.join_items(*other.encode_items(deserialized.marshal())) == other.serialize(event)
+
+
+@pytest.mark.parametrize("serializer_type", [JSONSerializer, MsgPackSerializer, CBORSerializer])
+def test_lazy_deserialize_without_arguments(serializer_type):
+    for message in (
+        messages.Yield(messages.YieldFields(1)),
+        messages.Hello(messages.HelloFields("realm1", {"callee": {}})),
+        messages.Call(messages.CallFields(1, "io.xconn.test", options=PPT_OPTIONS, payload=PAYLOAD)),
+    ):
+        deserialized = serializer_type(lazy=True).deserialize(serializer_type().serialize(message))
+        assert type(deserialized) is type(message)
+        assert getattr(deserialized, "raw_arguments", None) is None
+
+    assert deserialized.payload == PAYLOAD
+
+
+@pytest.mark.parametrize("serializer_type", [JSONSerializer, MsgPackSerializer, CBORSerializer])
+def test_lazy_deserialize_invalid_arguments(serializer_type):
+    data = serializer_type().serialize(messages.Call(messages.CallFields(1, "io.xconn.test", args=[1])))
+    if isinstance(data, str):
+        data = data.replace("[1]", '"one"')
+    else:
+        data = serializer_type().serialize_item([48, 1, {}, "io.xconn.test", "one"])
+
+    call = serializer_type(lazy=True).deserialize(data)
+    with pytest.raises(ValueError):
+        _ = call.args
+
+
+@pytest.mark.parametrize("serializer_type", [JSONSerializer, MsgPackSerializer, CBORSerializer])
+def test_lazy_deserialize_too_many_elements(serializer_type):
+    serializer = serializer_type()
+    data = serializer.serialize_item([48, 1, {}, "io.xconn.test", [1], {"a": [","]}, "extra", 8])
+    with pytest.raises(ValueError) as exc_info:
+        serializer_type(lazy=True).deserialize(data)
+
+    assert str(exc_info.value) == "invalid message length 8, must be at most 6"
+
+    # args and kwargs nesting brackets and commas are still decoded lazily
+    data = serializer.serialize_item([48, 1, {}, "io.xconn.test", [[1, ["]"]]], {"a": {"b": ",]"}}])
+    call = serializer_type(lazy=True).deserialize(data)
+    assert call.raw_arguments is not None
+    assert call.kwargs == {"a": {"b": ",]"}}
+
+
+class Ping(messages.Message):
+    TEXT = "PING"
+    TYPE = 1000
+
+    def __init__(self, value: int):
+        self.value = value
+
+    @classmethod
+    def parse(cls, msg: list) -> "Ping":
+        return cls(msg[1])
+
+    def marshal(self) -> list:
+        return [self.TYPE, self.value]
+
+
+def test_register_message_type():
+    with pytest.raises(ValueError, match="unknown message type"):
+        to_message([Ping.TYPE, 1])
+
+    register_message_type(Ping)
+    try:
+        ping = JSONSerializer().deserialize(JSONSerializer().serialize(Ping(5)))
+        assert isinstance(ping, Ping)
+        assert ping.value == 5
+
+        # registering the same class again is a no-op
+        register_message_type(Ping)
+    finally:
+        del MESSAGE_TYPES[Ping.TYPE]
+
+
+def test_register_message_type_conflict():
+    class Hello(Ping):
+        TYPE = messages.Hello.TYPE
+
+    with pytest.raises(ValueError, match="already registered"):
+        register_message_type(Hello)
+
+    assert MESSAGE_TYPES[messages.Hello.TYPE] is messages.Hello
@@ -0,0 +1,203 @@
+import pytest
+
+from wampproto import idgen, messages, uris
+from wampproto.sharding import PATTERN_SHARD, SessionDirectory, ShardedRouter, shard_of_id, shard_of_uri
+from wampproto.types import SessionDetails
+
+SHARDS = 4
+PUBLISHER, SUBSCRIBER = 1, 2
+
+
+@pytest.fixture(params=[False, True], ids=["local", "processes"])
+def router(request):
+    with ShardedRouter(SHARDS, processes=request.param) as router:
+        router.add_session(SessionDetails(PUBLISHER, "realm1", "publisher", "authrole"), owner=0)
+        router.add_session(SessionDetails(SUBSCRIBER, "realm1", "subscriber", "authrole"), owner=1)
+        yield router
+
+
+def topics_of_shards() -> list[str]:
+    """one topic per shard, none owned by the pattern shard"""
+    topics = {}
+    index = 0
+    while len(topics) != SHARDS - 1:
+        topic = f"io.xconn.topic{index}"
+        shard = shard_of_uri(topic, SHARDS)
+        if shard != PATTERN_SHARD:
+            topics.setdefault(shard, topic)
+
+        index += 1
+
+    return list(topics.values())
+
+
+def test_shard_of_uri():
+    # the shard must not depend on the hash seed of the process
+    assert shard_of_uri("io.xconn.test", SHARDS) == 1
+    assert all(0 <= shard_of_uri(f"topic{i}", SHARDS) < SHARDS for i in range(100))
+
+
+def test_strided_ids():
+    generators = [idgen.StridedIDGenerator(index + 1, SHARDS) for index in range(SHARDS)]
+    ids = [generator.next() for _ in range(3) for generator in generators]
+    assert sorted(ids) == list(range(1, 3 * SHARDS + 1))
+    assert [shard_of_id(id_, SHARDS) for id_ in ids] == list(range(SHARDS)) * 3
+
+    with pytest.raises(ValueError):
+        idgen.StridedIDGenerator(0, SHARDS)
+
+    generator = idgen.StridedIDGenerator(2, SHARDS)
+    generator.id = idgen.ID_MAX - 1
+    assert generator.next() == 2
+
+
+def test_session_directory():
+    directory = SessionDirectory()
+    directory.add(1, 0)
+    directory.add(2, 1)
+    directory.add(3, 1)
+
+    with pytest.raises(ValueError) as exc:
+        directory.add(1, 1)
+
+    assert str(exc.value) == "cannot add session twice"
+    assert directory.owner_of(3) == 1
+    assert directory.sessions_of(1) == {2, 3}
+
+    event = messages.Event(messages.EventFields(1, 1))
+    assert directory.group({1: [event], 3: [event]}) == {0: {1: [event]}, 1: {3: [event]}}
+
+    assert directory.remove(3) == 1
+    assert directory.owner_of(3) is None
+    with pytest.raises(ValueError):
+        directory.remove(3)
+
+    assert len(directory) == 2
+
+
+def test_publish_across_shards(router: ShardedRouter):
+    topics = topics_of_shards()
+    subscribes = [messages.Subscribe(messages.SubscribeFields(i, topic)) for i, topic in enumerate(topics, 1)]
+    subscribed = router.receive_batch(SUBSCRIBER, subscribes)[SUBSCRIBER]
+    subscription_ids = [message.subscription_id for message in subscribed]
+    assert [shard_of_id(id_, SHARDS) for id_ in subscription_ids] == [shard_of_uri(t, SHARDS) for t in topics]
+
+    publishes = [
+        messages.Publish(messages.PublishFields(i, topic, args=[i], options={"acknowledge": True}))
+        for i, topic in enumerate(topics, 1)
+    ]
+    results = router.receive_batch(PUBLISHER, publishes)
+
+    # replies are in the order of the batch whatever shard produced them
+    events = results[SUBSCRIBER]
+    assert [event.subscription_id for event in events] == subscription_ids
+    assert [event.args for event in events] == [[i] for i in range(1, len(topics) + 1)]
+    published = results[PUBLISHER]
+    assert [message.request_id for message in published] == list(range(1, len(topics) + 1))
+    assert [message.publication_id for message in published] == [event.publication_id for event in events]
+    assert router.directory.group(results) == {0: {PUBLISHER: published}, 1: {SUBSCRIBER: events}}
+
+
+def test_pattern_subscription(router: ShardedRouter):
+    topic = topics_of_shards()[0]
+    exact = router.receive_message(SUBSCRIBER, messages.Subscribe(messages.SubscribeFields(1, topic)))
+    prefix = router.receive_message(
+        SUBSCRIBER, messages.Subscribe(messages.SubscribeFields(2, "io.xconn", options={"match": "prefix"}))
+    )
+    prefix_id = prefix[SUBSCRIBER][0].subscription_id
+    assert shard_of_id(prefix_id, SHARDS) == PATTERN_SHARD
+
+    publish = messages.Publish(messages.PublishFields(1, topic, options={"acknowledge": True}))
+    results = router.receive_message(PUBLISHER, publish)
+    # acknowledged once although two shards got the publication
+    assert len(results[PUBLISHER]) == 1
+    events = results[SUBSCRIBER]
+    assert [event.subscription_id for event in events] == [exact[SUBSCRIBER][0].subscription_id, prefix_id]
+    assert events[0].publication_id == events[1].publication_id == results[PUBLISHER][0].publication_id
+    assert events[1].details == {"topic": topic}
+
+    router.receive_message(SUBSCRIBER, messages.Unsubscribe(messages.UnsubscribeFields(3, prefix_id)))
+    results = router.receive_message(PUBLISHER, publish)
+    assert len(results[SUBSCRIBER]) == 1
+
+
+def test_call_across_shards(router: ShardedRouter):
+    callee, caller = SUBSCRIBER, PUBLISHER
+    procedures = topics_of_shards()
+    registers = [messages.Register(messages.RegisterFields(i, uri)) for i, uri in enumerate(procedures, 1)]
+    registered = router.receive_batch(callee, registers)[callee]
+    assert [shard_of_id(m.registration_id, SHARDS) for m in registered] == [
+        shard_of_uri(uri, SHARDS) for uri in procedures
+    ]
+
+    calls = [messages.Call(messages.CallFields(i, uri, args=[i])) for i, uri in enumerate(procedures, 1)]
+    invocations = router.receive_batch(caller, calls)[callee]
+    assert [invocation.registration_id for invocation in invocations] == [m.registration_id for m in registered]
+
+    yields = [messages.Yield(messages.YieldFields(inv.request_id, args=inv.args)) for inv in invocations]
+    results = router.receive_batch(callee, yields)[caller]
+    assert [(result.request_id, result.args) for result in results] == [(i, [i]) for i in range(1, len(calls) + 1)]
+
+    unregister = messages.Unregister(messages.UnregisterFields(10, registered[0].registration_id))
+    assert isinstance(router.receive_message(callee, unregister)[callee][0], messages.Unregistered)
+
+    error = router.receive_message(caller, messages.Call(messages.CallFields(10, procedures[0])))[caller][0]
+    assert isinstance(error, messages.Error)
+    assert error.uri == uris.NO_SUCH_PROCEDURE
+
+
+def test_cancel(router: ShardedRouter):
+    callee, caller = SUBSCRIBER, PUBLISHER
+    router.receive_message(callee, messages.Register(messages.RegisterFields(1, "io.xconn.slow")))
+    invocation = router.receive_message(caller, messages.Call(messages.CallFields(1, "io.xconn.slow")))[callee][0]
+
+    results = router.receive_message(caller, messages.Cancel(messages.CancelFields(1)))
+    assert results[caller][0].uri == uris.CANCELED
+    assert isinstance(results[callee][0], messages.Interrupt)
+    assert results[callee][0].request_id == invocation.request_id
+
+    # reported once, not by every shard
+    results = router.receive_message(caller, messages.Cancel(messages.CancelFields(1, {"mode": "invalid"})))
+    assert len(results[caller]) == 1
+
+
+def test_expire():
+    now = [0.0]
+    with ShardedRouter(SHARDS, clock=lambda: now[0]) as router:
+        router.add_session(SessionDetails(1, "realm1", "callee", "authrole"))
+        router.add_session(SessionDetails(2, "realm1", "caller", "authrole"))
+        router.receive_message(1, messages.Register(messages.RegisterFields(1, "io.xconn.slow")))
+        router.receive_message(2, messages.Call(messages.CallFields(1, "io.xconn.slow", options={"timeout": 100})))
+
+        assert router.expire() == {}
+        now[0] = 1.0
+        results = router.expire()
+        assert results[2][0].uri == uris.TIMEOUT
+        assert isinstance(results[1][0], messages.Interrupt)
+
+
+def test_errors(router: ShardedRouter):
+    with pytest.raises(ValueError) as exc:
+        router.receive_message(3, messages.Subscribe(messages.SubscribeFields(1, "io.xconn.test")))
+
+    assert str(exc.value) == "session 3 doesn't exist"
+
+    with pytest.raises(ValueError) as exc:
+        router.receive_message(SUBSCRIBER, messages.Unsubscribe(messages.UnsubscribeFields(1, 5)))
+
+    assert str(exc.value) == "cannot unsubscribe, subscription 5 doesn't exist"
+
+    # the shards keep working after an error
+    results = router.receive_message(SUBSCRIBER, messages.Subscribe(messages.SubscribeFields(2, "io.xconn.test")))
+    assert isinstance(results[SUBSCRIBER][0], messages.Subscribed)
+
+    router.remove_session(SUBSCRIBER)
+    with pytest.raises(ValueError):
+        router.remove_session(SUBSCRIBER)
+
+    assert router.receive_message(PUBLISHER, messages.Publish(messages.PublishFields(1, "io.xconn.test"))) == {}
+
+
+def test_no_shards():
+    with pytest.raises(ValueError):
+        ShardedRouter(0)
@@ -1,5 +1,3 @@
-import json
-
 import pytest
 
 from wampproto import messages, WAMPSession, uris, serializers
@@ -23,7 +21,7 @@ def test_register(session: WAMPSession):
     # Send Register message and receive Registered message
     register = messages.Register(messages.RegisterFields(2, "io.xconn.test"))
     to_send = session.send_message(register)
-    assert to_send == f'[{messages.Register.TYPE}, {register.request_id}, {dict()}, "{register.uri}"]'
+    assert to_send == f'[{messages.Register.TYPE},{register.request_id},{{}},"{register.uri}"]'.encode()
 
     registered = messages.Registered(messages.RegisteredFields(2, 3))
     received = session.receive_message(registered)
@@ -52,7 +50,7 @@ def test_call(session: WAMPSession, register_procedure):
 
     yield_msg = messages.Yield(messages.YieldFields(2))
     received = session.send_message(yield_msg)
-    assert received == "[70, 2, {}]"
+    assert received == b"[70,2,{}]"
 
     result = messages.Result(messages.ResultFields(2))
     received = session.receive_message(result)
@@ -74,7 +72,7 @@ def test_unregister(session: WAMPSession, register_procedure):
     # Send Unregister message and receive Unregistered message
     unregister = messages.Unregister(messages.UnregisterFields(1, 1))
     to_send = session.send_message(unregister)
-    assert to_send == f"[{messages.Unregister.TYPE}, {unregister.request_id}, {unregister.registration_id}]"
+    assert to_send == f"[{messages.Unregister.TYPE},{unregister.request_id},{unregister.registration_id}]".encode()
 
     unregistered = messages.Unregistered(messages.UnregisteredFields(1))
     received = session.receive_message(unregistered)
@@ -96,7 +94,7 @@ def test_unregister_error(session: WAMPSession):
 def test_subscribe(session: WAMPSession):
     subscribe = messages.Subscribe(messages.SubscribeFields(7, "topic"))
     to_send = session.send_message(subscribe)
-    assert to_send == f'[{messages.Subscribe.TYPE}, {subscribe.request_id}, {subscribe.options}, "{subscribe.topic}"]'
+    assert to_send == f'[{messages.Subscribe.TYPE},{subscribe.request_id},{{}},"{subscribe.topic}"]'.encode()
 
     subscribed = messages.Subscribed(messages.SubscribedFields(7, 8))
     received = session.receive_message(subscribed)
@@ -128,7 +126,7 @@ def test_unsubscribe(session: WAMPSession):
 
     unsubscribe = messages.Unsubscribe(messages.UnsubscribeFields(8, 8))
     to_send = session.send_message(unsubscribe)
-    assert to_send == f"[{messages.Unsubscribe.TYPE}, {unsubscribe.request_id}, {unsubscribe.subscription_id}]"
+    assert to_send == f"[{messages.Unsubscribe.TYPE},{unsubscribe.request_id},{unsubscribe.subscription_id}]".encode()
 
     unsubscribed = messages.Unsubscribed(messages.UnsubscribedFields(8))
     received = session.receive_message(unsubscribed)
@@ -151,7 +149,7 @@ def test_publish(session: WAMPSession):
     # Send Publish message with acknowledge true and receive Published message
     publish = messages.Publish(messages.PublishFields(6, "topic", options={"acknowledge": True}))
     to_send = session.send_message(publish)
-    assert to_send == f'[{messages.Publish.TYPE}, {publish.request_id}, {json.dumps(publish.options)}, "{publish.uri}"]'
+    assert to_send == f'[{messages.Publish.TYPE},{publish.request_id},{{"acknowledge":true}},"{publish.uri}"]'.encode()
 
     published = messages.Published(messages.PublishedFields(6, 6))
     received = session.receive_message(published)
@@ -173,8 +171,7 @@ def test_error(session: WAMPSession):
     error = messages.Error(messages.ErrorFields(messages.Invocation.TYPE, 10, uris.PROCEDURE_ALREADY_EXISTS))
     to_send = session.send_message(error)
     assert (
-        to_send
-        == f'[{messages.Error.TYPE}, {messages.Invocation.TYPE}, {error.request_id}, {error.details}, "{error.uri}"]'
+        to_send == f'[{messages.Error.TYPE},{messages.Invocation.TYPE},{error.request_id},{{}},"{error.uri}"]'.encode()
     )
 
 
@@ -259,3 +256,45 @@ def test_exceptions():
         session.receive_message(messages.Error(messages.ErrorFields(messages.Publish.TYPE, 100, uris.INVALID_ARGUMENT)))
 
     assert str(exc.value) == f"received {messages.Error.TEXT} for invalid publish request"
+
+
+def test_cancel(session: WAMPSession, register_procedure):
+    call = messages.Call(messages.CallFields(2, "foo.bar"))
+    session.send_message(call)
+
+    cancel = messages.Cancel(messages.CancelFields(call.request_id, {"mode": "kill"}))
+    assert session.send_message(cancel) == b'[49,2,{"mode":"kill"}]'
+
+    call_err = messages.Error(messages.ErrorFields(messages.Call.TYPE, call.request_id, uris.CANCELED))
+    assert session.receive_message(call_err) == call_err
+
+    with pytest.raises(ValueError) as exc:
+        session.send_message(cancel)
+
+    assert str(exc.value) == "cannot cancel unknown call request"
+
+
+def test_interrupt(session: WAMPSession, register_procedure):
+    invocation = messages.Invocation(messages.InvocationFields(5, 1))
+    session.receive_message(invocation)
+
+    interrupt = messages.Interrupt(messages.InterruptFields(5, {"mode": "kill"}))
+    assert session.receive_message(interrupt) == interrupt
+
+    error = messages.Error(messages.ErrorFields(messages.Invocation.TYPE, 5, uris.CANCELED))
+    session.send_message(error)
+
+    # the callee already answered, the interrupt is accepted and ignored
+    assert session.receive_message(interrupt) == interrupt
+
+
+def test_interrupt_crossing_yield(session: WAMPSession, register_procedure):
+    session.receive_message(messages.Invocation(messages.InvocationFields(5, 1)))
+    session.send_message(messages.Yield(messages.YieldFields(5)))
+
+    # the router timed out the call before receiving the yield
+    interrupt = messages.Interrupt(messages.InterruptFields(5, {"mode": "killnowait", "reason": uris.TIMEOUT}))
+    assert session.receive_message(interrupt) == interrupt
+
+    with pytest.raises(ValueError):
+        session.send_message(messages.Yield(messages.YieldFields(5)))
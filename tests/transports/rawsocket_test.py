@@ -0,0 +1,82 @@
+import pytest
+
+from wampproto import messages
+from wampproto.serializers import JSONSerializer, MsgPackSerializer, CBORSerializer
+from wampproto.transports import rawsocket
+
+
+def test_handshake():
+    data = rawsocket.Handshake(rawsocket.SERIALIZER_MSGPACK, 1 << 16).to_bytes()
+    assert data == b"\x7f\x72\x00\x00"
+
+    handshake = rawsocket.Handshake.from_bytes(data)
+    assert handshake == rawsocket.Handshake(rawsocket.SERIALIZER_MSGPACK, 1 << 16)
+
+    # sizes are rounded up to the next power of two
+    assert rawsocket.Handshake(rawsocket.SERIALIZER_JSON, 1000).to_bytes() == b"\x7f\x11\x00\x00"
+
+
+def test_handshake_error():
+    data = rawsocket.handshake_error(rawsocket.ERROR_SERIALIZER_UNSUPPORTED)
+    with pytest.raises(rawsocket.HandshakeError) as exc_info:
+        rawsocket.Handshake.from_bytes(data)
+
+    assert exc_info.value.code == rawsocket.ERROR_SERIALIZER_UNSUPPORTED
+
+    with pytest.raises(ValueError):
+        rawsocket.Handshake.from_bytes(b"\x00\x12\x00\x00")
+
+
+@pytest.mark.parametrize("serializer", [JSONSerializer(), MsgPackSerializer(), CBORSerializer()])
+def test_feed(serializer):
+    sent = [
+        messages.Call(messages.CallFields(1, "io.xconn.test", args=[1, 2])),
+        messages.Publish(messages.PublishFields(2, "io.xconn.topic", kwargs={"key": "value"})),
+        messages.Goodbye(messages.GoodbyeFields({}, "wamp.close.normal")),
+    ]
+    data = rawsocket.encode_frames(serializer, sent) + rawsocket.encode_frame(b"ping", rawsocket.FRAME_PING)
+
+    received = rawsocket.FrameDecoder(serializer).feed(data)
+    assert [type(msg) for msg in received] == [messages.Call, messages.Publish, messages.Goodbye, rawsocket.Ping]
+    assert received[0].args == [1, 2]
+    assert received[1].kwargs == {"key": "value"}
+    assert received[3].payload == b"ping"
+
+    # the same stream delivered one byte at a time
+    decoder = rawsocket.FrameDecoder(serializer)
+    received = []
+    for i in range(len(data)):
+        received.extend(decoder.feed(data[i : i + 1]))
+
+    assert [type(msg) for msg in received] == [messages.Call, messages.Publish, messages.Goodbye, rawsocket.Ping]
+    assert received[2].reason == "wamp.close.normal"
+
+
+def test_feed_handshake():
+    serializer = CBORSerializer()
+    hello = messages.Hello(messages.HelloFields("realm1", {"caller": {}}))
+    data = rawsocket.Handshake(rawsocket.SERIALIZER_CBOR).to_bytes() + rawsocket.encode_frames(serializer, [hello])
+
+    decoder = rawsocket.FrameDecoder(handshake=True)
+    handshake, received = decoder.feed(data)
+    assert handshake == rawsocket.Handshake(rawsocket.SERIALIZER_CBOR)
+    assert isinstance(decoder.serializer, CBORSerializer)
+    assert received.realm == "realm1"
+
+    decoder = rawsocket.FrameDecoder(handshake=True)
+    with pytest.raises(rawsocket.HandshakeError) as exc_info:
+        decoder.feed(rawsocket.Handshake(7).to_bytes())
+
+    assert exc_info.value.code == rawsocket.ERROR_SERIALIZER_UNSUPPORTED
+
+
+def test_feed_invalid_frames():
+    decoder = rawsocket.FrameDecoder(JSONSerializer(), max_message_size=1024)
+    with pytest.raises(ValueError, match="exceeds max message size"):
+        decoder.feed(rawsocket.frame_header(2048))
+
+    with pytest.raises(ValueError, match="reserved bits"):
+        rawsocket.FrameDecoder(JSONSerializer()).feed(b"\x08\x00\x00\x00")
+
+    with pytest.raises(ValueError, match="unknown rawsocket frame type"):
+        rawsocket.FrameDecoder(JSONSerializer()).feed(b"\x03\x00\x00\x00")
@@ -0,0 +1,42 @@
+import pytest
+
+from wampproto import matching, uris
+
+
+@pytest.mark.parametrize(
+    "uri, match, loose, strict",
+    [
+        ("com.myapp.topic1", matching.MATCH_EXACT, True, True),
+        ("com.myapp.Topic-1", matching.MATCH_EXACT, True, False),
+        ("com.myapp..topic1", matching.MATCH_EXACT, False, False),
+        ("com.myapp.topic1.", matching.MATCH_EXACT, False, False),
+        ("com.my app.topic1", matching.MATCH_EXACT, False, False),
+        ("com.myapp.#topic1", matching.MATCH_EXACT, False, False),
+        ("", matching.MATCH_EXACT, False, False),
+        ("com.app\n", matching.MATCH_EXACT, False, False),
+        ("com.app.\n", matching.MATCH_PREFIX, False, False),
+        ("com..app\n", matching.MATCH_WILDCARD, False, False),
+        ("com.myapp.", matching.MATCH_PREFIX, True, True),
+        ("com.myapp.to", matching.MATCH_PREFIX, True, True),
+        ("com..topic1", matching.MATCH_PREFIX, False, False),
+        ("com..topic1", matching.MATCH_WILDCARD, True, True),
+        ("com.myapp..", matching.MATCH_WILDCARD, True, True),
+        ("..Topic", matching.MATCH_WILDCARD, True, False),
+        ("com.myapp.topic1", "regex", False, False),
+    ],
+)
+def test_uri_validator(uri, match, loose, strict):
+    assert uris.URIValidator().is_valid(uri, match) is loose
+    assert uris.URIValidator(strict=True).is_valid(uri, match) is strict
+
+
+def test_uri_validator_cache():
+    validator = uris.URIValidator(cache_size=2)
+    for uri in ("com.a", "com.b", "com.a", "com.c", "com.a"):
+        assert validator.is_valid(uri)
+
+    info = validator._is_valid.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (2, 3, 2)
+
+    validator.clear_cache()
+    assert validator._is_valid.cache_info().currsize == 0
@@ -24,11 +24,11 @@ class Acceptor:
 
     def __init__(
         self,
-        serializer: serializers.Serializer = serializers.JSONSerializer(),
+        serializer: serializers.Serializer | None = None,
         authenticator: auth.IServerAuthenticator = None,
         roles: dict[str, dict[str, dict[str, bool]]] = None,
     ):
-        self._serializer = serializer
+        self._serializer = serializer if serializer is not None else serializers.JSONSerializer()
         self._authenticator = authenticator
         self._roles = roles if roles is not None else ROUTER_ROLES
 
@@ -0,0 +1,13 @@
+from wampproto.aio.rawsocket import (
+    RawSocketProtocol,
+    RawSocketServer,
+    RawSocketClient,
+    connect_rawsocket,
+)
+
+__all__ = (
+    "RawSocketProtocol",
+    "RawSocketServer",
+    "RawSocketClient",
+    "connect_rawsocket",
+)
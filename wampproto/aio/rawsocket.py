@@ -0,0 +1,457 @@
+from __future__ import annotations
+
+import asyncio
+
+from wampproto import auth, messages, serializers
+from wampproto.acceptor import Acceptor
+from wampproto.joiner import Joiner
+from wampproto.router import Router
+from wampproto.session import WAMPSession
+from wampproto.transports import rawsocket
+from wampproto.types import SessionDetails
+
+READ_BUFFER_SIZE = 1 << 16
+
+
+class RawSocketProtocol(asyncio.BufferedProtocol):
+    """
+    RawSocket connection. The event loop reads into a buffer of the protocol that
+    frames are decoded from without copying it. Frames sent during one iteration
+    of the event loop are written together, and drain waits while the transport
+    has paused writing.
+    """
+
+    def __init__(self, decoder: rawsocket.FrameDecoder, read_buffer_size: int = READ_BUFFER_SIZE):
+        self._decoder = decoder
+        self._read_buffer_size = read_buffer_size
+        self._buffer = bytearray(read_buffer_size)
+        self._read_buffer = self._buffer
+        self._transport: asyncio.Transport | None = None
+        self._outgoing: list[bytes] = []
+        self._flush_scheduled = False
+        self._writable = asyncio.Event()
+        self._writable.set()
+        self._closed = False
+        self._reading_paused = False
+        # connections that stopped reading until this one can write again
+        self._blocked: set[RawSocketProtocol] = set()
+
+    @property
+    def serializer(self) -> serializers.Serializer | None:
+        return self._decoder.serializer
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        self._transport = transport
+
+    @property
+    def writing_paused(self) -> bool:
+        return not self._writable.is_set()
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        self._closed = True
+        self._outgoing.clear()
+        # wake up senders waiting in drain
+        self._writable.set()
+        self._unblock()
+
+    def get_buffer(self, sizehint: int) -> bytearray:
+        serializer = self._decoder.serializer
+        if serializer is not None and serializer.lazy:
+            # lazily deserialized messages may reference the data they were read from
+            self._read_buffer = bytearray(self._read_buffer_size)
+        else:
+            self._read_buffer = self._buffer
+
+        return self._read_buffer
+
+    def buffer_updated(self, nbytes: int) -> None:
+        try:
+            results = self._decoder.feed(memoryview(self._read_buffer)[:nbytes])
+        except (ValueError, rawsocket.HandshakeError) as e:
+            self.protocol_error(e)
+            return
+
+        for result in results:
+            if isinstance(result, rawsocket.Handshake):
+                self.handshake_received(result)
+            elif isinstance(result, rawsocket.Ping):
+                self.send_frame(bytes(result.payload), rawsocket.FRAME_PONG)
+            elif not isinstance(result, rawsocket.Pong):
+                self.message_received(result)
+
+            if self._closed or self._transport.is_closing():
+                break
+
+    def handshake_received(self, handshake: rawsocket.Handshake) -> None:
+        pass
+
+    def message_received(self, message: messages.Message) -> None:
+        raise NotImplementedError()
+
+    def protocol_error(self, exc: Exception) -> None:
+        self.close()
+
+    def send_frame(self, data: bytes | str, frame_type: int = rawsocket.FRAME_WAMP) -> None:
+        if self._closed:
+            raise ConnectionResetError("connection is closed")
+
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+
+        self._outgoing.append(rawsocket.frame_header(len(data), frame_type))
+        self._outgoing.append(data)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self._flush)
+
+    def send_message(self, message: messages.Message) -> None:
+        self.send_frame(self._decoder.serializer.serialize(message))
+
+    def _flush(self) -> None:
+        self._flush_scheduled = False
+        if self._closed or len(self._outgoing) == 0:
+            return
+
+        outgoing, self._outgoing = self._outgoing, []
+        self._transport.write(b"".join(outgoing))
+
+    def pause_writing(self) -> None:
+        self._writable.clear()
+
+    def resume_writing(self) -> None:
+        self._writable.set()
+        self._unblock()
+
+    def block(self, sender: RawSocketProtocol) -> None:
+        """stop reading from sender until this connection can write again"""
+        sender.pause_reading()
+        self._blocked.add(sender)
+
+    def _unblock(self) -> None:
+        # a sender blocked by several connections resumes as soon as one of them can
+        # write, it is blocked again by the next message it sends to the others
+        blocked, self._blocked = self._blocked, set()
+        for sender in blocked:
+            sender.resume_reading()
+
+    def pause_reading(self) -> None:
+        if self._reading_paused or self._closed or self._transport.is_closing():
+            return
+
+        self._reading_paused = True
+        self._transport.pause_reading()
+
+    def resume_reading(self) -> None:
+        if not self._reading_paused or self._closed or self._transport.is_closing():
+            return
+
+        self._reading_paused = False
+        self._transport.resume_reading()
+
+    async def drain(self) -> None:
+        """write the frames sent so far and wait until the transport accepts more data"""
+        # writing now lets the transport pause writing before more frames are queued
+        self._flush()
+        await self._writable.wait()
+        if self._closed:
+            raise ConnectionResetError("connection is closed")
+
+    def close(self) -> None:
+        """close the connection once the frames sent so far are written"""
+        if self._transport is None or self._transport.is_closing():
+            return
+
+        self._flush()
+        self._transport.close()
+
+
+class RawSocketServerProtocol(RawSocketProtocol):
+    def __init__(self, server: RawSocketServer):
+        super().__init__(rawsocket.FrameDecoder(max_message_size=server.max_message_size, handshake=True))
+        self._server = server
+        self._acceptor: Acceptor | None = None
+        self.session_id: int | None = None
+
+    def handshake_received(self, handshake: rawsocket.Handshake) -> None:
+        self._transport.write(rawsocket.Handshake(handshake.serializer, self._server.max_message_size).to_bytes())
+        self._acceptor = Acceptor(self._decoder.serializer, self._server.authenticator)
+
+    def protocol_error(self, exc: Exception) -> None:
+        if isinstance(exc, rawsocket.HandshakeError):
+            self._transport.write(rawsocket.handshake_error(exc.code))
+
+        self.close()
+
+    def message_received(self, message: messages.Message) -> None:
+        if self.session_id is not None:
+            self._server.dispatch(self, message)
+            return
+
+        try:
+            reply = self._acceptor.receive_message(message)
+        except ValueError as e:
+            self.protocol_error(e)
+            return
+
+        if reply is None:
+            return
+
+        self.send_message(reply)
+        if isinstance(reply, messages.Welcome):
+            self.session_id = reply.session_id
+            self._server.join(self, self._acceptor.get_session_details())
+        elif isinstance(reply, messages.Abort):
+            self.close()
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        super().connection_lost(exc)
+        self._server.leave(self)
+
+
+class RawSocketServer:
+    """
+    Router accepting RawSocket connections over TCP or Unix sockets. Sessions are
+    established with an Acceptor and their messages handled by a Router, a message
+    going to several peers using the same serializer is serialized once. Reading from
+    a session stops while a peer it sent messages to can't keep up. Calls are
+    timed out and idle realms evicted by a timer set for the next deadline of the
+    router.
+    """
+
+    def __init__(
+        self,
+        router: Router | None = None,
+        authenticator: auth.IServerAuthenticator | None = None,
+        max_message_size: int = rawsocket.DEFAULT_MAX_MESSAGE_SIZE,
+    ):
+        self.router = router if router is not None else Router()
+        self.authenticator = authenticator
+        self.max_message_size = max_message_size
+        self.connections: dict[int, RawSocketServerProtocol] = {}
+        self._server: asyncio.Server | None = None
+        self._timer: asyncio.TimerHandle | None = None
+        # router time the timer is set for
+        self._timer_deadline: float | None = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_server(lambda: RawSocketServerProtocol(self), host, port)
+
+    async def start_unix(self, path: str) -> None:
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_unix_server(lambda: RawSocketServerProtocol(self), path)
+
+    @property
+    def sockets(self) -> tuple:
+        return self._server.sockets if self._server is not None else ()
+
+    def join(self, connection: RawSocketServerProtocol, details: SessionDetails) -> None:
+        self.router.add_session(details)
+        self.connections[details.session_id] = connection
+
+    def leave(self, connection: RawSocketServerProtocol) -> None:
+        session_id = connection.session_id
+        if session_id is None or self.connections.get(session_id) is not connection:
+            return
+
+        del self.connections[session_id]
+        try:
+            results = self.router.remove_session(session_id)
+        except ValueError:
+            # already gone after a GOODBYE
+            results = {}
+
+        self._deliver(results)
+        self._schedule()
+
+    def dispatch(self, connection: RawSocketServerProtocol, message: messages.Message) -> None:
+        try:
+            results = self.router.receive(connection.session_id, message)
+        except ValueError as e:
+            connection.protocol_error(e)
+            return
+
+        self._deliver(results, connection)
+        if isinstance(message, messages.Goodbye):
+            del self.connections[connection.session_id]
+            connection.close()
+
+        self._schedule()
+
+    def _deliver(
+        self, results: dict[int, list[messages.Message]], sender: RawSocketServerProtocol | None = None
+    ) -> None:
+        encoded: dict[tuple[int, type], bytes | str] = {}
+        for recipient, outgoing in results.items():
+            peer = self.connections.get(recipient)
+            if peer is None:
+                continue
+
+            serializer = peer.serializer
+            for item in outgoing:
+                key = (id(item), type(serializer))
+                data = encoded.get(key)
+                if data is None:
+                    data = serializer.serialize(item)
+                    encoded[key] = data
+
+                peer.send_frame(data)
+
+            # a peer that doesn't keep up, the sender included, stops reading from the sender
+            # instead of frames piling up
+            if sender is not None and peer.writing_paused:
+                peer.block(sender)
+
+    def _schedule(self) -> None:
+        deadlines = [d for d in (self.router.next_deadline(), self.router.next_eviction()) if d is not None]
+        if len(deadlines) == 0:
+            return
+
+        deadline = min(deadlines)
+        if self._timer is not None:
+            if self._timer_deadline <= deadline:
+                return
+
+            self._timer.cancel()
+
+        # the router may use another clock than the event loop
+        loop = asyncio.get_running_loop()
+        delay = max(deadline - self.router.clock(), 0)
+        self._timer = loop.call_at(loop.time() + delay, self._tick)
+        self._timer_deadline = deadline
+
+    def _tick(self) -> None:
+        self._timer = None
+        self._timer_deadline = None
+        results: dict[int, list[messages.Message]] = {}
+        for result in self.router.expire():
+            results.setdefault(result.recipient, []).append(result.message)
+
+        self._deliver(results)
+        self.router.evict_idle()
+        self._schedule()
+
+    def close(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+            self._timer_deadline = None
+
+        if self._server is not None:
+            self._server.close()
+
+        for connection in list(self.connections.values()):
+            connection.close()
+
+    async def wait_closed(self) -> None:
+        if self._server is not None:
+            await self._server.wait_closed()
+
+
+class RawSocketClientProtocol(RawSocketProtocol):
+    def __init__(self, joiner: Joiner, serializer: serializers.Serializer, serializer_id: int, max_message_size: int):
+        super().__init__(rawsocket.FrameDecoder(serializer, max_message_size, handshake=True))
+        self._joiner = joiner
+        self._session = WAMPSession(serializer)
+        self._handshake = rawsocket.Handshake(serializer_id, max_message_size)
+        loop = asyncio.get_running_loop()
+        self.joined: asyncio.Future[SessionDetails] = loop.create_future()
+        self.messages: asyncio.Queue[messages.Message | None] = asyncio.Queue()
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        super().connection_made(transport)
+        transport.write(self._handshake.to_bytes())
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        super().connection_lost(exc)
+        if not self.joined.done():
+            self.joined.set_exception(exc if exc is not None else ConnectionResetError("connection closed"))
+
+        self.messages.put_nowait(None)
+
+    def protocol_error(self, exc: Exception) -> None:
+        if not self.joined.done():
+            self.joined.set_exception(exc)
+
+        super().protocol_error(exc)
+
+    def handshake_received(self, handshake: rawsocket.Handshake) -> None:
+        self.send_frame(self._joiner.send_hello())
+
+    def message_received(self, message: messages.Message) -> None:
+        try:
+            if self.joined.done():
+                self.messages.put_nowait(self._session.receive_message(message))
+                return
+
+            reply = self._joiner.receive_message(message)
+        except ValueError as e:
+            self.protocol_error(e)
+            return
+
+        if reply is not None:
+            self.send_message(reply)
+        else:
+            self.joined.set_result(self._joiner.get_session_details())
+
+    def send(self, message: messages.Message) -> None:
+        self.send_frame(self._session.send_message(message))
+
+
+class RawSocketClient:
+    """session joined to a router over RawSocket, see connect_rawsocket"""
+
+    def __init__(self, protocol: RawSocketClientProtocol, details: SessionDetails):
+        self._protocol = protocol
+        self.session_details = details
+
+    async def send(self, message: messages.Message) -> None:
+        """send a message, waiting while the connection can't take more data"""
+        self._protocol.send(message)
+        await self._protocol.drain()
+
+    def send_nowait(self, message: messages.Message) -> None:
+        self._protocol.send(message)
+
+    async def receive(self) -> messages.Message:
+        message = await self._protocol.messages.get()
+        if message is None:
+            # keep the marker for other receivers
+            self._protocol.messages.put_nowait(None)
+            raise ConnectionResetError("connection is closed")
+
+        return message
+
+    def close(self) -> None:
+        self._protocol.close()
+
+
+async def connect_rawsocket(
+    realm: str,
+    host: str = "127.0.0.1",
+    port: int | None = None,
+    path: str | None = None,
+    serializer_id: int = serializers.registry.MSGPACK_SERIALIZER_ID,
+    authenticator: auth.IClientAuthenticator | None = None,
+    max_message_size: int = rawsocket.DEFAULT_MAX_MESSAGE_SIZE,
+) -> RawSocketClient:
+    """connect to a router over TCP, or a Unix socket if path is given, and join realm"""
+    serializer = serializers.get_rawsocket_serializer(serializer_id)
+    joiner = Joiner(realm, serializer, authenticator)
+    loop = asyncio.get_running_loop()
+
+    def factory() -> RawSocketClientProtocol:
+        return RawSocketClientProtocol(joiner, serializer, serializer_id, max_message_size)
+
+    if path is not None:
+        _, protocol = await loop.create_unix_connection(factory, path)
+    else:
+        _, protocol = await loop.create_connection(factory, host, port)
+
+    try:
+        details = await protocol.joined
+    except BaseException:
+        protocol.close()
+        raise
+
+    return RawSocketClient(protocol, details)
@@ -1,6 +1,25 @@
+from collections import deque
 from dataclasses import dataclass
+from typing import Any
 
-from wampproto import messages, types, idgen
+from wampproto import messages, serializers, types, idgen, matching, uris
+from wampproto.messages import util
+
+OPTION_ACKNOWLEDGE = "acknowledge"
+OPTION_DISCLOSE_ME = "disclose_me"
+OPTION_MATCH = "match"
+OPTION_RETAIN = "retain"
+OPTION_GET_RETAINED = "get_retained"
+DETAIL_RETAINED = "retained"
+
+# what an event queue does with a new event once full
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_DROP_NEWEST = "drop_newest"
+OVERFLOW_DISCONNECT = "disconnect"
+# like drop_oldest, and an event replaces the queued one of the same subscription and topic
+OVERFLOW_COALESCE = "coalesce"
+
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST, OVERFLOW_DISCONNECT, OVERFLOW_COALESCE)
 
 
 @dataclass
@@ -8,20 +27,202 @@ class Subscription:
     id: int
     topic: str
     subscribers: dict[int, int]
+    match: str = matching.MATCH_EXACT
+
+
+class EventQueue:
+    """
+    Bounded queue of the events waiting to be written to a subscriber. Once it is
+    full the overflow policy decides which event is dropped, with the disconnect
+    policy the queue is emptied and refuses events, its subscriber is meant to be
+    disconnected.
+    """
+
+    def __init__(self, max_size: int, policy: str = OVERFLOW_DROP_OLDEST):
+        if max_size < 1:
+            raise ValueError("event queue size must be at least 1")
+
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"unknown overflow policy '{policy}'")
+
+        self.max_size = max_size
+        self.policy = policy
+        # events keyed by (subscription ID, topic) to coalesce them, in order otherwise
+        self._events: dict[Any, messages.Event] | deque[messages.Event]
+        self._events = {} if policy == OVERFLOW_COALESCE else deque()
+        self.dropped = 0
+        self.overflowed = False
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def push(self, key: Any, event: messages.Event) -> bool:
+        """queue an event, return whether it was kept"""
+        if self.overflowed:
+            self.dropped += 1
+            return False
+
+        if self.policy == OVERFLOW_COALESCE:
+            if key in self._events:
+                # move it to the end, it is the most recent event now
+                del self._events[key]
+                self.dropped += 1
+            elif len(self._events) >= self.max_size:
+                del self._events[next(iter(self._events))]
+                self.dropped += 1
+
+            self._events[key] = event
+            return True
+
+        if len(self._events) >= self.max_size:
+            if self.policy == OVERFLOW_DROP_NEWEST:
+                self.dropped += 1
+                return False
+            elif self.policy == OVERFLOW_DISCONNECT:
+                self.dropped += len(self._events) + 1
+                self._events.clear()
+                self.overflowed = True
+                return False
+
+            self._events.popleft()
+            self.dropped += 1
+
+        self._events.append(event)
+        return True
+
+    def take(self, limit: int | None = None) -> list[messages.Event]:
+        """remove and return up to limit events, oldest first"""
+        if limit is None or limit >= len(self._events):
+            events = list(self._events.values()) if isinstance(self._events, dict) else list(self._events)
+            self._events.clear()
+            return events
+
+        if isinstance(self._events, dict):
+            keys = [key for key, _ in zip(self._events, range(limit))]
+            return [self._events.pop(key) for key in keys]
+
+        return [self._events.popleft() for _ in range(limit)]
+
+
+class HistoryEntry:
+    """
+    Event kept by an EventHistory, detached from the message it was published with:
+    only the encoded event and its details are referenced.
+    """
+
+    __slots__ = ("publication_id", "details", "template", "size")
+
+    def __init__(self, publication_id: int, details: dict[str, Any], template: serializers.MessageTemplate, size: int):
+        self.publication_id = publication_id
+        self.details = details
+        # the event encoded with the serializer of the history, see types.Publication.template
+        self.template = template
+        # length of the encoded event
+        self.size = size
+
+
+class EventHistory:
+    """
+    Ring buffer of the last events published to a topic, bounded by their number
+    and optionally by their total encoded size, along with the last event that was
+    published with the retain option. Events are stored encoded with the serializer
+    of the history and without the message they were published with, so max_bytes
+    bounds what is kept apart from a small constant per entry, lazily deserialized
+    arguments included. Replaying them with the same type of serializer only encodes
+    the subscription ID and details of each subscriber.
+    """
+
+    def __init__(self, depth: int, max_bytes: int | None = None, serializer: serializers.Serializer | None = None):
+        if depth < 0:
+            raise ValueError("history depth must not be negative")
+
+        self.depth = depth
+        self.max_bytes = max_bytes
+        self.serializer = serializer if serializer is not None else serializers.MsgPackSerializer()
+        self._entries: deque[HistoryEntry] = deque()
+        self.bytes = 0
+        self.retained: HistoryEntry | None = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def append(self, publication: types.Publication, retain: bool = False) -> None:
+        if not retain and (self.depth == 0 or self.max_bytes == 0):
+            return
+
+        event = publication.event
+        template = publication.template(self.serializer)
+        details = dict(event.details)
+        entry = HistoryEntry(event.publication_id, details, template, len(template.fill(util.MIN_ID, details)))
+        if retain:
+            self.retained = entry
+
+        if self.depth == 0 or (self.max_bytes is not None and entry.size > self.max_bytes):
+            return
+
+        self._entries.append(entry)
+        self.bytes += entry.size
+        while len(self._entries) > self.depth or (self.max_bytes is not None and self.bytes > self.max_bytes):
+            self.bytes -= self._entries.popleft().size
+
+    def events(self, limit: int | None = None) -> list[HistoryEntry]:
+        """return the stored events, up to the limit most recent ones, oldest first"""
+        if limit is None or limit >= len(self._entries):
+            return list(self._entries)
+
+        if limit <= 0:
+            return []
+
+        return list(self._entries)[-limit:]
 
 
 class Broker:
-    def __init__(self):
+    def __init__(
+        self,
+        uri_validator: uris.URIValidator | None = None,
+        queue_size: int | None = None,
+        overflow_policy: str = OVERFLOW_DROP_OLDEST,
+    ):
         super().__init__()
         self.subscriptions_by_topic: dict[str, Subscription] = {}
+        self.subscriptions_by_prefix = matching.PrefixTrie()
+        self.subscriptions_by_wildcard = matching.WildcardTrie()
         self.subscriptions_by_session: dict[int, dict[int, Subscription]] = {}
         self.sessions: dict[int, types.SessionDetails] = {}
         self.idgen = idgen.SessionScopeIDGenerator()
+        # topics are only checked when a validator is given
+        self._uri_validator = uri_validator
+
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"unknown overflow policy '{overflow_policy}'")
+
+        # events of sessions with a queue are held until taken with take_events
+        self.queues: dict[int, EventQueue] = {}
+        self._queue_size = queue_size
+        self._overflow_policy = overflow_policy
+        # events dropped from the queues of all sessions, including removed ones
+        self.dropped_events = 0
+
+        # topics whose events are kept, see enable_history
+        self.histories: dict[str, EventHistory] = {}
 
-    def add_session(self, details: types.SessionDetails):
+    def add_session(
+        self, details: types.SessionDetails, queue_size: int | None = None, overflow_policy: str | None = None
+    ):
+        """
+        Add a session, its events are queued if a queue size is given here or to the
+        broker, the broker's overflow policy applies unless another one is given.
+        """
         if details.session_id in self.subscriptions_by_session:
             raise ValueError("cannot add session twice")
 
+        if queue_size is None:
+            queue_size = self._queue_size
+
+        if queue_size is not None:
+            policy = overflow_policy if overflow_policy is not None else self._overflow_policy
+            self.queues[details.session_id] = EventQueue(queue_size, policy)
+
         self.subscriptions_by_session[details.session_id] = {}
         self.sessions[details.session_id] = details
 
@@ -30,28 +231,196 @@ class Broker:
             raise ValueError("cannot remove non-existing session")
 
         subscriptions = self.subscriptions_by_session.pop(sid)
-        for subscription_id, sub in subscriptions.items():
-            subscription = self.subscriptions_by_topic[sub.topic]
+        for subscription_id, subscription in subscriptions.items():
             if sid in subscription.subscribers:
                 del subscription.subscribers[sid]
 
             if len(subscription.subscribers) == 0:
-                del self.subscriptions_by_topic[subscription.topic]
+                self._remove_subscription(subscription)
 
         del self.sessions[sid]
+        self.queues.pop(sid, None)
+
+    def enable_history(
+        self, topic: str, depth: int, max_bytes: int | None = None, serializer: serializers.Serializer | None = None
+    ) -> EventHistory:
+        """
+        Keep the last depth events published to topic, and the last one published with
+        the retain option. With a depth of 0 only the retained event is kept.
+        """
+        history = EventHistory(depth, max_bytes, serializer)
+        self.histories[topic] = history
+        return history
+
+    def disable_history(self, topic: str) -> None:
+        self.histories.pop(topic, None)
+
+    def _histories_of(self, subscription: Subscription) -> list[tuple[str, EventHistory]]:
+        if subscription.match == matching.MATCH_EXACT:
+            history = self.histories.get(subscription.topic)
+            return [(subscription.topic, history)] if history is not None else []
 
-    def has_subscription(self, topic: str):
-        return topic in self.subscriptions_by_topic
+        trie = matching.PrefixTrie() if subscription.match == matching.MATCH_PREFIX else matching.WildcardTrie()
+        trie.insert(subscription.topic, subscription)
+        return [(topic, history) for topic, history in self.histories.items() if trie.match(topic)]
+
+    def _replay(
+        self,
+        session_id: int,
+        subscription: Subscription,
+        topic: str,
+        history: EventHistory,
+        entry: HistoryEntry,
+        retained: bool,
+    ) -> types.Publication:
+        details = dict(entry.details)
+        if subscription.match != matching.MATCH_EXACT:
+            details["topic"] = topic
+
+        if retained:
+            details[DETAIL_RETAINED] = True
+
+        # only the subscription ID and details are encoded again
+        data = entry.template.fill(subscription.id, details)
+        publication = types.Publication(event=history.serializer.deserialize(data), recipients=[session_id])
+        publication.set_serialized(history.serializer, data)
+        return publication
+
+    def get_subscription(self, session_id: int, subscription_id: int) -> Subscription:
+        subscriptions = self.subscriptions_by_session.get(session_id)
+        if subscriptions is None:
+            raise ValueError(f"session {session_id} doesn't exist")
+
+        subscription = subscriptions.get(subscription_id)
+        if subscription is None:
+            raise ValueError(f"subscription {subscription_id} doesn't exist")
+
+        return subscription
+
+    def get_retained(self, session_id: int, subscription_id: int) -> list[types.Publication]:
+        """
+        Return the retained events of the topics a subscription of the session matches,
+        e.g. after it subscribed with the get_retained option.
+        """
+        subscription = self.get_subscription(session_id, subscription_id)
+        return [
+            self._replay(session_id, subscription, topic, history, history.retained, True)
+            for topic, history in self._histories_of(subscription)
+            if history.retained is not None
+        ]
+
+    def get_events(self, session_id: int, subscription_id: int, limit: int | None = None) -> list[types.Publication]:
+        """return up to limit of the most recent events stored for the topics of a subscription, oldest first"""
+        subscription = self.get_subscription(session_id, subscription_id)
+        events = [
+            (entry.publication_id, index, topic, history, entry)
+            for topic, history in self._histories_of(subscription)
+            for index, entry in enumerate(history.events(limit))
+        ]
+        if len(events) > 1:
+            # publication IDs increase, except when wrapping around
+            events.sort(key=lambda event: event[:2])
+
+        if limit is not None:
+            events = events[-limit:] if limit > 0 else []
+
+        return [
+            self._replay(session_id, subscription, topic, history, entry, False)
+            for _, _, topic, history, entry in events
+        ]
+
+    def pending_events(self, sid: int) -> int:
+        queue = self.queues.get(sid)
+        return len(queue) if queue is not None else 0
+
+    def take_events(self, sid: int, limit: int | None = None) -> list[messages.Event]:
+        """
+        Remove and return the queued events of a session, oldest first, e.g. whenever
+        its transport can take more data.
+        """
+        queue = self.queues.get(sid)
+        if queue is None:
+            raise ValueError(f"session {sid} has no event queue")
+
+        return queue.take(limit)
+
+    def _enqueue(self, result: types.Publication, topic: str) -> None:
+        """move the recipients that have a queue from the publications to the queues"""
+        queued = {}
+        for publication in (result, *result.pattern_publications):
+            if publication.event is None:
+                continue
+
+            key = (publication.event.subscription_id, topic)
+            recipients = []
+            for recipient in publication.recipients:
+                queue = self.queues.get(recipient)
+                if queue is None:
+                    recipients.append(recipient)
+                    continue
+
+                overflowed = queue.overflowed
+                dropped = queue.dropped
+                if queue.push(key, publication.event):
+                    queued[recipient] = None
+
+                self.dropped_events += queue.dropped - dropped
+                if queue.overflowed and not overflowed:
+                    result.overflowed.append(recipient)
+
+            publication.recipients = recipients
+
+        result.queued = list(queued)
+
+    def has_subscription(self, topic: str, match: str = matching.MATCH_EXACT):
+        return self._get_subscription(topic, match) is not None
+
+    def _get_subscription(self, topic: str, match: str) -> Subscription | None:
+        if match == matching.MATCH_PREFIX:
+            return self.subscriptions_by_prefix.get(topic)
+        elif match == matching.MATCH_WILDCARD:
+            return self.subscriptions_by_wildcard.get(topic)
+
+        return self.subscriptions_by_topic.get(topic)
+
+    def _add_subscription(self, subscription: Subscription) -> None:
+        if subscription.match == matching.MATCH_PREFIX:
+            self.subscriptions_by_prefix.insert(subscription.topic, subscription)
+        elif subscription.match == matching.MATCH_WILDCARD:
+            self.subscriptions_by_wildcard.insert(subscription.topic, subscription)
+        else:
+            self.subscriptions_by_topic[subscription.topic] = subscription
+
+    def _remove_subscription(self, subscription: Subscription) -> None:
+        if subscription.match == matching.MATCH_PREFIX:
+            self.subscriptions_by_prefix.remove(subscription.topic)
+        elif subscription.match == matching.MATCH_WILDCARD:
+            self.subscriptions_by_wildcard.remove(subscription.topic)
+        else:
+            del self.subscriptions_by_topic[subscription.topic]
 
     def receive_message(self, session_id: int, message: messages.Message) -> types.MessageWithRecipient:
         if isinstance(message, messages.Subscribe):
             if session_id not in self.subscriptions_by_session:
                 raise ValueError(f"cannot subscribe, session {session_id} doesn't exist")
 
-            subscription = self.subscriptions_by_topic.get(message.topic)
+            match = message.options.get(OPTION_MATCH, matching.MATCH_EXACT)
+            if match not in (matching.MATCH_EXACT, matching.MATCH_PREFIX, matching.MATCH_WILDCARD):
+                error = messages.Error(
+                    messages.ErrorFields(messages.Subscribe.TYPE, message.request_id, uris.INVALID_ARGUMENT)
+                )
+                return types.MessageWithRecipient(error, session_id)
+
+            if self._uri_validator is not None and not self._uri_validator.is_valid(message.topic, match):
+                error = messages.Error(
+                    messages.ErrorFields(messages.Subscribe.TYPE, message.request_id, uris.INVALID_URI)
+                )
+                return types.MessageWithRecipient(error, session_id)
+
+            subscription = self._get_subscription(message.topic, match)
             if subscription is None:
-                subscription = Subscription(self.idgen.next(), message.topic, {session_id: session_id})
-                self.subscriptions_by_topic[message.topic] = subscription
+                subscription = Subscription(self.idgen.next(), message.topic, {session_id: session_id}, match)
+                self._add_subscription(subscription)
             else:
                 subscription.subscribers[session_id] = session_id
 
@@ -70,7 +439,7 @@ class Broker:
 
             del subscription.subscribers[session_id]
             if len(subscription.subscribers) == 0:
-                del self.subscriptions_by_topic[subscription.topic]
+                self._remove_subscription(subscription)
 
             del self.subscriptions_by_session[session_id][message.subscription_id]
 
@@ -79,23 +448,140 @@ class Broker:
         else:
             raise ValueError("message type not supported")
 
-    def receive_publish(self, session_id: int, message: messages.Publish) -> types.Publication:
+    def receive_publish(
+        self, session_id: int, message: messages.Publish, publication_id: int | None = None
+    ) -> types.Publication:
+        """
+        Route a PUBLISH to the subscribers of its topic. The publication ID is
+        taken from idgen unless given, e.g. by a router delivering the same
+        publication from several brokers.
+        """
         if session_id not in self.subscriptions_by_session:
             raise ValueError(f"cannot publish, session {session_id} doesn't exist")
 
         result = types.Publication(recipients=[])
-        publication_id = self.idgen.next()
+        if self._uri_validator is not None and not self._uri_validator.is_valid(message.uri):
+            # like other publication errors, only reported to publishers asking for an acknowledgement
+            if message.options.get(OPTION_ACKNOWLEDGE, False):
+                error = messages.Error(
+                    messages.ErrorFields(messages.Publish.TYPE, message.request_id, uris.INVALID_URI)
+                )
+                result.ack = types.MessageWithRecipient(error, session_id)
+
+            return result
+
+        if publication_id is None:
+            publication_id = self.idgen.next()
+
+        details = {}
+        if message.options.get(OPTION_DISCLOSE_ME, False):
+            publisher = self.sessions[session_id]
+            details["publisher"] = session_id
+            details["publisher_authid"] = publisher.authid
+            details["publisher_authrole"] = publisher.authrole
+
+        if message.payload is not None:
+            details.update(util.ppt_options(message.options))
 
+        args, kwargs = util.arguments(message)
         subscription = self.subscriptions_by_topic.get(message.uri)
         if subscription is not None:
-            event = messages.Event(messages.EventFields(subscription.id, publication_id, message.args, message.kwargs))
+            event = messages.Event(
+                messages.EventFields(
+                    subscription.id,
+                    publication_id,
+                    args,
+                    kwargs,
+                    details,
+                    message.payload_serializer,
+                    message.payload,
+                )
+            )
             result.event = event
             for subscriber_id in subscription.subscribers.keys():
                 result.recipients.append(subscriber_id)
 
-        ack = message.options.get("acknowledge", False)
+        if len(self.subscriptions_by_prefix) != 0 or len(self.subscriptions_by_wildcard) != 0:
+            pattern_subscriptions = self.subscriptions_by_prefix.match(message.uri)
+            pattern_subscriptions.extend(self.subscriptions_by_wildcard.match(message.uri))
+            for subscription in pattern_subscriptions:
+                # pattern-based subscribers need the actual topic to know what was published
+                pattern_details = {**details, "topic": message.uri}
+                event = messages.Event(
+                    messages.EventFields(
+                        subscription.id,
+                        publication_id,
+                        args,
+                        kwargs,
+                        pattern_details,
+                        message.payload_serializer,
+                        message.payload,
+                    )
+                )
+                publication = types.Publication(event=event, recipients=list(subscription.subscribers.keys()))
+                publication.share_templates(result)
+                result.pattern_publications.append(publication)
+
+        if len(self.histories) != 0 and (history := self.histories.get(message.uri)) is not None:
+            if result.event is not None:
+                # a template encoded for the subscribers of the topic is reused
+                stored = result
+            else:
+                event = messages.Event(
+                    messages.EventFields(
+                        # replaced by the subscription ID of each subscriber on replay
+                        util.MIN_ID,
+                        publication_id,
+                        args,
+                        kwargs,
+                        details,
+                        message.payload_serializer,
+                        message.payload,
+                    )
+                )
+                stored = types.Publication(event=event)
+
+            history.append(stored, message.options.get(OPTION_RETAIN, False))
+
+        if len(self.queues) != 0:
+            self._enqueue(result, message.uri)
+
+        ack = message.options.get(OPTION_ACKNOWLEDGE, False)
         if ack:
             published = messages.Published(messages.PublishedFields(message.request_id, publication_id))
             result.ack = types.MessageWithRecipient(published, session_id)
 
         return result
+
+    def receive_batch(self, session_id: int, batch: list[messages.Message]) -> dict[int, list[messages.Message]]:
+        """
+        Process several messages received from a session, in order, and return the
+        outgoing messages grouped by recipient, so each peer can get a single write.
+        Events of sessions with a queue are left in it. If a message raises, the
+        ones before it have already been applied.
+        """
+        results: dict[int, list[messages.Message]] = {}
+        for message in batch:
+            if isinstance(message, messages.Publish):
+                publication = self.receive_publish(session_id, message)
+                for pub in (publication, *publication.pattern_publications):
+                    if pub.event is None:
+                        continue
+
+                    for recipient in pub.recipients:
+                        results.setdefault(recipient, []).append(pub.event)
+
+                if publication.ack is not None:
+                    results.setdefault(publication.ack.recipient, []).append(publication.ack.message)
+            else:
+                result = self.receive_message(session_id, message)
+                results.setdefault(result.recipient, []).append(result.message)
+                if (
+                    isinstance(result.message, messages.Subscribed)
+                    and len(self.histories) != 0
+                    and message.options.get(OPTION_GET_RETAINED, False)
+                ):
+                    for publication in self.get_retained(session_id, result.message.subscription_id):
+                        results[session_id].append(publication.event)
+
+        return results
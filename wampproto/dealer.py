@@ -1,9 +1,40 @@
-from dataclasses import dataclass
+import heapq
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable
 
-from wampproto import idgen, types, messages
+from wampproto import idgen, types, messages, uris
+from wampproto.messages import util
 
 OPTION_RECEIVE_PROGRESS = "receive_progress"
 OPTION_PROGRESS = "progress"
+OPTION_INVOKE = "invoke"
+OPTION_TIMEOUT = "timeout"
+OPTION_MODE = "mode"
+OPTION_REASON = "reason"
+
+# largest call timeout accepted, in milliseconds
+MAX_TIMEOUT = util.MAX_ID
+
+CANCEL_MODE_SKIP = "skip"
+CANCEL_MODE_KILL = "kill"
+CANCEL_MODE_KILLNOWAIT = "killnowait"
+
+CANCEL_MODES = (CANCEL_MODE_SKIP, CANCEL_MODE_KILL, CANCEL_MODE_KILLNOWAIT)
+
+INVOKE_SINGLE = "single"
+INVOKE_ROUNDROBIN = "roundrobin"
+INVOKE_RANDOM = "random"
+INVOKE_FIRST = "first"
+INVOKE_LAST = "last"
+INVOKE_LEAST_BUSY = "least_busy"
+
+INVOCATION_POLICIES = (INVOKE_SINGLE, INVOKE_ROUNDROBIN, INVOKE_RANDOM, INVOKE_FIRST, INVOKE_LAST, INVOKE_LEAST_BUSY)
+
+# seconds during which late answers to a timed out or canceled call are dropped silently
+ABANDONED_TIMEOUT = 60.0
 
 
 @dataclass
@@ -13,6 +44,46 @@ class PendingInvocation:
     callee_id: int
     progress: bool
     receive_progress: bool
+    deadline: float | None = None
+    # set once the caller canceled the call with mode "kill"
+    canceled: bool = False
+
+
+class LeastBusyIndex:
+    """
+    Callees of a registration bucketed by their number of in-flight invocations,
+    so the least busy one is found without scanning all callees.
+    """
+
+    def __init__(self):
+        self.loads: dict[int, int] = {}
+        # callees per load, dicts keep them in registration order
+        self.buckets: dict[int, dict[int, None]] = {}
+        self.min_load = 0
+
+    def add(self, callee_id: int, load: int) -> None:
+        self.loads[callee_id] = load
+        self.buckets.setdefault(load, {})[callee_id] = None
+        if len(self.loads) == 1 or load < self.min_load:
+            self.min_load = load
+
+    def remove(self, callee_id: int) -> None:
+        load = self.loads.pop(callee_id)
+        bucket = self.buckets[load]
+        del bucket[callee_id]
+        if len(bucket) == 0:
+            del self.buckets[load]
+
+    def update(self, callee_id: int, load: int) -> None:
+        self.remove(callee_id)
+        self.add(callee_id, load)
+
+    def least_busy(self) -> int:
+        # loads only move one step at a time, so this loop is amortized O(1)
+        while self.min_load not in self.buckets:
+            self.min_load += 1
+
+        return next(iter(self.buckets[self.min_load]))
 
 
 @dataclass
@@ -22,15 +93,42 @@ class Registration:
     registrants: dict[int, int]
     invocation_policy: str | None = None
 
+    # registrants in registration order, for O(1) positional and random selection
+    callees: list[int] = field(default_factory=list)
+    next_callee: int = 0
+    least_busy: LeastBusyIndex | None = None
+
 
 class Dealer:
-    def __init__(self):
+    def __init__(
+        self,
+        clock: Callable[[], float] = time.monotonic,
+        uri_validator: uris.URIValidator | None = None,
+        abandoned_timeout: float = ABANDONED_TIMEOUT,
+    ):
         self.registrations_by_procedure: dict[str, Registration] = {}
         self.registrations_by_session: dict[int, dict[int, Registration]] = {}
         self.pending_calls: dict[int, PendingInvocation] = {}
         self.call_to_invocation_id: dict[tuple[int, int], int] = {}
+        # number of entries in pending_calls per callee
+        self.inflight_by_callee: dict[int, int] = {}
         self.sessions: dict[int, types.SessionDetails] = {}
 
+        # (deadline, invocation ID) of calls with a timeout. Entries of calls that
+        # completed in time are left in place and skipped once they surface.
+        self._deadlines: list[tuple[float, int]] = []
+        self._clock = clock
+        # procedures are only checked when a validator is given
+        self._uri_validator = uri_validator
+
+        # invocations whose caller already got an ERROR, mapped to their callee. Late
+        # YIELD or ERROR messages for those are dropped instead of being routed. Entries
+        # are forgotten after abandoned_timeout seconds, in the order they were added,
+        # so callees that never answer don't make the table grow without bound.
+        self._abandoned_invocations: dict[int, int] = {}
+        self._abandoned_expiry: deque[tuple[float, int]] = deque()
+        self._abandoned_timeout = abandoned_timeout
+
         self.idgen = idgen.SessionScopeIDGenerator()
 
     def add_session(self, details: types.SessionDetails):
@@ -40,54 +138,253 @@ class Dealer:
         self.registrations_by_session[details.session_id] = {}
         self.sessions[details.session_id] = details
 
-    def remove_session(self, sid: int):
+    def remove_session(self, sid: int) -> list[types.MessageWithRecipient]:
+        """
+        Remove a session and end its pending calls: the callers of the calls it was
+        invoked for get an ERROR and the callees of the calls it made an INTERRUPT.
+        """
         if sid not in self.registrations_by_session:
             raise ValueError("cannot remove non-existing session")
 
+        ended = []
+        pending_calls = [
+            (invocation_id, pending)
+            for invocation_id, pending in self.pending_calls.items()
+            if sid in (pending.caller_id, pending.callee_id)
+        ]
+        for invocation_id, pending in pending_calls:
+            for result in self._abandon_call(invocation_id, pending, uris.CANCELED):
+                if result.recipient != sid:
+                    ended.append(result)
+
         registrations = self.registrations_by_session.pop(sid)
         for registration_id, registration in registrations.items():
-            registration = self.registrations_by_procedure[registration.procedure]
             if sid in registration.registrants:
-                del registration.registrants[sid]
+                self._remove_registrant(registration, sid)
 
             if len(registration.registrants) == 0:
                 del self.registrations_by_procedure[registration.procedure]
 
+        self._abandoned_invocations = {
+            invocation_id: callee_id
+            for invocation_id, callee_id in self._abandoned_invocations.items()
+            if callee_id != sid
+        }
+
         del self.sessions[sid]
+        return ended
 
     def has_registration(self, procedure: str) -> bool:
         return procedure in self.registrations_by_procedure
 
+    def _add_registrant(self, registration: Registration, session_id: int) -> None:
+        registration.registrants[session_id] = session_id
+        registration.callees.append(session_id)
+        if registration.least_busy is not None:
+            registration.least_busy.add(session_id, self.inflight_by_callee.get(session_id, 0))
+
+    def _remove_registrant(self, registration: Registration, session_id: int) -> None:
+        del registration.registrants[session_id]
+        registration.callees.remove(session_id)
+        if registration.least_busy is not None:
+            registration.least_busy.remove(session_id)
+
+    def _select_callee(self, registration: Registration) -> int:
+        policy = registration.invocation_policy
+        if policy == INVOKE_ROUNDROBIN:
+            index = registration.next_callee % len(registration.callees)
+            registration.next_callee = index + 1
+            return registration.callees[index]
+        elif policy == INVOKE_RANDOM:
+            return random.choice(registration.callees)
+        elif policy == INVOKE_LAST:
+            return registration.callees[-1]
+        elif policy == INVOKE_LEAST_BUSY:
+            return registration.least_busy.least_busy()
+
+        # single and first
+        return registration.callees[0]
+
+    def _update_inflight(self, callee_id: int, delta: int) -> None:
+        load = self.inflight_by_callee.get(callee_id, 0) + delta
+        if load == 0:
+            self.inflight_by_callee.pop(callee_id, None)
+        else:
+            self.inflight_by_callee[callee_id] = load
+
+        for registration in self.registrations_by_session.get(callee_id, {}).values():
+            if registration.least_busy is not None:
+                registration.least_busy.update(callee_id, load)
+
     def _add_call(
-        self, call_id: int, invocation_id: int, caller_id: int, callee_id: int, progress: bool, receive_progress: bool
+        self,
+        call_id: int,
+        invocation_id: int,
+        caller_id: int,
+        callee_id: int,
+        progress: bool,
+        receive_progress: bool,
+        timeout: int = 0,
     ) -> None:
-        self.pending_calls[invocation_id] = PendingInvocation(call_id, caller_id, callee_id, progress, receive_progress)
+        pending = PendingInvocation(call_id, caller_id, callee_id, progress, receive_progress)
+        if timeout > 0:
+            # the timeout option is in milliseconds
+            pending.deadline = self._clock() + timeout / 1000
+            heapq.heappush(self._deadlines, (pending.deadline, invocation_id))
+
+        self.pending_calls[invocation_id] = pending
         self.call_to_invocation_id[(caller_id, call_id)] = invocation_id
+        self._update_inflight(callee_id, 1)
+
+    def _remove_call(self, invocation_id: int) -> PendingInvocation | None:
+        pending = self.pending_calls.pop(invocation_id, None)
+        if pending is None:
+            return None
+
+        self.call_to_invocation_id.pop((pending.caller_id, pending.request_id), None)
+        self._update_inflight(pending.callee_id, -1)
+        return pending
+
+    def next_deadline(self) -> float | None:
+        """time at which the next call times out, None if no call has a timeout"""
+        while len(self._deadlines) != 0:
+            deadline, invocation_id = self._deadlines[0]
+            pending = self.pending_calls.get(invocation_id)
+            if pending is not None and pending.deadline == deadline:
+                return deadline
+
+            heapq.heappop(self._deadlines)
+
+        return None
+
+    def expire(self, now: float | None = None) -> list[types.MessageWithRecipient]:
+        """
+        Time out the calls whose deadline has passed and return the ERROR for each
+        caller and the INTERRUPT for each callee. Only expired entries are visited.
+        """
+        if now is None:
+            now = self._clock()
+
+        expired = []
+        while len(self._deadlines) != 0 and self._deadlines[0][0] <= now:
+            deadline, invocation_id = heapq.heappop(self._deadlines)
+            pending = self.pending_calls.get(invocation_id)
+            if pending is None or pending.deadline != deadline:
+                continue
+
+            expired.extend(self._abandon_call(invocation_id, pending, uris.TIMEOUT))
+
+        self._forget_abandoned(now)
+        return expired
+
+    def _forget_abandoned(self, now: float) -> None:
+        expiry = self._abandoned_expiry
+        while len(expiry) != 0 and expiry[0][0] <= now:
+            _, invocation_id = expiry.popleft()
+            self._abandoned_invocations.pop(invocation_id, None)
+
+    def _abandon_call(
+        self, invocation_id: int, pending: PendingInvocation, reason: str
+    ) -> list[types.MessageWithRecipient]:
+        # free the call right away, whatever the callee sends for it later is dropped
+        self._remove_call(invocation_id)
+        now = self._clock()
+        self._forget_abandoned(now)
+        self._abandoned_invocations[invocation_id] = pending.callee_id
+        self._abandoned_expiry.append((now + self._abandoned_timeout, invocation_id))
+
+        err = messages.Error(messages.ErrorFields(messages.Call.TYPE, pending.request_id, reason))
+        interrupt = messages.Interrupt(
+            messages.InterruptFields(invocation_id, {OPTION_MODE: CANCEL_MODE_KILLNOWAIT, OPTION_REASON: reason})
+        )
+        return [
+            types.MessageWithRecipient(err, pending.caller_id),
+            types.MessageWithRecipient(interrupt, pending.callee_id),
+        ]
+
+    def _is_abandoned(self, session_id: int, invocation_id: int, final: bool) -> bool:
+        if self._abandoned_invocations.get(invocation_id) != session_id:
+            return False
+
+        if final:
+            del self._abandoned_invocations[invocation_id]
+
+        return True
+
+    def receive_cancel(self, session_id: int, message: messages.Cancel) -> list[types.MessageWithRecipient]:
+        """
+        Handle a CANCEL from a caller. Depending on the mode this returns the ERROR for
+        the caller ("skip"), the INTERRUPT for the callee ("kill", the callee's ERROR is
+        routed back to the caller when it arrives) or both ("killnowait", the default).
+        Returns an empty list if the call already completed.
+        """
+        if session_id not in self.sessions:
+            raise ValueError(f"cannot cancel, session {session_id} doesn't exist")
+
+        mode = message.options.get(OPTION_MODE, CANCEL_MODE_KILLNOWAIT)
+        if mode not in CANCEL_MODES:
+            err = messages.Error(messages.ErrorFields(messages.Cancel.TYPE, message.request_id, uris.INVALID_ARGUMENT))
+            return [types.MessageWithRecipient(err, session_id)]
+
+        invocation_id = self.call_to_invocation_id.get((session_id, message.request_id))
+        if invocation_id is None:
+            return []
+
+        pending = self.pending_calls[invocation_id]
+        if pending.canceled:
+            return []
+
+        if mode == CANCEL_MODE_KILL:
+            pending.canceled = True
+            interrupt = messages.Interrupt(
+                messages.InterruptFields(invocation_id, {OPTION_MODE: mode, OPTION_REASON: uris.CANCELED})
+            )
+            return [types.MessageWithRecipient(interrupt, pending.callee_id)]
+
+        abandoned = self._abandon_call(invocation_id, pending, uris.CANCELED)
+        if mode == CANCEL_MODE_SKIP:
+            # the callee is left alone, only the caller is told
+            return abandoned[:1]
+
+        return abandoned
 
-    def receive_message(self, session_id: int, message: messages.Message) -> types.MessageWithRecipient:
+    def receive_message(self, session_id: int, message: messages.Message) -> types.MessageWithRecipient | None:
         if isinstance(message, messages.Call):
             registration = self.registrations_by_procedure.get(message.uri)
             if registration is None:
-                err = messages.Error(
-                    messages.ErrorFields(message.TYPE, message.request_id, "wamp.error.no_such_procedure")
-                )
-                return types.MessageWithRecipient(err, session_id)
+                # registered procedures were validated when registering, so only unknown ones are checked
+                error_uri = uris.NO_SUCH_PROCEDURE
+                if self._uri_validator is not None and not self._uri_validator.is_valid(message.uri):
+                    error_uri = uris.INVALID_URI
 
-            callee_id: int = 0
-            for session in registration.registrants.keys():
-                callee_id = session
-                break
+                err = messages.Error(messages.ErrorFields(message.TYPE, message.request_id, error_uri))
+                return types.MessageWithRecipient(err, session_id)
 
             receive_progress = message.options.get(OPTION_RECEIVE_PROGRESS, False)
             progress = message.options.get(OPTION_PROGRESS, False)
+            timeout = message.options.get(OPTION_TIMEOUT, 0)
+            # bool is an int subclass, and huge integers overflow when computing the deadline
+            if type(timeout) is not int or not 0 <= timeout <= MAX_TIMEOUT:
+                err = messages.Error(messages.ErrorFields(message.TYPE, message.request_id, uris.INVALID_ARGUMENT))
+                return types.MessageWithRecipient(err, session_id)
+
             if progress:
                 invocation_id = self.call_to_invocation_id.get((session_id, message.request_id))
                 if invocation_id is None:
                     invocation_id = self.idgen.next()
-                    self._add_call(message.request_id, invocation_id, session_id, callee_id, progress, receive_progress)
+                    callee_id = self._select_callee(registration)
+                    self._add_call(
+                        message.request_id, invocation_id, session_id, callee_id, progress, receive_progress, timeout
+                    )
+                else:
+                    # later chunks of a progressive call go to the callee that got the first one
+                    callee_id = self.pending_calls[invocation_id].callee_id
             else:
                 invocation_id = self.idgen.next()
-                self._add_call(message.request_id, invocation_id, session_id, callee_id, progress, receive_progress)
+                callee_id = self._select_callee(registration)
+                self._add_call(
+                    message.request_id, invocation_id, session_id, callee_id, progress, receive_progress, timeout
+                )
 
             details = {}
             if receive_progress:
@@ -96,12 +393,16 @@ class Dealer:
             if progress:
                 details[OPTION_PROGRESS] = True
 
+            if message.payload is not None:
+                details.update(util.ppt_options(message.options))
+
+            args, kwargs = util.arguments(message)
             invocation = messages.Invocation(
                 messages.InvocationFields(
                     request_id=invocation_id,
                     registration_id=registration.id,
-                    args=message.args,
-                    kwargs=message.kwargs,
+                    args=args,
+                    kwargs=kwargs,
                     details=details,
                     payload=message.payload,
                     serializer=message.payload_serializer,
@@ -113,6 +414,10 @@ class Dealer:
             try:
                 invocation = self.pending_calls[message.request_id]
             except KeyError:
+                final = not message.options.get(OPTION_PROGRESS, False)
+                if self._is_abandoned(session_id, message.request_id, final):
+                    return None
+
                 raise ValueError(f"no pending calls for session {session_id}")
 
             if session_id != invocation.callee_id:
@@ -123,12 +428,20 @@ class Dealer:
             if receive_progress and invocation.receive_progress:
                 details.update({OPTION_PROGRESS: receive_progress})
             else:
-                del self.pending_calls[message.request_id]
-                del self.call_to_invocation_id[(invocation.caller_id, invocation.request_id)]
+                self._remove_call(message.request_id)
+
+            if message.payload is not None:
+                details.update(util.ppt_options(message.options))
 
+            args, kwargs = util.arguments(message)
             result = messages.Result(
                 messages.ResultFields(
-                    request_id=invocation.request_id, args=message.args, kwargs=message.kwargs, options=details
+                    request_id=invocation.request_id,
+                    args=args,
+                    kwargs=kwargs,
+                    options=details,
+                    payload=message.payload,
+                    serializer=message.payload_serializer,
                 )
             )
             return types.MessageWithRecipient(result, invocation.caller_id)
@@ -136,19 +449,43 @@ class Dealer:
             if session_id not in self.registrations_by_session:
                 raise ValueError(f"cannot register, session {session_id} doesn't exist")
 
+            invocation_policy = message.options.get(OPTION_INVOKE, INVOKE_SINGLE)
+            if invocation_policy not in INVOCATION_POLICIES:
+                error = messages.Error(
+                    messages.ErrorFields(messages.Register.TYPE, message.request_id, uris.INVALID_ARGUMENT)
+                )
+                return types.MessageWithRecipient(error, session_id)
+
+            if self._uri_validator is not None and not self._uri_validator.is_valid(message.uri):
+                error = messages.Error(
+                    messages.ErrorFields(messages.Register.TYPE, message.request_id, uris.INVALID_URI)
+                )
+                return types.MessageWithRecipient(error, session_id)
+
             registration = self.registrations_by_procedure.get(message.uri)
             if registration is None:
-                registration = Registration(self.idgen.next(), message.uri, {session_id: session_id})
+                registration = Registration(self.idgen.next(), message.uri, {}, invocation_policy)
+                if invocation_policy == INVOKE_LEAST_BUSY:
+                    registration.least_busy = LeastBusyIndex()
+
                 self.registrations_by_procedure[message.uri] = registration
-                self.registrations_by_session[session_id][registration.id] = registration
-            else:
-                # TODO: implement shared registrations.
-                registered = messages.Error(
+            elif invocation_policy == INVOKE_SINGLE or session_id in registration.registrants:
+                error = messages.Error(
+                    messages.ErrorFields(messages.Register.TYPE, message.request_id, uris.PROCEDURE_ALREADY_EXISTS)
+                )
+                return types.MessageWithRecipient(error, session_id)
+            elif invocation_policy != registration.invocation_policy:
+                error = messages.Error(
                     messages.ErrorFields(
-                        messages.Register.TYPE, message.request_id, "wamp.error.procedure_already_exists"
+                        messages.Register.TYPE,
+                        message.request_id,
+                        uris.PROCEDURE_EXISTS_INVOCATION_POLICY_CONFLICT,
                     )
                 )
-                return types.MessageWithRecipient(registered, session_id)
+                return types.MessageWithRecipient(error, session_id)
+
+            self._add_registrant(registration, session_id)
+            self.registrations_by_session[session_id][registration.id] = registration
 
             registered = messages.Registered(messages.RegisteredFields(message.request_id, registration.id))
             return types.MessageWithRecipient(registered, session_id)
@@ -163,13 +500,12 @@ class Dealer:
                     f"cannot unregister, session {session_id} haven't registered for {message.registration_id}"
                 )
 
-            try:
-                registration.registrants.pop(session_id)
-            except KeyError:
+            if session_id not in registration.registrants:
                 raise ValueError(f"cannot unregister, session {session_id} haven't registered for {registration.id}")
 
+            self._remove_registrant(registration, session_id)
+            del registrations[message.registration_id]
             if len(registration.registrants) == 0:
-                del registrations[message.registration_id]
                 del self.registrations_by_procedure[registration.procedure]
 
             self.registrations_by_session[session_id] = registrations
@@ -180,13 +516,42 @@ class Dealer:
             if message.message_type != messages.Invocation.TYPE:
                 raise ValueError("dealer: only expected to receive error in response to invocation")
 
-            pending = self.pending_calls.pop(message.request_id, None)
+            pending = self._remove_call(message.request_id)
             if pending is None:
+                if self._is_abandoned(session_id, message.request_id, True):
+                    return None
+
                 raise ValueError(f"dealer: no pending invocation for {message.request_id}")
 
+            args, kwargs = util.arguments(message)
             err_msg = messages.Error(messages.ErrorFields(
-                messages.Call.TYPE, pending.request_id, message.uri, message.args, message.kwargs, message.details
+                messages.Call.TYPE,
+                pending.request_id,
+                message.uri,
+                args,
+                kwargs,
+                message.details,
+                message.payload_serializer,
+                message.payload,
             ))
             return types.MessageWithRecipient(err_msg, pending.caller_id)
         else:
             raise ValueError("message type not supported")
+
+    def receive_batch(self, session_id: int, batch: list[messages.Message]) -> dict[int, list[messages.Message]]:
+        """
+        Process several messages received from a session, in order, and return the
+        outgoing messages grouped by recipient, so each peer can get a single write.
+        If a message raises, the ones before it have already been applied.
+        """
+        results: dict[int, list[messages.Message]] = {}
+        for message in batch:
+            if isinstance(message, messages.Cancel):
+                for result in self.receive_cancel(session_id, message):
+                    results.setdefault(result.recipient, []).append(result.message)
+            else:
+                result = self.receive_message(session_id, message)
+                if result is not None:
+                    results.setdefault(result.recipient, []).append(result.message)
+
+        return results
@@ -18,3 +18,26 @@ class SessionScopeIDGenerator:
 
         self.id += 1
         return self.id
+
+
+class StridedIDGenerator:
+    """
+    Session scope IDs taken from one of several disjoint sequences: offset,
+    offset + stride, ... so the sequence an ID came from is (id - 1) % stride.
+    """
+
+    def __init__(self, offset: int, stride: int):
+        if not 1 <= offset <= stride:
+            raise ValueError(f"offset must be between 1 and {stride}")
+
+        super().__init__()
+        self.offset = offset
+        self.stride = stride
+        self.id: int = offset - stride
+
+    def next(self):
+        if self.id + self.stride > ID_MAX:
+            self.id = self.offset - self.stride
+
+        self.id += self.stride
+        return self.id
@@ -21,11 +21,11 @@ class Joiner:
     def __init__(
         self,
         realm: str,
-        serializer: serializers.Serializer = serializers.JSONSerializer(),
+        serializer: serializers.Serializer | None = None,
         authenticator: auth.IClientAuthenticator = None,
     ):
         self._realm = realm
-        self._serializer = serializer
+        self._serializer = serializer if serializer is not None else serializers.JSONSerializer()
         self._authenticator = authenticator if authenticator is not None else auth.AnonymousAuthenticator("", {})
         self._state = Joiner.STATE_NONE
 
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+from typing import Any
+
+MATCH_EXACT = "exact"
+MATCH_PREFIX = "prefix"
+MATCH_WILDCARD = "wildcard"
+
+
+class _PrefixNode:
+    __slots__ = ("children", "partials", "partial_lengths")
+
+    def __init__(self):
+        self.children: dict[str, _PrefixNode] = {}
+        # values of prefixes ending in this node, keyed by the (possibly partial)
+        # last component of the prefix
+        self.partials: dict[str, Any] = {}
+        # number of partials per length, so matching only slices lengths in use
+        self.partial_lengths: dict[int, int] = {}
+
+
+class PrefixTrie:
+    """
+    URI-component trie for prefix patterns.
+
+    WAMP prefix matching is a plain string prefix match ("com.app.em" matches
+    "com.app.emergency"), so a pattern is stored in the node of its complete
+    components and keyed by its last (possibly partial) component. Matching
+    walks the components of a URI once, the cost depends on the URI depth and
+    not on the number of stored patterns.
+    """
+
+    def __init__(self):
+        self._root = _PrefixNode()
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, pattern: str) -> bool:
+        return self.get(pattern) is not None
+
+    @staticmethod
+    def _split(pattern: str) -> tuple[list[str], str]:
+        components = pattern.split(".")
+        return components[:-1], components[-1]
+
+    def get(self, pattern: str) -> Any | None:
+        path, partial = self._split(pattern)
+        node = self._root
+        for component in path:
+            node = node.children.get(component)
+            if node is None:
+                return None
+
+        return node.partials.get(partial)
+
+    def insert(self, pattern: str, value: Any) -> None:
+        path, partial = self._split(pattern)
+        node = self._root
+        for component in path:
+            child = node.children.get(component)
+            if child is None:
+                child = _PrefixNode()
+                node.children[component] = child
+
+            node = child
+
+        if partial not in node.partials:
+            node.partial_lengths[len(partial)] = node.partial_lengths.get(len(partial), 0) + 1
+            self._count += 1
+
+        node.partials[partial] = value
+
+    def remove(self, pattern: str) -> Any | None:
+        path, partial = self._split(pattern)
+        nodes = [self._root]
+        for component in path:
+            node = nodes[-1].children.get(component)
+            if node is None:
+                return None
+
+            nodes.append(node)
+
+        node = nodes[-1]
+        value = node.partials.pop(partial, None)
+        if value is None:
+            return None
+
+        length = len(partial)
+        node.partial_lengths[length] -= 1
+        if node.partial_lengths[length] == 0:
+            del node.partial_lengths[length]
+
+        self._count -= 1
+
+        # prune nodes that hold nothing anymore
+        for depth in range(len(path), 0, -1):
+            node = nodes[depth]
+            if node.partials or node.children:
+                break
+
+            del nodes[depth - 1].children[path[depth - 1]]
+
+        return value
+
+    def match(self, uri: str) -> list[Any]:
+        matches = []
+        node = self._root
+        for component in uri.split("."):
+            if node.partials:
+                partials = node.partials
+                size = len(component)
+                for length in node.partial_lengths:
+                    if length <= size and (value := partials.get(component[:length])) is not None:
+                        matches.append(value)
+
+            node = node.children.get(component)
+            if node is None:
+                break
+
+        return matches
+
+
+class _WildcardNode:
+    __slots__ = ("children", "value")
+
+    def __init__(self):
+        self.children: dict[str, _WildcardNode] = {}
+        self.value: Any | None = None
+
+
+class WildcardTrie:
+    """
+    URI-component trie for wildcard patterns, empty components ("com..update")
+    match any single component. Matching follows the exact and the wildcard edge
+    at each depth, so the cost depends on the URI depth and the patterns sharing
+    its components, not on the total number of stored patterns.
+    """
+
+    def __init__(self):
+        self._root = _WildcardNode()
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, pattern: str) -> bool:
+        return self.get(pattern) is not None
+
+    def get(self, pattern: str) -> Any | None:
+        node = self._root
+        for component in pattern.split("."):
+            node = node.children.get(component)
+            if node is None:
+                return None
+
+        return node.value
+
+    def insert(self, pattern: str, value: Any) -> None:
+        node = self._root
+        for component in pattern.split("."):
+            child = node.children.get(component)
+            if child is None:
+                child = _WildcardNode()
+                node.children[component] = child
+
+            node = child
+
+        if node.value is None:
+            self._count += 1
+
+        node.value = value
+
+    def remove(self, pattern: str) -> Any | None:
+        components = pattern.split(".")
+        nodes = [self._root]
+        for component in components:
+            node = nodes[-1].children.get(component)
+            if node is None:
+                return None
+
+            nodes.append(node)
+
+        value = nodes[-1].value
+        if value is None:
+            return None
+
+        nodes[-1].value = None
+        self._count -= 1
+
+        for depth in range(len(components), 0, -1):
+            node = nodes[depth]
+            if node.value is not None or node.children:
+                break
+
+            del nodes[depth - 1].children[components[depth - 1]]
+
+        return value
+
+    def match(self, uri: str) -> list[Any]:
+        nodes = [self._root]
+        for component in uri.split("."):
+            next_nodes = []
+            for node in nodes:
+                if (child := node.children.get(component)) is not None:
+                    next_nodes.append(child)
+
+                if component != "" and (child := node.children.get("")) is not None:
+                    next_nodes.append(child)
+
+            if not next_nodes:
+                return []
+
+            nodes = next_nodes
+
+        return [node.value for node in nodes if node.value is not None]
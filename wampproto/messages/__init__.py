@@ -9,7 +9,7 @@ from wampproto.messages.yield_ import Yield, YieldFields
 from wampproto.messages.result import Result, ResultFields
 from wampproto.messages.welcome import Welcome, WelcomeFields
 from wampproto.messages.goodbye import Goodbye, GoodbyeFields
-from wampproto.messages.message import Message
+from wampproto.messages.message import Message, RawArguments
 from wampproto.messages.challenge import Challenge, ChallengeFields
 from wampproto.messages.invocation import Invocation, InvocationFields
 from wampproto.messages.authenticate import Authenticate, AuthenticateFields
@@ -26,6 +26,7 @@ from wampproto.messages.interrupt import Interrupt, InterruptFields
 
 __all__ = (
     "Message",
+    "RawArguments",
     "Hello",
     "HelloFields",
     "Welcome",
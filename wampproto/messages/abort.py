@@ -2,12 +2,14 @@ from __future__ import annotations
 
 from typing import Any
 
-from wampproto.messages import util
+from wampproto.messages import util, decoder
 from wampproto.messages.message import Message
 from wampproto.messages.validation_spec import ValidationSpec
 
 
 class IAbortFields:
+    __slots__ = ()
+
     @property
     def details(self):
         raise NotImplementedError()
@@ -26,6 +28,8 @@ class IAbortFields:
 
 
 class AbortFields(IAbortFields):
+    __slots__ = ("_details", "_reason", "_args", "_kwargs")
+
     def __init__(self, details: dict, reason: str, args: list[Any] | None = None, kwargs: dict[str, Any] | None = None):
         super().__init__()
         self._details = details
@@ -50,7 +54,9 @@ class AbortFields(IAbortFields):
         return self._kwargs
 
 
-class Abort(Message):
+class Abort(Message, AbortFields):
+    __slots__ = ()
+
     TEXT = "ABORT"
     TYPE = 3
 
@@ -65,31 +71,14 @@ class Abort(Message):
             4: util.validate_kwargs,
         },
     )
+    DECODER = decoder.compile_decoder(VALIDATION_SPEC, TYPE, AbortFields, ("details", "reason", "args", "kwargs"))
 
     def __init__(self, fields: IAbortFields):
-        super().__init__()
-        self._fields = fields
-
-    @property
-    def details(self) -> dict[str, Any]:
-        return self._fields.details
-
-    @property
-    def reason(self) -> str:
-        return self._fields.reason
-
-    @property
-    def args(self) -> list[Any] | None:
-        return self._fields.args
-
-    @property
-    def kwargs(self) -> dict[str, Any] | None:
-        return self._fields.kwargs
+        AbortFields.__init__(self, fields.details, fields.reason, fields.args, fields.kwargs)
 
     @classmethod
     def parse(cls, msg: list[Any]) -> Abort:
-        f = util.validate_message(msg, cls.TYPE, cls.VALIDATION_SPEC)
-        return Abort(AbortFields(f.details, f.reason, f.args, f.kwargs))
+        return cls.DECODER(msg, cls)
 
     def marshal(self) -> list[Any]:
         return [self.TYPE, self.details, self.reason]
@@ -2,12 +2,14 @@ from __future__ import annotations
 
 from typing import Any
 
-from wampproto.messages import util
+from wampproto.messages import util, decoder
 from wampproto.messages.message import Message
 from wampproto.messages.validation_spec import ValidationSpec
 
 
 class IAuthenticateFields:
+    __slots__ = ()
+
     @property
     def signature(self) -> str:
         raise NotImplementedError()
@@ -18,6 +20,8 @@ class IAuthenticateFields:
 
 
 class AuthenticateFields(IAuthenticateFields):
+    __slots__ = ("_signature", "_extra")
+
     def __init__(self, signature: str, extra: dict | None = None):
         super().__init__()
         self._signature = signature
@@ -32,7 +36,9 @@ class AuthenticateFields(IAuthenticateFields):
         return self._extra
 
 
-class Authenticate(Message):
+class Authenticate(Message, AuthenticateFields):
+    __slots__ = ()
+
     TEXT = "AUTHENTICATE"
     TYPE = 5
 
@@ -45,23 +51,14 @@ class Authenticate(Message):
             2: util.validate_extra,
         },
     )
+    DECODER = decoder.compile_decoder(VALIDATION_SPEC, TYPE, AuthenticateFields, ("signature", "extra"))
 
     def __init__(self, fields: AuthenticateFields):
-        super().__init__()
-        self._fields = fields
-
-    @property
-    def signature(self) -> str:
-        return self._fields.signature
-
-    @property
-    def extra(self) -> dict[str, Any]:
-        return self._fields.extra
+        AuthenticateFields.__init__(self, fields.signature, fields.extra)
 
     @classmethod
     def parse(cls, msg: list[Any]) -> Authenticate:
-        f = util.validate_message(msg, cls.TYPE, cls.VALIDATION_SPEC)
-        return Authenticate(AuthenticateFields(f.signature, f.extra))
+        return cls.DECODER(msg, cls)
 
     def marshal(self) -> list[Any]:
         return [self.TYPE, self.signature, self.extra]
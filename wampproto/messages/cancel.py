@@ -2,11 +2,13 @@ from __future__ import annotations
 
 from typing import Any
 
-from wampproto.messages import util, Message
+from wampproto.messages import util, decoder, Message
 from wampproto.messages.validation_spec import ValidationSpec
 
 
 class ICancelFields:
+    __slots__ = ()
+
     @property
     def request_id(self):
         raise NotImplementedError()
@@ -17,6 +19,8 @@ class ICancelFields:
 
 
 class CancelFields(ICancelFields):
+    __slots__ = ("_request_id", "_options")
+
     def __init__(self, request_id: int, options: dict[str, Any] | None = None):
         super().__init__()
         self._request_id = request_id
@@ -31,7 +35,9 @@ class CancelFields(ICancelFields):
         return self._options
 
 
-class Cancel(Message):
+class Cancel(Message, CancelFields):
+    __slots__ = ()
+
     TEXT = "CANCEL"
     TYPE = 49
 
@@ -44,23 +50,14 @@ class Cancel(Message):
             2: util.validate_options,
         },
     )
+    DECODER = decoder.compile_decoder(VALIDATION_SPEC, TYPE, CancelFields, ("request_id", "options"))
 
     def __init__(self, fields: ICancelFields):
-        super().__init__()
-        self._fields = fields
-
-    @property
-    def request_id(self) -> int:
-        return self._fields.request_id
-
-    @property
-    def options(self) -> dict[str, Any]:
-        return self._fields.options
+        CancelFields.__init__(self, fields.request_id, fields.options)
 
     @classmethod
     def parse(cls, msg: list[Any]) -> Cancel:
-        f = util.validate_message(msg, cls.TYPE, cls.VALIDATION_SPEC)
-        return Cancel(CancelFields(f.request_id, f.options))
+        return cls.DECODER(msg, cls)
 
     def marshal(self) -> list[Any]:
         return [self.TYPE, self.request_id, self.options]
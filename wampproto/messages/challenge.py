@@ -2,12 +2,14 @@ from __future__ import annotations
 
 from typing import Any
 
-from wampproto.messages import util
+from wampproto.messages import util, decoder
 from wampproto.messages.message import Message
 from wampproto.messages.validation_spec import ValidationSpec
 
 
 class IChallengeFields:
+    __slots__ = ()
+
     @property
     def authmethod(self):
         raise NotImplementedError()
@@ -18,6 +20,8 @@ class IChallengeFields:
 
 
 class ChallengeFields(IChallengeFields):
+    __slots__ = ("_authmethod", "_extra")
+
     def __init__(self, authmethod: str, extra: dict[str, Any] | None = None):
         self._authmethod = authmethod
         self._extra = {} if extra is None else extra
@@ -31,7 +35,9 @@ class ChallengeFields(IChallengeFields):
         return self._extra
 
 
-class Challenge(Message):
+class Challenge(Message, ChallengeFields):
+    __slots__ = ()
+
     TEXT = "CHALLENGE"
     TYPE = 4
 
@@ -44,23 +50,14 @@ class Challenge(Message):
             2: util.validate_extra,
         },
     )
+    DECODER = decoder.compile_decoder(VALIDATION_SPEC, TYPE, ChallengeFields, ("authmethod", "extra"))
 
     def __init__(self, fields: IChallengeFields):
-        super().__init__()
-        self._fields = fields
-
-    @property
-    def authmethod(self) -> str:
-        return self._fields.authmethod
-
-    @property
-    def extra(self) -> dict[str, Any]:
-        return self._fields.extra
+        ChallengeFields.__init__(self, fields.authmethod, fields.extra)
 
     @classmethod
     def parse(cls, msg: list[Any]) -> Challenge:
-        f = util.validate_message(msg, cls.TYPE, cls.VALIDATION_SPEC)
-        return Challenge(ChallengeFields(f.authmethod, f.extra))
+        return cls.DECODER(msg, cls)
 
     def marshal(self) -> list[Any]:
         return [self.TYPE, self.authmethod, self.extra]
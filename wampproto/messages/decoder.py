@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+from wampproto.messages import interning, util
+from wampproto.messages.validation_spec import ValidationSpec
+
+ID = "id"
+ARGS = "args"
+URI = "uri"
+
+# validators that can be inlined into a compiled decoder, mapped to the
+# attribute they populate and the type check they perform.
+INLINE_VALIDATORS: dict[Callable, tuple[str, str]] = {
+    util.validate_request_id: ("request_id", ID),
+    util.validate_session_id: ("session_id", ID),
+    util.validate_subscription_id: ("subscription_id", ID),
+    util.validate_publication_id: ("publication_id", ID),
+    util.validate_registration_id: ("registration_id", ID),
+    util.validate_message_type: ("message_type", util.INT),
+    util.validate_uri: ("uri", URI),
+    util.validate_realm: ("realm", util.STRING),
+    util.validate_authmethod: ("authmethod", util.STRING),
+    util.validate_signature: ("signature", util.STRING),
+    util.validate_reason: ("reason", util.STRING),
+    util.validate_topic: ("topic", URI),
+    util.validate_extra: ("extra", util.DICT),
+    util.validate_options: ("options", util.DICT),
+    util.validate_details: ("details", util.DICT),
+    util.validate_args: ("args", ARGS),
+    util.validate_kwargs: ("kwargs", util.DICT),
+}
+
+# validators that only apply when the message is long enough to contain their index
+OPTIONAL_VALIDATORS = (util.validate_args, util.validate_kwargs)
+
+TYPE_NAMES = {util.INT: "int", util.STRING: "str", util.LIST: "list", util.DICT: "dict"}
+
+
+def _check_expression(var: str, kind: str) -> str:
+    if kind == ID:
+        return f"not isinstance({var}, int) or {var} < {util.MIN_ID} or {var} > {util.MAX_ID}"
+
+    if kind == URI:
+        return f"not isinstance({var}, str)"
+
+    if kind == ARGS:
+        # args may also be the still encoded arguments of a lazily deserialized message
+        return f"not isinstance({var}, (list, _RawArguments))"
+
+    return f"not isinstance({var}, {TYPE_NAMES[kind]})"
+
+
+def compile_decoder(
+    spec: ValidationSpec, type_: int, factory: Callable[..., Any], fields: tuple[str, ...]
+) -> Callable[[list[Any]], Any]:
+    """
+    Build a function that validates a raw message against ``spec`` and returns an
+    instance initialized with ``factory.__init__(obj, *values)`` where values are the
+    decoded ``fields`` in order. The instance is of type ``factory`` by default, a
+    subclass (the message class itself) may be passed as the second argument to get
+    the message without going through an intermediate fields object.
+
+    Validators known to INLINE_VALIDATORS are turned into plain type checks in
+    generated code, others are called as usual. Whenever any check fails the
+    message is re-validated through util.validate_message, so errors are
+    identical to the ones produced by the validation spec. URIs are interned
+    when interning.uri_table is set.
+    """
+
+    init = factory.__init__
+
+    def slow_path(msg: list[Any], cls: type) -> Any:
+        f = util.validate_message(msg, type_, spec)
+        obj = cls.__new__(cls)
+        init(obj, *[getattr(f, name) for name in fields])
+        return obj
+
+    namespace: dict[str, Any] = {
+        "_slow_path": slow_path,
+        "_Fields": util.Fields,
+        "_RawArguments": util.RawArguments,
+        "_factory": factory,
+        "_init": init,
+        "_interning": interning,
+    }
+    lines = [
+        "def decode(msg, cls=_factory):",
+        "    if not isinstance(msg, list):",
+        "        return _slow_path(msg, cls)",
+        "    length = len(msg)",
+        f"    if not {spec.min_length} <= length <= {spec.max_length} or msg[0] != {type_!r}:",
+        "        return _slow_path(msg, cls)",
+    ]
+
+    checks = []
+    inlined = set()
+    uris = []
+    fallback = False
+    for index, func in spec.spec.items():
+        inline = INLINE_VALIDATORS.get(func)
+        if inline is not None and func in OPTIONAL_VALIDATORS:
+            name, kind = inline
+            lines.append(f"    {name} = msg[{index}] if length > {index} else None")
+            checks.append(f"(length > {index} and {_check_expression(name, kind)})")
+            inlined.add(name)
+        elif inline is not None and index < spec.min_length:
+            name, kind = inline
+            lines.append(f"    {name} = msg[{index}]")
+            checks.append(f"({_check_expression(name, kind)})")
+            inlined.add(name)
+            if kind == URI:
+                uris.append(name)
+        else:
+            if not fallback:
+                lines.append("    f = _Fields()")
+                fallback = True
+
+            namespace[f"_validator_{index}"] = func
+            checks.append(f"_validator_{index}(msg, {index}, f, {spec.message!r}) is not None")
+
+    if len(checks) != 0:
+        lines.append("    if " + " or ".join(checks) + ":")
+        lines.append("        return _slow_path(msg, cls)")
+
+    if len(uris) != 0:
+        lines.append("    table = _interning.uri_table")
+        lines.append("    if table is not None:")
+        lines.extend(f"        {name} = table.intern({name})" for name in uris)
+
+    values = []
+    for name in fields:
+        if name in inlined:
+            values.append(name)
+        elif fallback:
+            values.append(f"f.{name}")
+        else:
+            values.append("None")
+
+    lines.append("    obj = cls.__new__(cls)")
+    lines.append(f"    _init(obj, {', '.join(values)})")
+    lines.append("    return obj")
+
+    exec("\n".join(lines), namespace)
+    return namespace["decode"]
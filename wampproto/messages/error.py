@@ -2,12 +2,14 @@ from __future__ import annotations
 
 from typing import Any
 
-from wampproto.messages import util
-from wampproto.messages.message import Message, BinaryPayload
+from wampproto.messages import util, decoder
+from wampproto.messages.message import Message, BinaryPayload, RawArguments
 from wampproto.messages.validation_spec import ValidationSpec
 
 
 class IErrorFields(BinaryPayload):
+    __slots__ = ()
+
     @property
     def message_type(self):
         raise NotImplementedError
@@ -34,23 +36,33 @@ class IErrorFields(BinaryPayload):
 
 
 class ErrorFields(IErrorFields):
+    __slots__ = ("_message_type", "_request_id", "_uri", "_args", "_kwargs", "_details", "_serializer", "_payload")
+
     def __init__(
         self,
         message_type: int,
         request_id: int,
         uri: str,
-        args: list | None = None,
+        args: list | RawArguments | None = None,
         kwargs: dict | None = None,
         details: dict | None = None,
+        serializer: int | None = None,
+        payload: bytes | memoryview | None = None,
     ):
         super().__init__()
         self._message_type = message_type
         self._request_id = request_id
         self._uri = uri
-        self._args = args
         self._kwargs = kwargs
         self._details = {} if details is None else details
 
+        if payload is None and util.PPT_SCHEME not in self._details:
+            self._args, self._serializer, self._payload = args, 0, None
+        else:
+            self._args, self._serializer, self._payload = util.unpack_payload(
+                args, kwargs, self._details, serializer, payload
+            )
+
     @property
     def message_type(self) -> int:
         return self._message_type
@@ -65,10 +77,16 @@ class ErrorFields(IErrorFields):
 
     @property
     def args(self) -> list[Any] | None:
+        if isinstance(self._args, RawArguments):
+            self._args, self._kwargs = self._args.decode()
+
         return self._args
 
     @property
     def kwargs(self) -> dict[str, Any] | None:
+        if isinstance(self._args, RawArguments):
+            self._args, self._kwargs = self._args.decode()
+
         return self._kwargs
 
     @property
@@ -76,18 +94,24 @@ class ErrorFields(IErrorFields):
         return self._details
 
     def payload_is_binary(self) -> bool:
-        return False
+        return self._payload is not None
 
     @property
-    def payload(self) -> bytes | None:
-        return None
+    def payload(self) -> memoryview | None:
+        return self._payload
 
     @property
     def payload_serializer(self) -> int:
-        return 0
+        return self._serializer
 
+    @property
+    def raw_arguments(self) -> RawArguments | None:
+        return self._args if isinstance(self._args, RawArguments) else None
+
+
+class Error(Message, ErrorFields):
+    __slots__ = ()
 
-class Error(Message):
     TEXT = "ERROR"
     TYPE = 8
 
@@ -104,53 +128,39 @@ class Error(Message):
             6: util.validate_kwargs,
         },
     )
+    DECODER = decoder.compile_decoder(
+        VALIDATION_SPEC, TYPE, ErrorFields, ("message_type", "request_id", "uri", "args", "kwargs", "details")
+    )
 
     def __init__(self, fields: IErrorFields):
-        super().__init__()
-        self._fields = fields
-
-    @property
-    def message_type(self) -> int:
-        return self._fields.message_type
-
-    @property
-    def request_id(self) -> int:
-        return self._fields.request_id
-
-    @property
-    def uri(self) -> str:
-        return self._fields.uri
-
-    @property
-    def args(self) -> list[Any] | None:
-        return self._fields.args
-
-    @property
-    def kwargs(self) -> dict[str, Any] | None:
-        return self._fields.kwargs
-
-    @property
-    def details(self) -> dict[str, Any]:
-        return self._fields.details
-
-    def payload_is_binary(self) -> bool:
-        return self._fields.payload_is_binary()
-
-    @property
-    def payload(self) -> bytes | None:
-        return self._fields.payload
-
-    @property
-    def payload_serializer(self) -> int:
-        return self._fields.payload_serializer
+        args, kwargs = util.arguments(fields)
+        ErrorFields.__init__(
+            self,
+            fields.message_type,
+            fields.request_id,
+            fields.uri,
+            args,
+            kwargs,
+            fields.details,
+            fields.payload_serializer,
+            fields.payload,
+        )
 
     @classmethod
     def parse(cls, msg: list[Any]) -> Error:
-        f = util.validate_message(msg, cls.TYPE, cls.VALIDATION_SPEC)
-        return Error(ErrorFields(f.message_type, f.request_id, f.uri, f.args, f.kwargs, f.details))
+        return cls.DECODER(msg, cls)
 
     def marshal(self) -> list[Any]:
         message = [self.TYPE, self.message_type, self.request_id, self.details, self.uri]
+        if self.payload is not None:
+            message.append([self.payload])
+            return message
+
+        if isinstance(self._args, RawArguments):
+            # still encoded arguments, spliced back in by the serializer
+            message.append(self._args)
+            return message
+
         if self.args is not None:
             message.append(self.args)
 
@@ -161,14 +171,3 @@ class Error(Message):
             message.append(self.kwargs)
 
         return message
-
-    def __str__(self) -> str:
-        error = self.uri
-        if self.args is not None:
-            args = ", ".join(str(arg) for arg in self.args)
-            error += f": {args}"
-        if self.kwargs is not None:
-            kwargs = ", ".join(f"{key}={value}" for key, value in self.kwargs.items())
-            error += f": {kwargs}"
-
-        return error
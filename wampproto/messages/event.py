@@ -2,12 +2,14 @@ from __future__ import annotations
 
 from typing import Any
 
-from wampproto.messages import util
-from wampproto.messages.message import Message, BinaryPayload
+from wampproto.messages import util, decoder
+from wampproto.messages.message import Message, BinaryPayload, RawArguments
 from wampproto.messages.validation_spec import ValidationSpec
 
 
 class IEventFields(BinaryPayload):
+    __slots__ = ()
+
     @property
     def subscription_id(self):
         raise NotImplementedError
@@ -30,21 +32,31 @@ class IEventFields(BinaryPayload):
 
 
 class EventFields(IEventFields):
+    __slots__ = ("_subscription_id", "_publication_id", "_args", "_kwargs", "_details", "_serializer", "_payload")
+
     def __init__(
         self,
         subscription_id: int,
         publication_id: int,
-        args: list | None = None,
+        args: list | RawArguments | None = None,
         kwargs: dict[str, Any] | None = None,
         details: dict[str, Any] | None = None,
+        serializer: int | None = None,
+        payload: bytes | memoryview | None = None,
     ):
         super().__init__()
         self._subscription_id = subscription_id
         self._publication_id = publication_id
-        self._args = args
         self._kwargs = kwargs
         self._details = {} if details is None else details
 
+        if payload is None and util.PPT_SCHEME not in self._details:
+            self._args, self._serializer, self._payload = args, 0, None
+        else:
+            self._args, self._serializer, self._payload = util.unpack_payload(
+                args, kwargs, self._details, serializer, payload
+            )
+
     @property
     def subscription_id(self) -> int:
         return self._subscription_id
@@ -55,10 +67,16 @@ class EventFields(IEventFields):
 
     @property
     def args(self) -> list[Any] | None:
+        if isinstance(self._args, RawArguments):
+            self._args, self._kwargs = self._args.decode()
+
         return self._args
 
     @property
     def kwargs(self) -> dict[str, Any] | None:
+        if isinstance(self._args, RawArguments):
+            self._args, self._kwargs = self._args.decode()
+
         return self._kwargs
 
     @property
@@ -66,18 +84,24 @@ class EventFields(IEventFields):
         return self._details
 
     def payload_is_binary(self) -> bool:
-        return False
+        return self._payload is not None
 
     @property
-    def payload(self) -> bytes | None:
-        return None
+    def payload(self) -> memoryview | None:
+        return self._payload
 
     @property
     def payload_serializer(self) -> int:
-        return 0
+        return self._serializer
+
+    @property
+    def raw_arguments(self) -> RawArguments | None:
+        return self._args if isinstance(self._args, RawArguments) else None
 
 
-class Event(Message):
+class Event(Message, EventFields):
+    __slots__ = ()
+
     TEXT = "EVENT"
     TYPE = 36
 
@@ -93,49 +117,38 @@ class Event(Message):
             5: util.validate_kwargs,
         },
     )
+    DECODER = decoder.compile_decoder(
+        VALIDATION_SPEC, TYPE, EventFields, ("subscription_id", "publication_id", "args", "kwargs", "details")
+    )
 
     def __init__(self, fields: IEventFields):
-        super().__init__()
-        self._fields = fields
-
-    @property
-    def subscription_id(self) -> int:
-        return self._fields.subscription_id
-
-    @property
-    def publication_id(self) -> int:
-        return self._fields.publication_id
-
-    @property
-    def args(self) -> list[Any] | None:
-        return self._fields.args
-
-    @property
-    def kwargs(self) -> dict[str, Any] | None:
-        return self._fields.kwargs
-
-    @property
-    def details(self) -> dict[str, Any]:
-        return self._fields.details
-
-    def payload_is_binary(self) -> bool:
-        return self._fields.payload_is_binary()
-
-    @property
-    def payload(self) -> bytes | None:
-        return self._fields.payload
-
-    @property
-    def payload_serializer(self) -> int:
-        return self._fields.payload_serializer
+        args, kwargs = util.arguments(fields)
+        EventFields.__init__(
+            self,
+            fields.subscription_id,
+            fields.publication_id,
+            args,
+            kwargs,
+            fields.details,
+            fields.payload_serializer,
+            fields.payload,
+        )
 
     @classmethod
     def parse(cls, msg: list[Any]) -> Event:
-        f = util.validate_message(msg, cls.TYPE, cls.VALIDATION_SPEC)
-        return Event(EventFields(f.subscription_id, f.publication_id, f.args, f.kwargs, f.details))
+        return cls.DECODER(msg, cls)
 
     def marshal(self) -> list[Any]:
         message = [self.TYPE, self.subscription_id, self.publication_id, self.details]
+        if self.payload is not None:
+            message.append([self.payload])
+            return message
+
+        if isinstance(self._args, RawArguments):
+            # still encoded arguments, spliced back in by the serializer
+            message.append(self._args)
+            return message
+
         if self.args is not None:
             message.append(self.args)
 
@@ -146,3 +159,23 @@ class Event(Message):
             message.append(self.kwargs)
 
         return message
+
+    def marshal_fast(self) -> tuple[Any, ...] | None:
+        args = self._args
+        if self._payload is not None or isinstance(args, RawArguments):
+            return None
+
+        if self._kwargs is not None:
+            return (
+                self.TYPE,
+                self._subscription_id,
+                self._publication_id,
+                self._details,
+                [] if args is None else args,
+                self._kwargs,
+            )
+
+        if args is not None:
+            return self.TYPE, self._subscription_id, self._publication_id, self._details, args
+
+        return self.TYPE, self._subscription_id, self._publication_id, self._details
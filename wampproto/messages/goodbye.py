@@ -2,12 +2,14 @@ from __future__ import annotations
 
 from typing import Any
 
-from wampproto.messages import util
+from wampproto.messages import util, decoder
 from wampproto.messages.message import Message
 from wampproto.messages.validation_spec import ValidationSpec
 
 
 class IGoodbyeFields:
+    __slots__ = ()
+
     @property
     def details(self):
         raise NotImplementedError
@@ -18,6 +20,8 @@ class IGoodbyeFields:
 
 
 class GoodbyeFields(IGoodbyeFields):
+    __slots__ = ("_details", "_reason")
+
     def __init__(self, details: dict[str, Any], reason: str):
         self._details = details
         self._reason = reason
@@ -31,7 +35,9 @@ class GoodbyeFields(IGoodbyeFields):
         return self._reason
 
 
-class Goodbye(Message):
+class Goodbye(Message, GoodbyeFields):
+    __slots__ = ()
+
     TEXT = "GOODBYE"
     TYPE = 6
 
@@ -44,23 +50,14 @@ class Goodbye(Message):
             2: util.validate_reason,
         },
     )
+    DECODER = decoder.compile_decoder(VALIDATION_SPEC, TYPE, GoodbyeFields, ("details", "reason"))
 
     def __init__(self, fields: IGoodbyeFields):
-        super().__init__()
-        self._fields = fields
-
-    @property
-    def details(self) -> dict[str, Any]:
-        return self._fields.details
-
-    @property
-    def reason(self) -> str:
-        return self._fields.reason
+        GoodbyeFields.__init__(self, fields.details, fields.reason)
 
     @classmethod
     def parse(cls, msg: list[Any]) -> Goodbye:
-        f = util.validate_message(msg, cls.TYPE, cls.VALIDATION_SPEC)
-        return Goodbye(GoodbyeFields(f.details, f.reason))
+        return cls.DECODER(msg, cls)
 
     def marshal(self) -> list[Any]:
         return [self.TYPE, self.details, self.reason]
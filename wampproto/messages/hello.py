@@ -2,12 +2,14 @@ from __future__ import annotations
 
 from typing import Any
 
-from wampproto.messages import util
+from wampproto.messages import util, decoder
 from wampproto.messages.message import Message
 from wampproto.messages.validation_spec import ValidationSpec
 
 
 class IHelloFields:
+    __slots__ = ()
+
     @property
     def realm(self) -> str:
         raise NotImplementedError()
@@ -30,6 +32,8 @@ class IHelloFields:
 
 
 class HelloFields(IHelloFields):
+    __slots__ = ("_realm", "_roles", "_authid", "_authmethods", "_authextra")
+
     def __init__(
         self,
         realm: str,
@@ -66,7 +70,9 @@ class HelloFields(IHelloFields):
         return self._authextra
 
 
-class Hello(Message):
+class Hello(Message, HelloFields):
+    __slots__ = ()
+
     TEXT = "HELLO"
     TYPE = 1
 
@@ -79,43 +85,16 @@ class Hello(Message):
             2: util.validate_hello_details,
         },
     )
+    DECODER = decoder.compile_decoder(
+        VALIDATION_SPEC, TYPE, HelloFields, ("realm", "roles", "authid", "authmethods", "authextra")
+    )
 
     def __init__(self, fields: IHelloFields):
-        super().__init__()
-        self._fields = fields
-
-    @property
-    def realm(self) -> str:
-        return self._fields.realm
-
-    @property
-    def roles(self) -> dict[str, Any]:
-        return self._fields.roles
-
-    @property
-    def authid(self) -> str:
-        return self._fields.authid
-
-    @property
-    def authmethods(self) -> list[str]:
-        return self._fields.authmethods
-
-    @property
-    def authextra(self) -> dict:
-        return self._fields.authextra
+        HelloFields.__init__(self, fields.realm, fields.roles, fields.authid, fields.authmethods, fields.authextra)
 
     @classmethod
     def parse(cls, msg: list[Any]) -> Hello:
-        f = util.validate_message(msg, cls.TYPE, cls.VALIDATION_SPEC)
-        return Hello(
-            HelloFields(
-                realm=f.realm,
-                roles=f.roles,
-                authid=f.authid,
-                authmethods=f.authmethods,
-                authextra=f.authextra,
-            )
-        )
+        return cls.DECODER(msg, cls)
 
     def marshal(self) -> list[Any]:
         details: dict[str, Any] = {"roles": self.roles}
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+# what a full table does with a URI it doesn't hold yet
+EVICT_LRU = "lru"
+EVICT_FIFO = "fifo"
+EVICT_NONE = "none"
+
+EVICTION_POLICIES = (EVICT_LRU, EVICT_FIFO, EVICT_NONE)
+
+DEFAULT_MAX_SIZE = 4096
+
+
+class URITable:
+    """
+    Bounded table of URIs. Interning a URI returns the instance held by the table
+    for equal strings, so the URIs of parsed messages share one object whose hash
+    is already computed and compare by identity when used as dictionary keys.
+
+    When the table is full, EVICT_FIFO drops the oldest URI, EVICT_LRU the least
+    recently used one, and EVICT_NONE doesn't add new URIs anymore. LRU keeps hot
+    URIs best but reorders the table on every hit, which costs about as much as
+    interning saves, so it only pays off with a table much smaller than the set
+    of URIs in use.
+    """
+
+    __slots__ = ("_uris", "_max_size", "_eviction", "_hits", "_misses")
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, eviction: str = EVICT_FIFO):
+        if max_size < 1:
+            raise ValueError("max size of the URI table must be at least 1")
+
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError(f"invalid eviction policy '{eviction}', must be one of {', '.join(EVICTION_POLICIES)}")
+
+        # insertion ordered, the first URI is the next to evict
+        self._uris: dict[str, str] = {}
+        self._max_size = max_size
+        self._eviction = eviction
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self) -> int:
+        return len(self._uris)
+
+    def __contains__(self, uri: str) -> bool:
+        return uri in self._uris
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def eviction(self) -> str:
+        return self._eviction
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def intern(self, uri: str) -> str:
+        uris = self._uris
+        interned = uris.get(uri)
+        if interned is not None:
+            self._hits += 1
+            if self._eviction == EVICT_LRU:
+                del uris[interned]
+                uris[interned] = interned
+
+            return interned
+
+        self._misses += 1
+        if len(uris) >= self._max_size:
+            if self._eviction == EVICT_NONE:
+                return uri
+
+            del uris[next(iter(uris))]
+
+        uris[uri] = uri
+        return uri
+
+    def clear(self) -> None:
+        self._uris.clear()
+        self._hits = 0
+        self._misses = 0
+
+
+# the table URIs of parsed messages are interned in, None when interning is disabled
+uri_table: URITable | None = None
+
+
+def enable_uri_interning(max_size: int = DEFAULT_MAX_SIZE, eviction: str = EVICT_FIFO) -> URITable:
+    """intern the URIs of the messages parsed from now on, and return the table holding them"""
+    global uri_table
+    uri_table = URITable(max_size, eviction)
+    return uri_table
+
+
+def disable_uri_interning() -> None:
+    global uri_table
+    uri_table = None
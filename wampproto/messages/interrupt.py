@@ -2,11 +2,13 @@ from __future__ import annotations
 
 from typing import Any
 
-from wampproto.messages import util, Message
+from wampproto.messages import util, decoder, Message
 from wampproto.messages.validation_spec import ValidationSpec
 
 
 class IInterruptFields:
+    __slots__ = ()
+
     @property
     def request_id(self):
         raise NotImplementedError
@@ -17,6 +19,8 @@ class IInterruptFields:
 
 
 class InterruptFields(IInterruptFields):
+    __slots__ = ("_request_id", "_options")
+
     def __init__(self, request_id: int, options: dict[str, Any] | None = None):
         self._request_id = request_id
         self._options = {} if options is None else options
@@ -30,7 +34,9 @@ class InterruptFields(IInterruptFields):
         return self._options
 
 
-class Interrupt(Message):
+class Interrupt(Message, InterruptFields):
+    __slots__ = ()
+
     TEXT = "INTERRUPT"
     TYPE = 69
 
@@ -43,23 +49,14 @@ class Interrupt(Message):
             2: util.validate_options,
         },
     )
+    DECODER = decoder.compile_decoder(VALIDATION_SPEC, TYPE, InterruptFields, ("request_id", "options"))
 
     def __init__(self, fields: IInterruptFields):
-        super().__init__()
-        self._fields = fields
-
-    @property
-    def request_id(self) -> int:
-        return self._fields.request_id
-
-    @property
-    def options(self) -> dict[str, Any]:
-        return self._fields.options
+        InterruptFields.__init__(self, fields.request_id, fields.options)
 
     @classmethod
     def parse(cls, msg: list[Any]) -> Interrupt:
-        f = util.validate_message(msg, cls.TYPE, cls.VALIDATION_SPEC)
-        return Interrupt(InterruptFields(f.request_id, f.options))
+        return cls.DECODER(msg, cls)
 
     def marshal(self) -> list[Any]:
         return [self.TYPE, self.request_id, self.options]
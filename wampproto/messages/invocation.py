@@ -2,12 +2,14 @@ from __future__ import annotations
 
 from typing import Any
 
-from wampproto.messages import util
-from wampproto.messages.message import Message, BinaryPayload
+from wampproto.messages import util, decoder
+from wampproto.messages.message import Message, BinaryPayload, RawArguments
 from wampproto.messages.validation_spec import ValidationSpec
 
 
 class IInvocationFields(BinaryPayload):
+    __slots__ = ()
+
     @property
     def request_id(self):
         raise NotImplementedError
@@ -30,25 +32,30 @@ class IInvocationFields(BinaryPayload):
 
 
 class InvocationFields(IInvocationFields):
+    __slots__ = ("_request_id", "_registration_id", "_args", "_kwargs", "_details", "_serializer", "_payload")
+
     def __init__(
         self,
         request_id: int,
         registration_id: int,
-        args: list | None = None,
+        args: list | RawArguments | None = None,
         kwargs: dict | None = None,
         details: dict | None = None,
         serializer: int | None = None,
-        payload: bytes | None = None,
+        payload: bytes | memoryview | None = None,
     ):
         super().__init__()
         self._request_id = request_id
         self._registration_id = registration_id
-        self._args = args
         self._kwargs = kwargs
         self._details = {} if details is None else details
 
-        self._serializer = serializer
-        self._payload = payload
+        if payload is None and util.PPT_SCHEME not in self._details:
+            self._args, self._serializer, self._payload = args, 0, None
+        else:
+            self._args, self._serializer, self._payload = util.unpack_payload(
+                args, kwargs, self._details, serializer, payload
+            )
 
     @property
     def request_id(self) -> int:
@@ -60,10 +67,16 @@ class InvocationFields(IInvocationFields):
 
     @property
     def args(self) -> list | None:
+        if isinstance(self._args, RawArguments):
+            self._args, self._kwargs = self._args.decode()
+
         return self._args
 
     @property
     def kwargs(self) -> dict[str, Any] | None:
+        if isinstance(self._args, RawArguments):
+            self._args, self._kwargs = self._args.decode()
+
         return self._kwargs
 
     @property
@@ -71,18 +84,24 @@ class InvocationFields(IInvocationFields):
         return self._details
 
     def payload_is_binary(self) -> bool:
-        return self._serializer != 0
+        return self._payload is not None
 
     @property
-    def payload(self) -> bytes | None:
+    def payload(self) -> memoryview | None:
         return self._payload
 
     @property
     def payload_serializer(self) -> int:
         return self._serializer
 
+    @property
+    def raw_arguments(self) -> RawArguments | None:
+        return self._args if isinstance(self._args, RawArguments) else None
+
+
+class Invocation(Message, InvocationFields):
+    __slots__ = ()
 
-class Invocation(Message):
     TEXT = "INVOCATION"
     TYPE = 68
 
@@ -98,49 +117,38 @@ class Invocation(Message):
             5: util.validate_kwargs,
         },
     )
+    DECODER = decoder.compile_decoder(
+        VALIDATION_SPEC, TYPE, InvocationFields, ("request_id", "registration_id", "args", "kwargs", "details")
+    )
 
     def __init__(self, fields: IInvocationFields):
-        super().__init__()
-        self._fields = fields
-
-    @property
-    def request_id(self) -> int:
-        return self._fields.request_id
-
-    @property
-    def registration_id(self) -> int:
-        return self._fields.registration_id
-
-    @property
-    def args(self) -> list | None:
-        return self._fields.args
-
-    @property
-    def kwargs(self) -> dict[str, Any] | None:
-        return self._fields.kwargs
-
-    @property
-    def details(self) -> dict[str, Any]:
-        return self._fields.details
-
-    def payload_is_binary(self) -> bool:
-        return self._fields.payload_is_binary()
-
-    @property
-    def payload(self) -> bytes | None:
-        return self._fields.payload
-
-    @property
-    def payload_serializer(self) -> int:
-        return self._fields.payload_serializer
+        args, kwargs = util.arguments(fields)
+        InvocationFields.__init__(
+            self,
+            fields.request_id,
+            fields.registration_id,
+            args,
+            kwargs,
+            fields.details,
+            fields.payload_serializer,
+            fields.payload,
+        )
 
     @classmethod
     def parse(cls, msg: list[Any]) -> Invocation:
-        f = util.validate_message(msg, cls.TYPE, cls.VALIDATION_SPEC)
-        return Invocation(InvocationFields(f.request_id, f.registration_id, f.args, f.kwargs, f.details))
+        return cls.DECODER(msg, cls)
 
     def marshal(self) -> list[Any]:
         message = [self.TYPE, self.request_id, self.registration_id, self.details]
+        if self.payload is not None:
+            message.append([self.payload])
+            return message
+
+        if isinstance(self._args, RawArguments):
+            # still encoded arguments, spliced back in by the serializer
+            message.append(self._args)
+            return message
+
         if self.args is not None:
             message.append(self.args)
 
@@ -151,3 +159,23 @@ class Invocation(Message):
             message.append(self.kwargs)
 
         return message
+
+    def marshal_fast(self) -> tuple[Any, ...] | None:
+        args = self._args
+        if self._payload is not None or isinstance(args, RawArguments):
+            return None
+
+        if self._kwargs is not None:
+            return (
+                self.TYPE,
+                self._request_id,
+                self._registration_id,
+                self._details,
+                [] if args is None else args,
+                self._kwargs,
+            )
+
+        if args is not None:
+            return self.TYPE, self._request_id, self._registration_id, self._details, args
+
+        return self.TYPE, self._request_id, self._registration_id, self._details
@@ -4,6 +4,8 @@ from typing import Any
 
 
 class Message:
+    __slots__ = ()
+
     TYPE = None
     TEXT = None
 
@@ -14,15 +16,57 @@ class Message:
     def marshal(self) -> list[Any]:
         raise NotImplementedError()
 
+    def marshal_fast(self) -> tuple[Any, ...] | None:
+        """
+        Return the same elements as marshal, read straight from the fields of the message,
+        for the serializers to encode without building a list. Only frequent messages
+        implement it, None means marshal must be used.
+        """
+        return None
+
 
 class BinaryPayload:
+    __slots__ = ()
+
     def payload_is_binary(self) -> bool:
         raise NotImplementedError()
 
     @property
-    def payload(self) -> bytes | None:
+    def payload(self) -> memoryview | None:
         raise NotImplementedError()
 
     @property
     def payload_serializer(self) -> int:
         raise NotImplementedError()
+
+    @property
+    def raw_arguments(self) -> RawArguments | None:
+        return None
+
+
+class RawArguments:
+    """
+    The still encoded args and kwargs of a message deserialized in lazy mode. They
+    are decoded on first access of args or kwargs, or written back unchanged when
+    the message is serialized again by the same type of serializer.
+    """
+
+    __slots__ = ("serializer", "data", "count")
+
+    def __init__(self, serializer: Any, data: bytes | memoryview | str, count: int | None = None):
+        self.serializer = serializer
+        self.data = data
+        # number of encoded elements, if known without decoding them
+        self.count = count
+
+    def values(self) -> list[Any]:
+        return self.serializer.decode_items(self.data, self.count)
+
+    def decode(self) -> tuple[list[Any] | None, dict[str, Any] | None]:
+        values = self.values()
+        args = values[0] if len(values) > 0 else None
+        kwargs = values[1] if len(values) > 1 else None
+        if len(values) > 2 or not isinstance(args, list) or (kwargs is not None and not isinstance(kwargs, dict)):
+            raise ValueError("lazily decoded arguments must be a list of args optionally followed by a dict of kwargs")
+
+        return args, kwargs
@@ -2,12 +2,14 @@ from __future__ import annotations
 
 from typing import Any
 
-from wampproto.messages.message import Message, BinaryPayload
-from wampproto.messages import util
+from wampproto.messages.message import Message, BinaryPayload, RawArguments
+from wampproto.messages import util, decoder
 from wampproto.messages.validation_spec import ValidationSpec
 
 
 class IPublishFields(BinaryPayload):
+    __slots__ = ()
+
     @property
     def request_id(self):
         raise NotImplementedError
@@ -30,21 +32,31 @@ class IPublishFields(BinaryPayload):
 
 
 class PublishFields(IPublishFields):
+    __slots__ = ("_request_id", "_uri", "_args", "_kwargs", "_options", "_serializer", "_payload")
+
     def __init__(
         self,
         request_id: int,
         uri: str,
-        args: list | None = None,
+        args: list | RawArguments | None = None,
         kwargs: dict | None = None,
         options: dict | None = None,
+        serializer: int | None = None,
+        payload: bytes | memoryview | None = None,
     ):
         super().__init__()
         self._request_id = request_id
         self._uri = uri
-        self._args = args
         self._kwargs = kwargs
         self._options = {} if options is None else options
 
+        if payload is None and util.PPT_SCHEME not in self._options:
+            self._args, self._serializer, self._payload = args, 0, None
+        else:
+            self._args, self._serializer, self._payload = util.unpack_payload(
+                args, kwargs, self._options, serializer, payload
+            )
+
     @property
     def request_id(self) -> int:
         return self._request_id
@@ -55,10 +67,16 @@ class PublishFields(IPublishFields):
 
     @property
     def args(self) -> list[Any] | None:
+        if isinstance(self._args, RawArguments):
+            self._args, self._kwargs = self._args.decode()
+
         return self._args
 
     @property
     def kwargs(self) -> dict[str, Any] | None:
+        if isinstance(self._args, RawArguments):
+            self._args, self._kwargs = self._args.decode()
+
         return self._kwargs
 
     @property
@@ -66,18 +84,24 @@ class PublishFields(IPublishFields):
         return self._options
 
     def payload_is_binary(self) -> bool:
-        return False
+        return self._payload is not None
 
     @property
-    def payload(self) -> bytes | None:
-        return None
+    def payload(self) -> memoryview | None:
+        return self._payload
 
     @property
     def payload_serializer(self) -> int:
-        return 0
+        return self._serializer
+
+    @property
+    def raw_arguments(self) -> RawArguments | None:
+        return self._args if isinstance(self._args, RawArguments) else None
 
 
-class Publish(Message):
+class Publish(Message, PublishFields):
+    __slots__ = ()
+
     TEXT = "PUBLISH"
     TYPE = 16
 
@@ -93,49 +117,38 @@ class Publish(Message):
             5: util.validate_kwargs,
         },
     )
+    DECODER = decoder.compile_decoder(
+        VALIDATION_SPEC, TYPE, PublishFields, ("request_id", "uri", "args", "kwargs", "options")
+    )
 
     def __init__(self, fields: IPublishFields):
-        super().__init__()
-        self._fields = fields
-
-    @property
-    def request_id(self) -> int:
-        return self._fields.request_id
-
-    @property
-    def uri(self) -> str:
-        return self._fields.uri
-
-    @property
-    def args(self) -> list[Any] | None:
-        return self._fields.args
-
-    @property
-    def kwargs(self) -> dict[str, Any] | None:
-        return self._fields.kwargs
-
-    @property
-    def options(self) -> dict[str, Any]:
-        return self._fields.options
-
-    def payload_is_binary(self) -> bool:
-        return self._fields.payload_is_binary()
-
-    @property
-    def payload(self) -> bytes | None:
-        return self._fields.payload
-
-    @property
-    def payload_serializer(self) -> int:
-        return self._fields.payload_serializer
+        args, kwargs = util.arguments(fields)
+        PublishFields.__init__(
+            self,
+            fields.request_id,
+            fields.uri,
+            args,
+            kwargs,
+            fields.options,
+            fields.payload_serializer,
+            fields.payload,
+        )
 
     @classmethod
     def parse(cls, msg: list[Any]) -> Publish:
-        f = util.validate_message(msg, cls.TYPE, cls.VALIDATION_SPEC)
-        return Publish(PublishFields(f.request_id, f.uri, f.args, f.kwargs, f.options))
+        return cls.DECODER(msg, cls)
 
     def marshal(self) -> list[Any]:
         message = [self.TYPE, self.request_id, self.options, self.uri]
+        if self.payload is not None:
+            message.append([self.payload])
+            return message
+
+        if isinstance(self._args, RawArguments):
+            # still encoded arguments, spliced back in by the serializer
+            message.append(self._args)
+            return message
+
         if self.args is not None:
             message.append(self.args)
 
@@ -3,11 +3,13 @@ from __future__ import annotations
 from typing import Any
 
 from wampproto.messages.message import Message
-from wampproto.messages import util
+from wampproto.messages import util, decoder
 from wampproto.messages.validation_spec import ValidationSpec
 
 
 class IPublishedFields:
+    __slots__ = ()
+
     @property
     def request_id(self):
         raise NotImplementedError
@@ -18,6 +20,8 @@ class IPublishedFields:
 
 
 class PublishedFields(IPublishedFields):
+    __slots__ = ("_request_id", "_publication_id")
+
     def __init__(self, request_id: int, publication_id: int):
         self._request_id = request_id
         self._publication_id = publication_id
@@ -31,7 +35,9 @@ class PublishedFields(IPublishedFields):
         return self._publication_id
 
 
-class Published(Message):
+class Published(Message, PublishedFields):
+    __slots__ = ()
+
     TEXT = "PUBLISHED"
     TYPE = 17
 
@@ -44,23 +50,14 @@ class Published(Message):
             2: util.validate_publication_id,
         },
     )
+    DECODER = decoder.compile_decoder(VALIDATION_SPEC, TYPE, PublishedFields, ("request_id", "publication_id"))
 
     def __init__(self, fields: IPublishedFields):
-        super().__init__()
-        self._fields = fields
-
-    @property
-    def request_id(self) -> int:
-        return self._fields.request_id
-
-    @property
-    def publication_id(self) -> int:
-        return self._fields.publication_id
+        PublishedFields.__init__(self, fields.request_id, fields.publication_id)
 
     @classmethod
     def parse(cls, msg: list[Any]) -> Published:
-        f = util.validate_message(msg, cls.TYPE, cls.VALIDATION_SPEC)
-        return Published(PublishedFields(f.request_id, f.publication_id))
+        return cls.DECODER(msg, cls)
 
     def marshal(self) -> list[Any]:
         return [self.TYPE, self.request_id, self.publication_id]
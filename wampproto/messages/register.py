@@ -3,11 +3,13 @@ from __future__ import annotations
 from typing import Any
 
 from wampproto.messages.message import Message
-from wampproto.messages import util
+from wampproto.messages import util, decoder
 from wampproto.messages.validation_spec import ValidationSpec
 
 
 class IRegisterFields:
+    __slots__ = ()
+
     @property
     def request_id(self):
         raise NotImplementedError
@@ -22,6 +24,8 @@ class IRegisterFields:
 
 
 class RegisterFields(IRegisterFields):
+    __slots__ = ("_request_id", "_uri", "_options")
+
     def __init__(self, request_id: int, uri: str, options: dict[str, Any] | None = None):
         self._request_id = request_id
         self._uri = uri
@@ -40,7 +44,9 @@ class RegisterFields(IRegisterFields):
         return self._options
 
 
-class Register(Message):
+class Register(Message, RegisterFields):
+    __slots__ = ()
+
     TEXT = "REGISTER"
     TYPE = 64
 
@@ -54,27 +60,14 @@ class Register(Message):
             3: util.validate_uri,
         },
     )
+    DECODER = decoder.compile_decoder(VALIDATION_SPEC, TYPE, RegisterFields, ("request_id", "uri", "options"))
 
     def __init__(self, fields: IRegisterFields):
-        super().__init__()
-        self._fields = fields
-
-    @property
-    def request_id(self) -> int:
-        return self._fields.request_id
-
-    @property
-    def uri(self) -> str:
-        return self._fields.uri
-
-    @property
-    def options(self) -> dict[str, Any]:
-        return self._fields.options
+        RegisterFields.__init__(self, fields.request_id, fields.uri, fields.options)
 
     @classmethod
     def parse(cls, msg: list[Any]) -> Register:
-        f = util.validate_message(msg, cls.TYPE, cls.VALIDATION_SPEC)
-        return Register(RegisterFields(f.request_id, f.uri, f.options))
+        return cls.DECODER(msg, cls)
 
     def marshal(self) -> list[Any]:
         return [self.TYPE, self.request_id, self.options, self.uri]
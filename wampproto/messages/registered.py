@@ -3,11 +3,13 @@ from __future__ import annotations
 from typing import Any
 
 from wampproto.messages.message import Message
-from wampproto.messages import util
+from wampproto.messages import util, decoder
 from wampproto.messages.validation_spec import ValidationSpec
 
 
 class IRegisteredFields:
+    __slots__ = ()
+
     @property
     def request_id(self):
         raise NotImplementedError
@@ -18,6 +20,8 @@ class IRegisteredFields:
 
 
 class RegisteredFields(IRegisteredFields):
+    __slots__ = ("_request_id", "_registration_id")
+
     def __init__(self, request_id: int, registration_id: int):
         super().__init__()
         self._request_id = request_id
@@ -32,7 +36,9 @@ class RegisteredFields(IRegisteredFields):
         return self._registration_id
 
 
-class Registered(Message):
+class Registered(Message, RegisteredFields):
+    __slots__ = ()
+
     TEXT = "REGISTERED"
     TYPE = 65
 
@@ -45,23 +51,14 @@ class Registered(Message):
             2: util.validate_registration_id,
         },
     )
+    DECODER = decoder.compile_decoder(VALIDATION_SPEC, TYPE, RegisteredFields, ("request_id", "registration_id"))
 
     def __init__(self, fields: IRegisteredFields):
-        super().__init__()
-        self._fields = fields
-
-    @property
-    def request_id(self) -> int:
-        return self._fields.request_id
-
-    @property
-    def registration_id(self) -> int:
-        return self._fields.registration_id
+        RegisteredFields.__init__(self, fields.request_id, fields.registration_id)
 
     @classmethod
     def parse(cls, msg: list[Any]) -> Registered:
-        f = util.validate_message(msg, cls.TYPE, cls.VALIDATION_SPEC)
-        return Registered(RegisteredFields(f.request_id, f.registration_id))
+        return cls.DECODER(msg, cls)
 
     def marshal(self) -> list[Any]:
         return [self.TYPE, self.request_id, self.registration_id]
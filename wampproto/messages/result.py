@@ -2,12 +2,14 @@ from __future__ import annotations
 
 from typing import Any
 
-from wampproto.messages import util
-from wampproto.messages.message import Message, BinaryPayload
+from wampproto.messages import util, decoder
+from wampproto.messages.message import Message, BinaryPayload, RawArguments
 from wampproto.messages.validation_spec import ValidationSpec
 
 
 class IResultFields(BinaryPayload):
+    __slots__ = ()
+
     @property
     def request_id(self):
         raise NotImplementedError
@@ -26,23 +28,28 @@ class IResultFields(BinaryPayload):
 
 
 class ResultFields(IResultFields):
+    __slots__ = ("_request_id", "_args", "_kwargs", "_options", "_serializer", "_payload")
+
     def __init__(
         self,
         request_id: int,
-        args: list | None = None,
+        args: list | RawArguments | None = None,
         kwargs: dict | None = None,
         options: dict | None = None,
-        payload: bytes | None = None,
+        payload: bytes | memoryview | None = None,
         serializer: int | None = None,
     ):
         super().__init__()
         self._request_id = request_id
-        self._args = args
         self._kwargs = kwargs
         self._options = {} if options is None else options
 
-        self._serializer = serializer
-        self._payload = payload
+        if payload is None and util.PPT_SCHEME not in self._options:
+            self._args, self._serializer, self._payload = args, 0, None
+        else:
+            self._args, self._serializer, self._payload = util.unpack_payload(
+                args, kwargs, self._options, serializer, payload
+            )
 
     @property
     def request_id(self) -> int:
@@ -54,25 +61,37 @@ class ResultFields(IResultFields):
 
     @property
     def args(self) -> list[Any] | None:
+        if isinstance(self._args, RawArguments):
+            self._args, self._kwargs = self._args.decode()
+
         return self._args
 
     @property
     def kwargs(self) -> dict[str, Any] | None:
+        if isinstance(self._args, RawArguments):
+            self._args, self._kwargs = self._args.decode()
+
         return self._kwargs
 
     def payload_is_binary(self) -> bool:
-        return self._serializer != 0
+        return self._payload is not None
 
     @property
-    def payload(self) -> bytes | None:
+    def payload(self) -> memoryview | None:
         return self._payload
 
     @property
     def payload_serializer(self) -> int:
         return self._serializer
 
+    @property
+    def raw_arguments(self) -> RawArguments | None:
+        return self._args if isinstance(self._args, RawArguments) else None
+
+
+class Result(Message, ResultFields):
+    __slots__ = ()
 
-class Result(Message):
     TEXT = "RESULT"
     TYPE = 50
 
@@ -87,45 +106,35 @@ class Result(Message):
             4: util.validate_kwargs,
         },
     )
+    DECODER = decoder.compile_decoder(VALIDATION_SPEC, TYPE, ResultFields, ("request_id", "args", "kwargs", "options"))
 
     def __init__(self, fields: IResultFields):
-        super().__init__()
-        self._fields = fields
-
-    @property
-    def request_id(self) -> int:
-        return self._fields.request_id
-
-    @property
-    def options(self) -> dict[str, Any]:
-        return self._fields.options
-
-    @property
-    def args(self) -> list[Any] | None:
-        return self._fields.args
-
-    @property
-    def kwargs(self) -> dict[str, Any] | None:
-        return self._fields.kwargs
-
-    def payload_is_binary(self) -> bool:
-        return self._fields.payload_is_binary()
-
-    @property
-    def payload(self) -> bytes | None:
-        return self._fields.payload
-
-    @property
-    def payload_serializer(self) -> int:
-        return self._fields.payload_serializer
+        args, kwargs = util.arguments(fields)
+        ResultFields.__init__(
+            self,
+            fields.request_id,
+            args,
+            kwargs,
+            fields.options,
+            fields.payload,
+            fields.payload_serializer,
+        )
 
     @classmethod
     def parse(cls, msg: list[Any]) -> Result:
-        f = util.validate_message(msg, cls.TYPE, cls.VALIDATION_SPEC)
-        return Result(ResultFields(f.request_id, f.args, f.kwargs, f.options))
+        return cls.DECODER(msg, cls)
 
     def marshal(self) -> list[Any]:
         message = [self.TYPE, self.request_id, self.options]
+        if self.payload is not None:
+            message.append([self.payload])
+            return message
+
+        if isinstance(self._args, RawArguments):
+            # still encoded arguments, spliced back in by the serializer
+            message.append(self._args)
+            return message
+
         if self.args is not None:
             message.append(self.args)
 
@@ -136,3 +145,16 @@ class Result(Message):
             message.append(self.kwargs)
 
         return message
+
+    def marshal_fast(self) -> tuple[Any, ...] | None:
+        args = self._args
+        if self._payload is not None or isinstance(args, RawArguments):
+            return None
+
+        if self._kwargs is not None:
+            return self.TYPE, self._request_id, self._options, [] if args is None else args, self._kwargs
+
+        if args is not None:
+            return self.TYPE, self._request_id, self._options, args
+
+        return self.TYPE, self._request_id, self._options
@@ -3,11 +3,13 @@ from __future__ import annotations
 from typing import Any
 
 from wampproto.messages.message import Message
-from wampproto.messages import util
+from wampproto.messages import util, decoder
 from wampproto.messages.validation_spec import ValidationSpec
 
 
 class ISubscribeFields:
+    __slots__ = ()
+
     @property
     def request_id(self):
         raise NotImplementedError
@@ -22,6 +24,8 @@ class ISubscribeFields:
 
 
 class SubscribeFields(ISubscribeFields):
+    __slots__ = ("_request_id", "_topic", "_options")
+
     def __init__(self, request_id: int, topic: str, options: dict[str, Any] | None = None):
         super().__init__()
         self._request_id = request_id
@@ -41,7 +45,9 @@ class SubscribeFields(ISubscribeFields):
         return self._options
 
 
-class Subscribe(Message):
+class Subscribe(Message, SubscribeFields):
+    __slots__ = ()
+
     TEXT = "SUBSCRIBE"
     TYPE = 32
 
@@ -55,27 +61,14 @@ class Subscribe(Message):
             3: util.validate_topic,
         },
     )
+    DECODER = decoder.compile_decoder(VALIDATION_SPEC, TYPE, SubscribeFields, ("request_id", "topic", "options"))
 
     def __init__(self, fields: ISubscribeFields):
-        super().__init__()
-        self._fields = fields
-
-    @property
-    def request_id(self) -> int:
-        return self._fields.request_id
-
-    @property
-    def topic(self) -> str:
-        return self._fields.topic
-
-    @property
-    def options(self) -> dict[str, Any]:
-        return self._fields.options
+        SubscribeFields.__init__(self, fields.request_id, fields.topic, fields.options)
 
     @classmethod
     def parse(cls, msg: list[Any]) -> Subscribe:
-        f = util.validate_message(msg, cls.TYPE, cls.VALIDATION_SPEC)
-        return Subscribe(SubscribeFields(f.request_id, f.topic, f.options))
+        return cls.DECODER(msg, cls)
 
     def marshal(self) -> list[Any]:
         return [self.TYPE, self.request_id, self.options, self.topic]
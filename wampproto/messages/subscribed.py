@@ -3,11 +3,13 @@ from __future__ import annotations
 from typing import Any
 
 from wampproto.messages.message import Message
-from wampproto.messages import util
+from wampproto.messages import util, decoder
 from wampproto.messages.validation_spec import ValidationSpec
 
 
 class ISubscribedFields:
+    __slots__ = ()
+
     @property
     def request_id(self):
         raise NotImplementedError
@@ -18,6 +20,8 @@ class ISubscribedFields:
 
 
 class SubscribedFields(ISubscribedFields):
+    __slots__ = ("_request_id", "_subscription_id")
+
     def __init__(self, request_id: int, subscription_id: int):
         super().__init__()
         self._request_id = request_id
@@ -32,7 +36,9 @@ class SubscribedFields(ISubscribedFields):
         return self._subscription_id
 
 
-class Subscribed(Message):
+class Subscribed(Message, SubscribedFields):
+    __slots__ = ()
+
     TEXT = "SUBSCRIBED"
     TYPE = 33
 
@@ -45,23 +51,14 @@ class Subscribed(Message):
             2: util.validate_subscription_id,
         },
     )
+    DECODER = decoder.compile_decoder(VALIDATION_SPEC, TYPE, SubscribedFields, ("request_id", "subscription_id"))
 
     def __init__(self, fields: SubscribedFields):
-        super().__init__()
-        self._fields = fields
-
-    @property
-    def request_id(self) -> int:
-        return self._fields.request_id
-
-    @property
-    def subscription_id(self) -> int:
-        return self._fields.subscription_id
+        SubscribedFields.__init__(self, fields.request_id, fields.subscription_id)
 
     @classmethod
     def parse(cls, msg: list[Any]) -> Subscribed:
-        f = util.validate_message(msg, cls.TYPE, cls.VALIDATION_SPEC)
-        return Subscribed(SubscribedFields(f.request_id, f.subscription_id))
+        return cls.DECODER(msg, cls)
 
     def marshal(self) -> list[Any]:
         return [self.TYPE, self.request_id, self.subscription_id]
@@ -3,17 +3,21 @@ from __future__ import annotations
 from typing import Any
 
 from wampproto.messages.message import Message
-from wampproto.messages import util
+from wampproto.messages import util, decoder
 from wampproto.messages.validation_spec import ValidationSpec
 
 
 class IUnregisteredFields:
+    __slots__ = ()
+
     @property
     def request_id(self):
         raise NotImplementedError
 
 
 class UnregisteredFields(IUnregisteredFields):
+    __slots__ = ("_request_id",)
+
     def __init__(self, request_id: int):
         super().__init__()
         self._request_id = request_id
@@ -23,7 +27,9 @@ class UnregisteredFields(IUnregisteredFields):
         return self._request_id
 
 
-class Unregistered(Message):
+class Unregistered(Message, UnregisteredFields):
+    __slots__ = ()
+
     TEXT = "UNREGISTERED"
     TYPE = 67
 
@@ -35,19 +41,14 @@ class Unregistered(Message):
             1: util.validate_request_id,
         },
     )
+    DECODER = decoder.compile_decoder(VALIDATION_SPEC, TYPE, UnregisteredFields, ("request_id",))
 
     def __init__(self, fields: IUnregisteredFields):
-        super().__init__()
-        self._fields = fields
-
-    @property
-    def request_id(self) -> int:
-        return self._fields.request_id
+        UnregisteredFields.__init__(self, fields.request_id)
 
     @classmethod
     def parse(cls, msg: list[Any]) -> Unregistered:
-        f = util.validate_message(msg, cls.TYPE, cls.VALIDATION_SPEC)
-        return Unregistered(UnregisteredFields(f.request_id))
+        return cls.DECODER(msg, cls)
 
     def marshal(self) -> list[Any]:
         return [self.TYPE, self.request_id]
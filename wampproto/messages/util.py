@@ -1,7 +1,9 @@
+import base64
 from enum import Enum
 from typing import Any
 
 from wampproto.messages import exceptions
+from wampproto.messages.message import RawArguments
 from wampproto.messages.validation_spec import ValidationSpec
 
 
@@ -184,6 +186,11 @@ def validate_uri(msg: list[Any], index: int, fields: Fields, name: str):
 
 def validate_args(msg: list[Any], index: int, fields: Fields, name: str):
     if len(msg) > index:
+        # args and kwargs of a lazily deserialized message, validated when decoded
+        if isinstance(msg[index], RawArguments):
+            fields.args = msg[index]
+            return None
+
         if (error := validate_list_or_raise(msg[index], index, name)) is not None:
             return error
 
@@ -452,3 +459,72 @@ def validate_message(msg: list[Any], type_: int, val_spec: ValidationSpec) -> Fi
         raise ValueError(*errors)
 
     return f
+
+
+# payload passthrough mode (PPT) options, set by the sender in options and
+# forwarded by the router in details
+PPT_SCHEME = "ppt_scheme"
+PPT_SERIALIZER = "ppt_serializer"
+PPT_CIPHER = "ppt_cipher"
+PPT_KEYID = "ppt_keyid"
+PPT_OPTIONS = (PPT_SCHEME, PPT_SERIALIZER, PPT_CIPHER, PPT_KEYID)
+
+# ppt_serializer values mapped to the ids used for payload_serializer, these
+# are the same as the RawSocket serializer ids. 0 means unknown or "native".
+PAYLOAD_SERIALIZERS = {"json": 1, "msgpack": 2, "cbor": 3, "ubjson": 4, "flatbuffers": 5}
+
+# JSON has no binary type, binary values are sent as base64 strings prefixed with a NUL
+JSON_BINARY_PREFIX = "\0"
+
+
+def unpack_payload(
+    args: list[Any] | RawArguments | None,
+    kwargs: dict[str, Any] | None,
+    options: dict[str, Any],
+    serializer: int | None,
+    payload: bytes | memoryview | None,
+) -> tuple[list[Any] | RawArguments | None, int, memoryview | None]:
+    """
+    Return the args, payload serializer and payload of a message that may carry
+    a passthrough payload. In PPT mode the opaque payload is the only element of
+    args, it is split out of them so that it can be forwarded without decoding.
+    """
+    if payload is None:
+        if isinstance(args, RawArguments):
+            return args, 0, None
+
+        if PPT_SCHEME not in options or kwargs is not None or args is None or len(args) != 1:
+            return args, 0, None
+
+        value = args[0]
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            payload = value
+        elif isinstance(value, str) and value.startswith(JSON_BINARY_PREFIX):
+            payload = base64.b64decode(value[1:])
+        else:
+            return args, 0, None
+
+        args = None
+
+    if not serializer:
+        serializer = PAYLOAD_SERIALIZERS.get(options.get(PPT_SERIALIZER), 0)
+
+    return args, serializer, payload if isinstance(payload, memoryview) else memoryview(payload)
+
+
+def ppt_options(options: dict[str, Any]) -> dict[str, Any]:
+    """return the payload passthrough options that a router forwards with the payload"""
+    return {key: options[key] for key in PPT_OPTIONS if key in options}
+
+
+def arguments(fields: Any) -> tuple[list[Any] | RawArguments | None, dict[str, Any] | None]:
+    """
+    Return the args and kwargs of message fields to build another message from,
+    lazily deserialized arguments are returned still encoded so they are forwarded
+    without being decoded.
+    """
+    raw = fields.raw_arguments
+    if raw is not None:
+        return raw, None
+
+    return fields.args, fields.kwargs
@@ -2,12 +2,14 @@ from __future__ import annotations
 
 from typing import Any
 
-from wampproto.messages import util
+from wampproto.messages import util, decoder
 from wampproto.messages.message import Message
 from wampproto.messages.validation_spec import ValidationSpec
 
 
 class IWelcomeFields:
+    __slots__ = ()
+
     @property
     def session_id(self):
         raise NotImplementedError
@@ -34,6 +36,8 @@ class IWelcomeFields:
 
 
 class WelcomeFields(IWelcomeFields):
+    __slots__ = ("_session_id", "_roles", "_authid", "_authrole", "_authmethod", "_authextra")
+
     def __init__(
         self,
         session_id: int,
@@ -76,7 +80,9 @@ class WelcomeFields(IWelcomeFields):
         return self._authextra
 
 
-class Welcome(Message):
+class Welcome(Message, WelcomeFields):
+    __slots__ = ()
+
     TEXT = "WELCOME"
     TYPE = 2
 
@@ -89,48 +95,18 @@ class Welcome(Message):
             2: util.validate_welcome_details,
         },
     )
+    DECODER = decoder.compile_decoder(
+        VALIDATION_SPEC, TYPE, WelcomeFields, ("session_id", "roles", "authid", "authrole", "authmethod", "authextra")
+    )
 
     def __init__(self, fields: IWelcomeFields):
-        super().__init__()
-        self._fields = fields
-
-    @property
-    def session_id(self) -> int:
-        return self._fields.session_id
-
-    @property
-    def roles(self) -> dict[str, Any]:
-        return self._fields.roles
-
-    @property
-    def authid(self) -> str:
-        return self._fields.authid
-
-    @property
-    def authrole(self) -> str:
-        return self._fields.authrole
-
-    @property
-    def authmethod(self) -> str:
-        return self._fields.authmethod
-
-    @property
-    def authextra(self) -> dict[str, Any]:
-        return self._fields.authextra
+        WelcomeFields.__init__(
+            self, fields.session_id, fields.roles, fields.authid, fields.authrole, fields.authmethod, fields.authextra
+        )
 
     @classmethod
     def parse(cls, msg: list[Any]) -> Welcome:
-        f = util.validate_message(msg, cls.TYPE, cls.VALIDATION_SPEC)
-        return Welcome(
-            WelcomeFields(
-                session_id=f.session_id,
-                roles=f.roles,
-                authid=f.authid,
-                authrole=f.authrole,
-                authmethod=f.authmethod,
-                authextra=f.authextra,
-            )
-        )
+        return cls.DECODER(msg, cls)
 
     def marshal(self) -> list[Any]:
         details: dict[str, Any] = {"roles": self.roles}
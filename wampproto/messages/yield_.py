@@ -2,12 +2,14 @@ from __future__ import annotations
 
 from typing import Any
 
-from wampproto.messages import util
-from wampproto.messages.message import Message, BinaryPayload
+from wampproto.messages import util, decoder
+from wampproto.messages.message import Message, BinaryPayload, RawArguments
 from wampproto.messages.validation_spec import ValidationSpec
 
 
 class IYieldFields(BinaryPayload):
+    __slots__ = ()
+
     @property
     def request_id(self):
         raise NotImplementedError
@@ -26,23 +28,28 @@ class IYieldFields(BinaryPayload):
 
 
 class YieldFields(IYieldFields):
+    __slots__ = ("_request_id", "_args", "_kwargs", "_options", "_serializer", "_payload")
+
     def __init__(
         self,
         request_id: int,
-        args: list | None = None,
+        args: list | RawArguments | None = None,
         kwargs: dict | None = None,
         options: dict | None = None,
-        payload: bytes | None = None,
+        payload: bytes | memoryview | None = None,
         serializer: int | None = None,
     ):
         super().__init__()
         self._request_id = request_id
-        self._args = args
         self._kwargs = kwargs
         self._options = {} if options is None else options
 
-        self._serializer = serializer
-        self._payload = payload
+        if payload is None and util.PPT_SCHEME not in self._options:
+            self._args, self._serializer, self._payload = args, 0, None
+        else:
+            self._args, self._serializer, self._payload = util.unpack_payload(
+                args, kwargs, self._options, serializer, payload
+            )
 
     @property
     def request_id(self) -> int:
@@ -54,25 +61,37 @@ class YieldFields(IYieldFields):
 
     @property
     def args(self) -> list[Any] | None:
+        if isinstance(self._args, RawArguments):
+            self._args, self._kwargs = self._args.decode()
+
         return self._args
 
     @property
     def kwargs(self) -> dict[str, Any]:
+        if isinstance(self._args, RawArguments):
+            self._args, self._kwargs = self._args.decode()
+
         return self._kwargs
 
     def payload_is_binary(self) -> bool:
-        return self._serializer != 0
+        return self._payload is not None
 
     @property
-    def payload(self) -> bytes | None:
+    def payload(self) -> memoryview | None:
         return self._payload
 
     @property
     def payload_serializer(self) -> int:
         return self._serializer
 
+    @property
+    def raw_arguments(self) -> RawArguments | None:
+        return self._args if isinstance(self._args, RawArguments) else None
+
+
+class Yield(Message, YieldFields):
+    __slots__ = ()
 
-class Yield(Message):
     TEXT = "YIELD"
     TYPE = 70
 
@@ -87,45 +106,35 @@ class Yield(Message):
             4: util.validate_kwargs,
         },
     )
+    DECODER = decoder.compile_decoder(VALIDATION_SPEC, TYPE, YieldFields, ("request_id", "args", "kwargs", "options"))
 
     def __init__(self, fields: IYieldFields):
-        super().__init__()
-        self._fields = fields
-
-    @property
-    def request_id(self) -> int:
-        return self._fields.request_id
-
-    @property
-    def options(self) -> dict[str, Any]:
-        return self._fields.options
-
-    @property
-    def args(self) -> list[Any] | None:
-        return self._fields.args
-
-    @property
-    def kwargs(self) -> dict[str, Any] | None:
-        return self._fields.kwargs
-
-    def payload_is_binary(self) -> bool:
-        return self._fields.payload_is_binary()
-
-    @property
-    def payload(self) -> bytes | None:
-        return self._fields.payload
-
-    @property
-    def payload_serializer(self) -> int:
-        return self._fields.payload_serializer
+        args, kwargs = util.arguments(fields)
+        YieldFields.__init__(
+            self,
+            fields.request_id,
+            args,
+            kwargs,
+            fields.options,
+            fields.payload,
+            fields.payload_serializer,
+        )
 
     @classmethod
     def parse(cls, msg: list[Any]) -> Yield:
-        f = util.validate_message(msg, cls.TYPE, cls.VALIDATION_SPEC)
-        return Yield(YieldFields(f.request_id, f.args, f.kwargs, f.options))
+        return cls.DECODER(msg, cls)
 
     def marshal(self) -> list[Any]:
         message = [self.TYPE, self.request_id, self.options]
+        if self.payload is not None:
+            message.append([self.payload])
+            return message
+
+        if isinstance(self._args, RawArguments):
+            # still encoded arguments, spliced back in by the serializer
+            message.append(self._args)
+            return message
+
         if self.args is not None:
             message.append(self.args)
 
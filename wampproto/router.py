@@ -0,0 +1,389 @@
+from __future__ import annotations
+
+import heapq
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from wampproto import messages, types, uris
+from wampproto.acceptor import Acceptor
+from wampproto.broker import OPTION_GET_RETAINED, Broker
+from wampproto.dealer import Dealer
+
+Results = dict[int, list[messages.Message]]
+
+
+def _add(results: Results, recipient: int, message: messages.Message) -> None:
+    outgoing = results.get(recipient)
+    if outgoing is None:
+        results[recipient] = [message]
+    else:
+        outgoing.append(message)
+
+
+class Realm:
+    """
+    Broker and Dealer of one realm. Messages of its sessions are dispatched to the
+    handler of their type through HANDLERS, subclasses of message types are looked
+    up once through their MRO and then cached.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        clock: Callable[[], float] = time.monotonic,
+        uri_validator: uris.URIValidator | None = None,
+    ):
+        self.name = name
+        self.broker = Broker(uri_validator)
+        self.dealer = Dealer(clock, uri_validator)
+        self.sessions: dict[int, types.SessionDetails] = {}
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def add_session(self, details: types.SessionDetails) -> None:
+        if details.session_id in self.sessions:
+            raise ValueError("cannot add session twice")
+
+        self.broker.add_session(details)
+        self.dealer.add_session(details)
+        self.sessions[details.session_id] = details
+
+    def remove_session(self, sid: int) -> Results:
+        """remove a session and return the messages ending its pending calls, see Dealer.remove_session"""
+        if sid not in self.sessions:
+            raise ValueError("cannot remove non-existing session")
+
+        self.broker.remove_session(sid)
+        results: Results = {}
+        for result in self.dealer.remove_session(sid):
+            _add(results, result.recipient, result.message)
+
+        del self.sessions[sid]
+        return results
+
+    def _broker_message(self, session_id: int, message: messages.Message, results: Results) -> None:
+        result = self.broker.receive_message(session_id, message)
+        _add(results, result.recipient, result.message)
+
+    def _subscribe(self, session_id: int, message: messages.Subscribe, results: Results) -> None:
+        result = self.broker.receive_message(session_id, message)
+        _add(results, result.recipient, result.message)
+        if isinstance(result.message, messages.Subscribed) and message.options.get(OPTION_GET_RETAINED, False):
+            for publication in self.broker.get_retained(session_id, result.message.subscription_id):
+                _add(results, session_id, publication.event)
+
+    def _get_events(self, session_id: int, message: messages.Call) -> messages.Message:
+        # wamp.subscription.get_events(subscription_id, limit=None)
+        args = message.args or []
+        limit = args[1] if len(args) > 1 else None
+        # bool is an int subclass, but not a valid ID or limit
+        if (
+            len(args) == 0
+            or len(args) > 2
+            or type(args[0]) is not int
+            or (limit is not None and (type(limit) is not int or limit < 0))
+        ):
+            return messages.Error(messages.ErrorFields(message.TYPE, message.request_id, uris.INVALID_ARGUMENT))
+        try:
+            subscription = self.broker.get_subscription(session_id, args[0])
+            publications = self.broker.get_events(session_id, args[0], limit)
+        except ValueError:
+            return messages.Error(messages.ErrorFields(message.TYPE, message.request_id, uris.NO_SUCH_SUBSCRIPTION))
+
+        events = [
+            {
+                "publication": publication.event.publication_id,
+                # only events of pattern subscriptions carry their topic
+                "topic": publication.event.details.get("topic", subscription.topic),
+                "args": publication.event.args,
+                "kwargs": publication.event.kwargs,
+            }
+            for publication in publications
+        ]
+        return messages.Result(messages.ResultFields(message.request_id, [events]))
+
+    def _call(self, session_id: int, message: messages.Call, results: Results) -> None:
+        if message.uri == uris.SUBSCRIPTION_GET_EVENTS and len(self.broker.histories) != 0:
+            _add(results, session_id, self._get_events(session_id, message))
+        else:
+            self._dealer_message(session_id, message, results)
+
+    def _publish(self, session_id: int, message: messages.Publish, results: Results) -> None:
+        publication = self.broker.receive_publish(session_id, message)
+        for pub in (publication, *publication.pattern_publications):
+            if pub.event is not None:
+                for recipient in pub.recipients:
+                    _add(results, recipient, pub.event)
+
+        if publication.ack is not None:
+            _add(results, publication.ack.recipient, publication.ack.message)
+
+    def _dealer_message(self, session_id: int, message: messages.Message, results: Results) -> None:
+        result = self.dealer.receive_message(session_id, message)
+        if result is not None:
+            _add(results, result.recipient, result.message)
+
+    def _cancel(self, session_id: int, message: messages.Cancel, results: Results) -> None:
+        for result in self.dealer.receive_cancel(session_id, message):
+            _add(results, result.recipient, result.message)
+
+    HANDLERS: dict[type[messages.Message], Callable[[Realm, int, messages.Message, Results], None]] = {
+        messages.Publish: _publish,
+        messages.Subscribe: _subscribe,
+        messages.Unsubscribe: _broker_message,
+        messages.Call: _call,
+        messages.Yield: _dealer_message,
+        messages.Register: _dealer_message,
+        messages.Unregister: _dealer_message,
+        messages.Error: _dealer_message,
+        messages.Cancel: _cancel,
+    }
+
+    @classmethod
+    def _handler(cls, message_type: type) -> Callable[[Realm, int, messages.Message, Results], None]:
+        for base in message_type.__mro__[1:]:
+            handler = cls.HANDLERS.get(base)
+            if handler is not None:
+                cls.HANDLERS[message_type] = handler
+                return handler
+
+        raise ValueError(f"message type {message_type.__name__} not supported")
+
+    def receive(self, session_id: int, message: messages.Message) -> Results:
+        """process a message of a session and return the outgoing messages grouped by recipient"""
+        handler = self.HANDLERS.get(type(message))
+        if handler is None:
+            handler = self._handler(type(message))
+
+        results: Results = {}
+        handler(self, session_id, message, results)
+        return results
+
+    def receive_batch(self, session_id: int, batch: list[messages.Message]) -> Results:
+        """
+        Process several messages of a session, in order, and return the outgoing
+        messages grouped by recipient. If a message raises, the ones before it
+        have already been applied.
+        """
+        handlers = self.HANDLERS
+        results: Results = {}
+        for message in batch:
+            handler = handlers.get(type(message))
+            if handler is None:
+                handler = self._handler(type(message))
+
+            handler(self, session_id, message, results)
+
+        return results
+
+
+class Router:
+    """
+    Realms and the sessions joined to them. Realms added with add_realm are kept,
+    with auto_create the others are created when their first session joins. Those
+    are evicted by evict_idle once they had no session for idle_timeout seconds,
+    only the realms that became idle are visited. Likewise expire only visits the
+    realms with a call that timed out, calls must go through receive or
+    receive_batch of the router for their timeout to be tracked.
+    """
+
+    def __init__(
+        self,
+        auto_create: bool = True,
+        idle_timeout: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        uri_validator: uris.URIValidator | None = None,
+    ):
+        self.realms: dict[str, Realm] = {}
+        self._auto_create = auto_create
+        self._idle_timeout = idle_timeout
+        self._clock = clock
+        self._uri_validator = uri_validator
+        self._session_realms: dict[int, Realm] = {}
+        # names of realms added with add_realm, never evicted
+        self._static: set[str] = set()
+        # created realms without sessions, mapped to the time they became idle, oldest first
+        self._idle: OrderedDict[str, float] = OrderedDict()
+        # (deadline, realm name) of realms with calls that have a timeout, and the earliest
+        # deadline pushed for each realm. Entries not matching it are skipped once they surface.
+        self._deadlines: list[tuple[float, str]] = []
+        self._realm_deadlines: dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self.realms)
+
+    @property
+    def clock(self) -> Callable[[], float]:
+        return self._clock
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.realms
+
+    def add_realm(self, name: str) -> Realm:
+        realm = self.realms.get(name)
+        if realm is None:
+            realm = Realm(name, self._clock, self._uri_validator)
+            self.realms[name] = realm
+
+        self._static.add(name)
+        self._idle.pop(name, None)
+        return realm
+
+    def get_realm(self, name: str) -> Realm | None:
+        return self.realms.get(name)
+
+    def realm_of(self, session_id: int) -> Realm:
+        realm = self._session_realms.get(session_id)
+        if realm is None:
+            raise ValueError(f"session {session_id} doesn't exist")
+
+        return realm
+
+    def add_session(self, details: types.SessionDetails) -> Realm:
+        if details.session_id in self._session_realms:
+            raise ValueError("cannot add session twice")
+
+        realm = self.realms.get(details.realm)
+        if realm is None:
+            if not self._auto_create:
+                raise ValueError(f"realm {details.realm} doesn't exist")
+
+            realm = Realm(details.realm, self._clock, self._uri_validator)
+            self.realms[details.realm] = realm
+        else:
+            self._idle.pop(details.realm, None)
+
+        realm.add_session(details)
+        self._session_realms[details.session_id] = realm
+        return realm
+
+    def attach(self, acceptor: Acceptor) -> Realm:
+        """add the session an acceptor established"""
+        return self.add_session(acceptor.get_session_details())
+
+    def remove_session(self, sid: int) -> Results:
+        """remove a session and return the messages ending its pending calls, see Realm.remove_session"""
+        realm = self.realm_of(sid)
+        results = realm.remove_session(sid)
+        del self._session_realms[sid]
+        if len(realm) == 0 and realm.name not in self._static:
+            self._idle[realm.name] = self._clock()
+
+        return results
+
+    def receive(self, session_id: int, message: messages.Message) -> Results:
+        """
+        Process a message of a session and return the outgoing messages grouped by
+        recipient. A GOODBYE is answered and removes the session.
+        """
+        if isinstance(message, messages.Goodbye):
+            return self._goodbye(session_id, {})
+
+        realm = self.realm_of(session_id)
+        results = realm.receive(session_id, message)
+        if isinstance(message, messages.Call):
+            self._schedule(realm)
+
+        return results
+
+    def _goodbye(self, session_id: int, results: Results) -> Results:
+        for recipient, outgoing in self.remove_session(session_id).items():
+            for message in outgoing:
+                _add(results, recipient, message)
+
+        _add(results, session_id, messages.Goodbye(messages.GoodbyeFields({}, uris.GOODBYE_AND_OUT)))
+        return results
+
+    def receive_batch(self, session_id: int, batch: list[messages.Message]) -> Results:
+        """
+        Process several messages of a session, see Realm.receive_batch. A GOODBYE is
+        handled like in receive, messages after it are ignored.
+        """
+        realm = self.realm_of(session_id)
+        for index, message in enumerate(batch):
+            if isinstance(message, messages.Goodbye):
+                results = realm.receive_batch(session_id, batch[:index]) if index != 0 else {}
+                self._schedule(realm)
+                return self._goodbye(session_id, results)
+
+        results = realm.receive_batch(session_id, batch)
+        self._schedule(realm)
+        return results
+
+    def _schedule(self, realm: Realm) -> None:
+        deadline = realm.dealer.next_deadline()
+        if deadline is None:
+            return
+
+        scheduled = self._realm_deadlines.get(realm.name)
+        if scheduled is None or deadline < scheduled:
+            self._realm_deadlines[realm.name] = deadline
+            heapq.heappush(self._deadlines, (deadline, realm.name))
+
+    def next_deadline(self) -> float | None:
+        """time at which the next call times out in any realm, None if no call has a timeout"""
+        while len(self._deadlines) != 0:
+            deadline, name = self._deadlines[0]
+            if self._realm_deadlines.get(name) == deadline:
+                return deadline
+
+            heapq.heappop(self._deadlines)
+
+        return None
+
+    def expire(self, now: float | None = None) -> list[types.MessageWithRecipient]:
+        """
+        Time out the calls whose deadline has passed in any realm, see Dealer.expire.
+        Only the realms with an expired deadline are visited.
+        """
+        if now is None:
+            now = self._clock()
+
+        expired = []
+        due = []
+        while len(self._deadlines) != 0 and self._deadlines[0][0] <= now:
+            deadline, name = heapq.heappop(self._deadlines)
+            if self._realm_deadlines.get(name) != deadline:
+                continue
+
+            del self._realm_deadlines[name]
+            realm = self.realms.get(name)
+            if realm is not None:
+                expired.extend(realm.dealer.expire(now))
+                due.append(realm)
+
+        # the remaining calls of those realms may time out later
+        for realm in due:
+            self._schedule(realm)
+
+        return expired
+
+    def next_eviction(self) -> float | None:
+        """time at which the oldest idle realm is evicted, None if there is none"""
+        if self._idle_timeout is None or len(self._idle) == 0:
+            return None
+
+        return next(iter(self._idle.values())) + self._idle_timeout
+
+    def evict_idle(self, now: float | None = None) -> list[str]:
+        """remove the realms that had no session for idle_timeout seconds and return their names"""
+        if self._idle_timeout is None:
+            return []
+
+        if now is None:
+            now = self._clock()
+
+        evicted = []
+        while len(self._idle) != 0:
+            name, since = next(iter(self._idle.items()))
+            if now - since < self._idle_timeout:
+                break
+
+            del self._idle[name]
+            del self.realms[name]
+            self._realm_deadlines.pop(name, None)
+            evicted.append(name)
+
+        return evicted
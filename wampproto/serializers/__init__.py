@@ -1,11 +1,24 @@
-from wampproto.serializers.serializer import Serializer
+from wampproto.serializers.serializer import Serializer, MessageTemplate
 from wampproto.serializers.json import JSONSerializer
 from wampproto.serializers.cbor import CBORSerializer
 from wampproto.serializers.msgpack import MsgPackSerializer
+from wampproto.serializers.registry import (
+    register_serializer,
+    get_serializer,
+    get_rawsocket_serializer,
+    subprotocols,
+    negotiate_subprotocol,
+)
 
 __all__ = (
     "Serializer",
+    "MessageTemplate",
     "JSONSerializer",
     "CBORSerializer",
     "MsgPackSerializer",
+    "register_serializer",
+    "get_serializer",
+    "get_rawsocket_serializer",
+    "subprotocols",
+    "negotiate_subprotocol",
 )
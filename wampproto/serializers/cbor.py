@@ -1,13 +1,245 @@
+import io
+from typing import Any
+
 import cbor2
 
 from wampproto import messages, serializers
-from wampproto.serializers.serializer import to_message
+from wampproto.messages.message import BinaryPayload
+from wampproto.serializers.serializer import LAZY_MAX_ARGUMENTS, to_message, lazy_header_length, is_passthrough
+
+# major type 4 (array) in the high bits of the initial byte
+CBOR_ARRAY = 0x80
+CBOR_MAJOR_TYPE_MASK = 0xE0
+CBOR_ADDITIONAL_INFO_MASK = 0x1F
+# major type 2 (byte string), as passed to CBOREncoder.encode_length
+CBOR_MAJOR_BYTES = 2
+CBOR_MAJOR_TEXT = 3
+CBOR_MAJOR_ARRAY = 4
+CBOR_MAJOR_MAP = 5
+CBOR_MAJOR_TAG = 6
+CBOR_MAJOR_SIMPLE = 7
+# additional information of indefinite length items, and of the break code ending them
+CBOR_INDEFINITE = 31
+
+
+def encode_memoryview(encoder: cbor2.CBOREncoder, value: memoryview) -> None:
+    # cbor2 treats memoryview as a sequence, write it as a byte string without copying
+    encoder.encode_length(CBOR_MAJOR_BYTES, value.nbytes)
+    encoder.write(value)
+
+
+ENCODERS = {memoryview: encode_memoryview}
+
+
+def array_header(length: int) -> bytes:
+    if length < 24:
+        return bytes((CBOR_ARRAY | length,))
+    elif length < 1 << 8:
+        return bytes((CBOR_ARRAY | 24, length))
+    elif length < 1 << 16:
+        return bytes((CBOR_ARRAY | 25,)) + length.to_bytes(2, "big")
+    elif length < 1 << 32:
+        return bytes((CBOR_ARRAY | 26,)) + length.to_bytes(4, "big")
+
+    return bytes((CBOR_ARRAY | 27,)) + length.to_bytes(8, "big")
+
+
+def read_array_header(data: bytes) -> tuple[int, int] | None:
+    """return the length of the definite length array data starts with and the size of its header"""
+    if len(data) == 0 or data[0] & CBOR_MAJOR_TYPE_MASK != CBOR_ARRAY:
+        return None
+
+    info = data[0] & CBOR_ADDITIONAL_INFO_MASK
+    if info < 24:
+        return info, 1
+    elif info <= 27:
+        size = 1 << (info - 24)
+        if len(data) < 1 + size:
+            return None
+
+        return int.from_bytes(data[1 : 1 + size], "big"), 1 + size
+
+    return None
+
+
+class ItemScanner:
+    """
+    Finds where the top level items of a CBOR stream end by walking the headers of
+    their data items, without decoding them. The position and the items left in the
+    enclosing arrays and maps are kept between calls, so every header is read once
+    however the stream is split.
+    """
+
+    __slots__ = ("position", "_pending")
+
+    def __init__(self):
+        # offset of the next header to read
+        self.position = 0
+        # items left to read in each enclosing array or map, -1 for indefinite lengths
+        self._pending: list[int] = []
+
+    def scan(self, data: bytes | bytearray) -> list[int]:
+        """return the offsets in data at which the top level items read since the last call end"""
+        ends = []
+        pending = self._pending
+        position = self.position
+        size = len(data)
+        while position < size:
+            initial = data[position]
+            major = initial >> 5
+            info = initial & CBOR_ADDITIONAL_INFO_MASK
+            if info < 24:
+                argument, header = info, 1
+            elif info <= 27:
+                length = 1 << (info - 24)
+                if position + 1 + length > size:
+                    break
+
+                argument = int.from_bytes(data[position + 1 : position + 1 + length], "big")
+                header = 1 + length
+            elif info == CBOR_INDEFINITE and major not in (0, 1, CBOR_MAJOR_TAG):
+                argument, header = -1, 1
+            else:
+                raise ValueError(f"invalid CBOR initial byte {initial:#x}")
+
+            if major == CBOR_MAJOR_SIMPLE and argument == -1:
+                # break code, ends the innermost indefinite length item
+                if len(pending) == 0 or pending[-1] != -1:
+                    raise ValueError("unexpected CBOR break code")
+
+                pending.pop()
+                position += 1
+            elif major in (CBOR_MAJOR_BYTES, CBOR_MAJOR_TEXT, CBOR_MAJOR_ARRAY, CBOR_MAJOR_MAP) and argument == -1:
+                # strings are chunked and containers ended by a break code
+                pending.append(-1)
+                position += 1
+                continue
+            elif major in (CBOR_MAJOR_BYTES, CBOR_MAJOR_TEXT):
+                if position + header + argument > size:
+                    break
+
+                position += header + argument
+            elif major in (CBOR_MAJOR_ARRAY, CBOR_MAJOR_MAP):
+                position += header
+                count = argument * 2 if major == CBOR_MAJOR_MAP else argument
+                if count != 0:
+                    pending.append(count)
+                    continue
+            elif major == CBOR_MAJOR_TAG:
+                # the tagged item follows, and completes the tag
+                position += header
+                continue
+            else:
+                position += header
+
+            # an item is complete, so may be the containers it ends
+            while len(pending) != 0 and pending[-1] != -1:
+                pending[-1] -= 1
+                if pending[-1] != 0:
+                    break
+
+                pending.pop()
+
+            if len(pending) == 0:
+                ends.append(position)
+
+        self.position = position
+        return ends
 
 
 class CBORSerializer(serializers.Serializer):
+    def __init__(self, lazy: bool = False):
+        super().__init__(lazy)
+        # data passed to feed that doesn't complete a message yet
+        self._buffer = bytearray()
+        self._scanner = ItemScanner()
+
     def serialize(self, message: messages.Message) -> bytes:
-        return cbor2.dumps(message.marshal())
+        items = message.marshal_fast()
+        if items is not None:
+            return cbor2.dumps(items)
+
+        if isinstance(message, BinaryPayload) and message.payload is not None:
+            return cbor2.dumps(message.marshal(), encoders=ENCODERS)
+
+        wamp_message = message.marshal()
+        if isinstance(wamp_message[-1], messages.RawArguments):
+            return self.serialize_raw(wamp_message)
+
+        return cbor2.dumps(wamp_message)
 
     def deserialize(self, data: bytes) -> messages.Message:
-        wamp_message = cbor2.loads(data)
+        if self._lazy:
+            wamp_message = self._loads_lazy(data)
+        else:
+            wamp_message = cbor2.loads(data)
+
         return to_message(wamp_message)
+
+    def feed(self, data: bytes | bytearray | memoryview) -> list[messages.Message]:
+        """
+        Deserialize a stream of concatenated messages, e.g. several messages read from
+        a socket at once. Messages completed by data are returned in order, a message
+        that is cut off is kept until the rest of it is passed to the next call.
+        Arguments of messages received this way are always decoded eagerly.
+        """
+        buffer = self._buffer
+        buffer += data
+        # only complete messages are decoded, a cut off one is decoded once
+        ends = self._scanner.scan(buffer)
+        if len(ends) == 0:
+            return []
+
+        wamp_messages = []
+        start = 0
+        view = memoryview(buffer)
+        try:
+            for end in ends:
+                wamp_messages.append(cbor2.loads(view[start:end]))
+                start = end
+        finally:
+            view.release()
+
+        del buffer[:start]
+        self._scanner.position -= start
+        return [to_message(wamp_message) for wamp_message in wamp_messages]
+
+    def _loads_lazy(self, data: bytes) -> list[Any]:
+        array = read_array_header(data)
+        if array is None:
+            return cbor2.loads(data)
+
+        length, offset = array
+        if length == 0:
+            return cbor2.loads(data)
+
+        fp = io.BytesIO(data)
+        fp.seek(offset)
+        decoder = cbor2.CBORDecoder(fp)
+        message_type = decoder.decode()
+        header_length = lazy_header_length(message_type)
+        # too many elements are left to the full decoder, which rejects them
+        if header_length is None or not 0 < length - header_length <= LAZY_MAX_ARGUMENTS[message_type]:
+            return cbor2.loads(data)
+
+        header = [message_type]
+        for _ in range(header_length - 1):
+            header.append(decoder.decode())
+
+        if is_passthrough(header):
+            return cbor2.loads(data)
+
+        header.append(messages.RawArguments(self, memoryview(data)[fp.tell() :], length - header_length))
+        return header
+
+    def serialize_item(self, value: Any) -> bytes:
+        return cbor2.dumps(value, encoders=ENCODERS)
+
+    def join_items(self, items: list[bytes], raw: messages.RawArguments | None = None) -> bytes:
+        if raw is not None:
+            return array_header(len(items) + raw.count) + b"".join(items) + raw.data
+
+        return array_header(len(items)) + b"".join(items)
+
+    def decode_items(self, data: bytes | memoryview, count: int | None) -> list[Any]:
+        return cbor2.loads(array_header(count) + data)
@@ -1,13 +1,278 @@
+import base64
 import json
+import re
+from typing import Any
 
 from wampproto import messages, serializers
-from wampproto.serializers.serializer import to_message
+from wampproto.messages import util
+from wampproto.serializers.serializer import LAZY_MAX_ARGUMENTS, to_message, lazy_header_length, is_passthrough
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+# JSON can't hold a NUL character unescaped, so only messages containing this
+# escape can carry binary values
+BINARY_MARKER = "\\u0000"
+BINARY_MARKER_BYTES = BINARY_MARKER.encode("ascii")
+
+
+def encode_binary(value: Any) -> str:
+    """encode binary values, such as passthrough payloads, using the WAMP JSON convention"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return util.JSON_BINARY_PREFIX + base64.b64encode(value).decode("ascii")
+
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def decode_binary(value: Any) -> Any:
+    """replace strings following the WAMP JSON binary convention with the bytes they encode"""
+    if isinstance(value, str):
+        if value.startswith(util.JSON_BINARY_PREFIX):
+            return base64.b64decode(value[1:])
+
+        return value
+    elif isinstance(value, list):
+        return [decode_binary(item) for item in value]
+    elif isinstance(value, dict):
+        return {key: decode_binary(item) for key, item in value.items()}
+
+    return value
+
+
+def has_binary(data: str | bytes) -> bool:
+    return (BINARY_MARKER if isinstance(data, str) else BINARY_MARKER_BYTES) in data
+
+
+class JSONBackend:
+    """
+    Library used to encode and decode JSON. All backends produce the same compact
+    UTF-8 output, so their results can be spliced together.
+    """
+
+    name = ""
+    available = False
+
+    def dumps(self, value: Any) -> bytes:
+        raise NotImplementedError()
+
+    def loads(self, data: str | bytes) -> Any:
+        raise NotImplementedError()
+
+
+class StdlibBackend(JSONBackend):
+    name = "json"
+    available = True
+
+    def __init__(self):
+        self._encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=encode_binary)
+
+    def dumps(self, value: Any) -> bytes:
+        return self._encoder.encode(value).encode("utf-8")
+
+    def loads(self, data: str | bytes) -> Any:
+        return json.loads(data)
+
+
+STDLIB_BACKEND = StdlibBackend()
+
+
+class OrjsonBackend(JSONBackend):
+    name = "orjson"
+    available = orjson is not None
+
+    def dumps(self, value: Any) -> bytes:
+        try:
+            return orjson.dumps(value, default=encode_binary)
+        except TypeError:
+            # e.g. integers that don't fit in 64 bits
+            return STDLIB_BACKEND.dumps(value)
+
+    def loads(self, data: str | bytes) -> Any:
+        try:
+            return orjson.loads(data)
+        except ValueError:
+            # let the standard library parse what orjson doesn't, or produce the error
+            return STDLIB_BACKEND.loads(data)
+
+
+class UjsonBackend(JSONBackend):
+    name = "ujson"
+    available = ujson is not None
+
+    def dumps(self, value: Any) -> bytes:
+        try:
+            data = ujson.dumps(value, ensure_ascii=False, escape_forward_slashes=False, reject_bytes=True)
+        except (TypeError, OverflowError):
+            # binary values and anything else ujson doesn't handle
+            return STDLIB_BACKEND.dumps(value)
+
+        return data.encode("utf-8")
+
+    def loads(self, data: str | bytes) -> Any:
+        try:
+            return ujson.loads(data)
+        except ValueError:
+            return STDLIB_BACKEND.loads(data)
+
+
+# in order of preference
+BACKENDS: dict[str, JSONBackend] = {
+    backend.name: backend for backend in (OrjsonBackend(), UjsonBackend(), STDLIB_BACKEND) if backend.available
+}
+
+
+def get_backend(name: str | None = None) -> JSONBackend:
+    """return the named backend, or the fastest one installed"""
+    if name is None:
+        return next(iter(BACKENDS.values()))
+
+    backend = BACKENDS.get(name)
+    if backend is None:
+        raise ValueError(f"JSON backend '{name}' is not available, available backends: {', '.join(BACKENDS)}")
+
+    return backend
+
+
+DECODER = json.JSONDecoder()
+WHITESPACE = json.decoder.WHITESPACE
+# strings, which may contain brackets and commas
+STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+# arrays and objects become parentheses, everything but them, commas, quotes and
+# backslashes is deleted
+STRUCTURE = bytes.maketrans(b"[]{}", b"()()")
+NOT_STRUCTURE = bytes(set(range(256)).difference(b'[]{},"\\'))
+# arrays and objects without nested ones, each pass removes one level of nesting
+INNERMOST = re.compile(rb"\([^()]*\)")
+MAX_NESTING = 8
+
+
+def too_many_values(data: str, maximum: int) -> bool:
+    """
+    return whether data has more than maximum comma separated top level values,
+    without decoding them, nesting deeper than MAX_NESTING counts as too many
+    """
+    encoded = data.encode()
+    structure = encoded.translate(STRUCTURE, NOT_STRUCTURE)
+    if b"\\" in structure:
+        structure = STRING.sub(b"", encoded).translate(STRUCTURE, NOT_STRUCTURE)
+    else:
+        # strings left empty and strings next to each other, which only merges them
+        structure = structure.replace(b'""', b"")
+        if b'"' in structure:
+            structure = b"".join(structure.split(b'"')[::2])
+
+    for _ in range(MAX_NESTING):
+        if structure.count(b",") < maximum:
+            return False
+
+        flat = INNERMOST.sub(b"", structure)
+        if flat == structure:
+            break
+
+        structure = flat
+
+    return structure.count(b",") >= maximum
 
 
 class JSONSerializer(serializers.Serializer):
-    def serialize(self, message: messages.Message) -> str:
-        return json.dumps(message.marshal())
+    def __init__(self, lazy: bool = False, backend: str | None = None):
+        super().__init__(lazy)
+        self._backend = get_backend(backend)
+
+    @property
+    def backend(self) -> JSONBackend:
+        return self._backend
+
+    def serialize(self, message: messages.Message) -> bytes:
+        items = message.marshal_fast()
+        if items is not None:
+            return self._backend.dumps(items)
+
+        wamp_message = message.marshal()
+        if isinstance(wamp_message[-1], messages.RawArguments):
+            return self.serialize_raw(wamp_message)
+
+        return self._backend.dumps(wamp_message)
+
+    def deserialize(self, data: bytes | str | memoryview) -> messages.Message:
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+
+        if self._lazy:
+            wamp_message = self._loads_lazy(data)
+        else:
+            wamp_message = self._loads(data)
 
-    def deserialize(self, data: str) -> messages.Message:
-        wamp_message = json.loads(data)
         return to_message(wamp_message)
+
+    def _loads(self, data: str | bytes) -> Any:
+        value = self._backend.loads(data)
+        if has_binary(data):
+            return decode_binary(value)
+
+        return value
+
+    def _loads_lazy(self, data: str | bytes) -> list[Any]:
+        if not isinstance(data, str):
+            data = str(data, "utf-8")
+
+        index = WHITESPACE.match(data).end()
+        if not data.startswith("[", index):
+            return self._loads(data)
+
+        index = WHITESPACE.match(data, index + 1).end()
+        message_type, index = DECODER.raw_decode(data, index)
+        header_length = lazy_header_length(message_type)
+        if header_length is None:
+            return self._loads(data)
+
+        header = [message_type]
+        while True:
+            index = WHITESPACE.match(data, index).end()
+            if not data.startswith(",", index) or len(header) == header_length:
+                break
+
+            index = WHITESPACE.match(data, index + 1).end()
+            value, index = DECODER.raw_decode(data, index)
+            header.append(value)
+
+        end = data.rfind("]")
+        # anything unexpected, including a message without args or with too many elements,
+        # is left to the full decoder
+        if (
+            len(header) != header_length
+            or not data.startswith(",", index)
+            or end <= index
+            or WHITESPACE.match(data, end + 1).end() != len(data)
+            or is_passthrough(header)
+        ):
+            return self._loads(data)
+
+        raw = data[index + 1 : end].strip()
+        if too_many_values(raw, LAZY_MAX_ARGUMENTS[message_type]):
+            return self._loads(data)
+
+        if has_binary(data[:index]):
+            header = decode_binary(header)
+
+        header.append(messages.RawArguments(self, raw))
+        return header
+
+    def serialize_item(self, value: Any) -> bytes:
+        return self._backend.dumps(value)
+
+    def join_items(self, items: list[bytes], raw: messages.RawArguments | None = None) -> bytes:
+        if raw is not None:
+            return b"[" + b",".join(items) + b"," + raw.data.encode("utf-8") + b"]"
+
+        return b"[" + b",".join(items) + b"]"
+
+    def decode_items(self, data: str, count: int | None) -> list[Any]:
+        return self._loads("[" + data + "]")
@@ -1,13 +1,92 @@
+import io
+from typing import Any
+
 import msgpack
 
 from wampproto import messages, serializers
-from wampproto.serializers.serializer import to_message
+from wampproto.serializers.serializer import LAZY_MAX_ARGUMENTS, to_message, lazy_header_length, is_passthrough
+
+# initial buffer sizes, msgpack defaults to hundreds of kilobytes which makes
+# serializers expensive to hold per session, the buffers grow when needed
+PACKER_BUFFER_SIZE = 4096
+UNPACKER_READ_SIZE = 4096
 
 
 class MsgPackSerializer(serializers.Serializer):
+    def __init__(self, lazy: bool = False):
+        super().__init__(lazy)
+        self._packer = msgpack.Packer(buf_size=PACKER_BUFFER_SIZE)
+        # created on first use of feed
+        self._unpacker: msgpack.Unpacker | None = None
+
     def serialize(self, message: messages.Message) -> bytes:
-        return msgpack.dumps(message.marshal())
+        items = message.marshal_fast()
+        if items is not None:
+            return self._packer.pack(items)
+
+        wamp_message = message.marshal()
+        if isinstance(wamp_message[-1], messages.RawArguments):
+            return self.serialize_raw(wamp_message)
+
+        return self._packer.pack(wamp_message)
 
     def deserialize(self, data: bytes) -> messages.Message:
-        wamp_message = msgpack.loads(data)
+        if self._lazy:
+            wamp_message = self._loads_lazy(data)
+        else:
+            wamp_message = msgpack.loads(data)
+
         return to_message(wamp_message)
+
+    def feed(self, data: bytes | bytearray | memoryview) -> list[messages.Message]:
+        """
+        Deserialize a stream of concatenated messages, e.g. several messages read from
+        a socket at once. Messages completed by data are returned in order, a message
+        that is cut off is kept until the rest of it is passed to the next call.
+        Arguments of messages received this way are always decoded eagerly.
+        """
+        if self._unpacker is None:
+            self._unpacker = msgpack.Unpacker(read_size=UNPACKER_READ_SIZE)
+
+        self._unpacker.feed(data)
+        return [to_message(wamp_message) for wamp_message in self._unpacker]
+
+    def _loads_lazy(self, data: bytes) -> list[Any]:
+        # the unpacker only reads the beginning of data to decode the header
+        unpacker = msgpack.Unpacker(io.BytesIO(data))
+        try:
+            length = unpacker.read_array_header()
+        except (msgpack.UnpackException, ValueError):
+            return msgpack.loads(data)
+
+        if length == 0:
+            return []
+
+        message_type = unpacker.unpack()
+        header_length = lazy_header_length(message_type)
+        # too many elements are left to the full decoder, which rejects them
+        if header_length is None or not 0 < length - header_length <= LAZY_MAX_ARGUMENTS[message_type]:
+            return msgpack.loads(data)
+
+        header = [message_type]
+        for _ in range(header_length - 1):
+            header.append(unpacker.unpack())
+
+        if is_passthrough(header):
+            return msgpack.loads(data)
+
+        header.append(messages.RawArguments(self, memoryview(data)[unpacker.tell() :], length - header_length))
+        return header
+
+    def serialize_item(self, value: Any) -> bytes:
+        return self._packer.pack(value)
+
+    def join_items(self, items: list[bytes], raw: messages.RawArguments | None = None) -> bytes:
+        if raw is not None:
+            return self._packer.pack_array_header(len(items) + raw.count) + b"".join(items) + raw.data
+
+        return self._packer.pack_array_header(len(items)) + b"".join(items)
+
+    def decode_items(self, data: bytes | memoryview, count: int | None) -> list[Any]:
+        unpacker = msgpack.Unpacker(io.BytesIO(data))
+        return [unpacker.unpack() for _ in range(count)]
@@ -0,0 +1,94 @@
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+from wampproto.serializers.serializer import Serializer
+from wampproto.serializers.json import JSONSerializer
+from wampproto.serializers.cbor import CBORSerializer
+from wampproto.serializers.msgpack import MsgPackSerializer
+
+JSON_SUBPROTOCOL = "wamp.2.json"
+MSGPACK_SUBPROTOCOL = "wamp.2.msgpack"
+CBOR_SUBPROTOCOL = "wamp.2.cbor"
+
+# serializer ids of the RawSocket handshake
+JSON_SERIALIZER_ID = 1
+MSGPACK_SERIALIZER_ID = 2
+CBOR_SERIALIZER_ID = 3
+
+
+@dataclass(frozen=True)
+class SerializerSpec:
+    subprotocol: str
+    rawsocket_id: int | None
+    factory: Callable[[], Serializer]
+    # serializers with a higher priority are preferred when negotiating
+    priority: int = 0
+
+
+SUBPROTOCOLS: dict[str, SerializerSpec] = {}
+RAWSOCKET_IDS: dict[int, SerializerSpec] = {}
+
+
+def register_serializer(
+    subprotocol: str, rawsocket_id: int | None, factory: Callable[[], Serializer], priority: int = 0
+) -> None:
+    """
+    Make the serializers created by factory available for the WebSocket subprotocol and,
+    if given, the RawSocket serializer id. factory is called once per connection, so
+    serializers don't need to be safe to share.
+    """
+    spec = SerializerSpec(subprotocol, rawsocket_id, factory, priority)
+    if subprotocol in SUBPROTOCOLS:
+        raise ValueError(f"serializer for subprotocol '{subprotocol}' is already registered")
+
+    if rawsocket_id is not None:
+        if rawsocket_id in RAWSOCKET_IDS:
+            raise ValueError(f"serializer for rawsocket id {rawsocket_id} is already registered")
+
+        RAWSOCKET_IDS[rawsocket_id] = spec
+
+    SUBPROTOCOLS[subprotocol] = spec
+
+
+def get_serializer(subprotocol: str) -> Serializer:
+    """return a new serializer for the WebSocket subprotocol"""
+    spec = SUBPROTOCOLS.get(subprotocol)
+    if spec is None:
+        raise ValueError(f"unsupported subprotocol '{subprotocol}'")
+
+    return spec.factory()
+
+
+def get_rawsocket_serializer(serializer_id: int) -> Serializer:
+    """return a new serializer for the serializer id of a RawSocket handshake"""
+    spec = RAWSOCKET_IDS.get(serializer_id)
+    if spec is None:
+        raise ValueError(f"unsupported rawsocket serializer id {serializer_id}")
+
+    return spec.factory()
+
+
+def subprotocols() -> list[str]:
+    """return the registered subprotocols, most preferred first, e.g. for a client to offer"""
+    return [spec.subprotocol for spec in sorted(SUBPROTOCOLS.values(), key=lambda spec: -spec.priority)]
+
+
+def negotiate_subprotocol(offered: Iterable[str]) -> str | None:
+    """
+    return the preferred subprotocol among the ones offered by the other side, or None if
+    none of them is supported. Our preference wins over the order of the offer so binary
+    serializers are used whenever the peer supports them.
+    """
+    best = None
+    for subprotocol in offered:
+        spec = SUBPROTOCOLS.get(subprotocol)
+        if spec is not None and (best is None or spec.priority > best.priority):
+            best = spec
+
+    return best.subprotocol if best is not None else None
+
+
+# binary serializers first, msgpack serializes the fastest
+register_serializer(MSGPACK_SUBPROTOCOL, MSGPACK_SERIALIZER_ID, MsgPackSerializer, priority=30)
+register_serializer(CBOR_SUBPROTOCOL, CBOR_SERIALIZER_ID, CBORSerializer, priority=20)
+register_serializer(JSON_SUBPROTOCOL, JSON_SERIALIZER_ID, JSONSerializer, priority=10)
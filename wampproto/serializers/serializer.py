@@ -1,13 +1,203 @@
+from __future__ import annotations
+
+import secrets
+from typing import Any
+
 from wampproto import messages
+from wampproto.messages import util
+
+# messages whose args and kwargs can be decoded lazily
+LAZY_MESSAGES = (
+    messages.Call,
+    messages.Invocation,
+    messages.Yield,
+    messages.Result,
+    messages.Publish,
+    messages.Event,
+    messages.Error,
+)
+# the number of elements before args and kwargs, which are always decoded
+LAZY_HEADER_LENGTHS = {cls.TYPE: cls.VALIDATION_SPEC.min_length for cls in LAZY_MESSAGES}
+# the number of elements that may follow them, args and kwargs
+LAZY_MAX_ARGUMENTS = {
+    cls.TYPE: cls.VALIDATION_SPEC.max_length - cls.VALIDATION_SPEC.min_length for cls in LAZY_MESSAGES
+}
+
+
+def lazy_header_length(message_type: Any) -> int | None:
+    if not isinstance(message_type, int):
+        return None
+
+    return LAZY_HEADER_LENGTHS.get(message_type)
+
+
+def is_passthrough(header: list[Any]) -> bool:
+    # passthrough payloads are split out of args when parsing, so they are decoded eagerly
+    return any(isinstance(value, dict) and util.PPT_SCHEME in value for value in header)
+
+
+# stands for the variable elements of a template while it is encoded, random so it
+# can't be part of the constant elements
+TEMPLATE_MARKER = f"wampproto-template-{secrets.token_hex(16)}"
+
+
+class MessageTemplate:
+    """
+    A serialized message with some of its elements left out, see Serializer.template.
+    Filling it in only encodes the given values and concatenates them with the
+    encoded constant parts.
+    """
+
+    __slots__ = ("_serializer", "_segments")
+
+    def __init__(self, serializer: Serializer, segments: list[bytes | str]):
+        self._serializer = serializer
+        # the encoded constant parts of the message, the variable elements go between them
+        self._segments = segments
+
+    @property
+    def size(self) -> int:
+        """number of bytes (or characters) of the constant parts"""
+        return sum(len(segment) for segment in self._segments)
+
+    def fill(self, *values: Any) -> bytes | str:
+        """return the message with the variable elements set to values, in order"""
+        return self.fill_encoded(*[self._serializer.serialize_item(value) for value in values])
+
+    def fill_encoded(self, *items: bytes | str) -> bytes | str:
+        """like fill, with values already encoded with serialize_item, e.g. to share them"""
+        segments = self._segments
+        if len(items) != len(segments) - 1:
+            raise ValueError(f"template takes {len(segments) - 1} values but {len(items)} were given")
+
+        # the usual cases, without building a list
+        if len(items) == 1:
+            return segments[0] + items[0] + segments[1]
+        elif len(items) == 2:
+            return segments[0][:0].join((segments[0], items[0], segments[1], items[1], segments[2]))
+
+        parts = [segments[0]]
+        for item, segment in zip(items, segments[1:]):
+            parts.append(item)
+            parts.append(segment)
+
+        return segments[0][:0].join(parts)
 
 
 class Serializer:
+    def __init__(self, lazy: bool = False):
+        # in lazy mode args and kwargs of messages are kept encoded until accessed
+        self._lazy = lazy
+
+    @property
+    def lazy(self) -> bool:
+        return self._lazy
+
     def serialize(self, message: messages.Message) -> bytes | str:
         raise NotImplementedError()
 
     def deserialize(self, data: bytes | str) -> messages.Message:
         raise NotImplementedError()
 
+    def serialize_item(self, value: Any) -> bytes | str:
+        """encode a single element of a message so it can later be passed to join_items"""
+        raise NotImplementedError()
+
+    def join_items(self, items: list[bytes | str], raw: messages.RawArguments | None = None) -> bytes | str:
+        """
+        build a serialized message out of elements encoded with serialize_item,
+        followed by the encoded arguments of raw if given
+        """
+        raise NotImplementedError()
+
+    def decode_items(self, data: bytes | memoryview | str, count: int | None) -> list[Any]:
+        """decode the elements of a message that were kept encoded in lazy mode"""
+        raise NotImplementedError()
+
+    def encode_items(self, wamp_message: list[Any]) -> tuple[list[bytes | str], messages.RawArguments | None]:
+        """
+        Encode each element of a marshaled message with serialize_item. Arguments that
+        were lazily deserialized by the same type of serializer are returned as is,
+        to be passed to join_items, other ones are decoded and encoded again.
+        """
+        raw = wamp_message[-1]
+        if not isinstance(raw, messages.RawArguments):
+            return [self.serialize_item(value) for value in wamp_message], None
+
+        items = [self.serialize_item(value) for value in wamp_message[:-1]]
+        if type(raw.serializer) is type(self):
+            return items, raw
+
+        items.extend(self.serialize_item(value) for value in raw.values())
+        return items, None
+
+    def template(self, wamp_message: list[Any], variables: tuple[int, ...]) -> MessageTemplate:
+        """
+        Encode the elements of a marshaled message once, except the ones at the indexes in
+        variables, e.g. to send an EVENT with different details to many subscribers.
+        """
+        items, raw = self.encode_items(wamp_message)
+        marker = self.serialize_item(TEMPLATE_MARKER)
+        for index in variables:
+            items[index] = marker
+
+        segments = self.join_items(items, raw).split(marker)
+        if len(segments) != len(set(variables)) + 1:
+            raise ValueError("invalid template variables")
+
+        return MessageTemplate(self, segments)
+
+    def serialize_raw(self, wamp_message: list[Any]) -> bytes | str:
+        """serialize a marshaled message that ends with lazily deserialized arguments"""
+        return self.join_items(*self.encode_items(wamp_message))
+
+
+# message type mapped to the class that parses it
+MESSAGE_TYPES: dict[int, type[messages.Message]] = {
+    cls.TYPE: cls
+    for cls in (
+        messages.Hello,
+        messages.Welcome,
+        messages.Abort,
+        messages.Challenge,
+        messages.Authenticate,
+        messages.Goodbye,
+        messages.Call,
+        messages.Invocation,
+        messages.Yield,
+        messages.Result,
+        messages.Register,
+        messages.Registered,
+        messages.Unregister,
+        messages.Unregistered,
+        messages.Subscribe,
+        messages.Subscribed,
+        messages.Unsubscribe,
+        messages.Unsubscribed,
+        messages.Publish,
+        messages.Published,
+        messages.Event,
+        messages.Error,
+        messages.Cancel,
+        messages.Interrupt,
+    )
+}
+
+
+def register_message_type(cls: type[messages.Message]) -> None:
+    """
+    Make to_message parse messages of cls.TYPE with cls.parse, e.g. for messages of
+    WAMP extensions that aren't part of this library.
+    """
+    if not isinstance(cls.TYPE, int):
+        raise ValueError(f"message type of {cls.__name__} must be an integer")
+
+    existing = MESSAGE_TYPES.get(cls.TYPE)
+    if existing is not None and existing is not cls:
+        raise ValueError(f"message type {cls.TYPE} is already registered for {existing.__name__}")
+
+    MESSAGE_TYPES[cls.TYPE] = cls
+
 
 def to_message(message: list) -> messages.Message:
     if not isinstance(message, list):
@@ -17,54 +207,8 @@ def to_message(message: list) -> messages.Message:
     if not isinstance(message_type, int):
         raise TypeError(f"invalid message type '{type(message[0])}', expected an integer")
 
-    match message_type:
-        case messages.Hello.TYPE:
-            return messages.Hello.parse(message)
-        case messages.Welcome.TYPE:
-            return messages.Welcome.parse(message)
-        case messages.Abort.TYPE:
-            return messages.Abort.parse(message)
-        case messages.Challenge.TYPE:
-            return messages.Challenge.parse(message)
-        case messages.Authenticate.TYPE:
-            return messages.Authenticate.parse(message)
-        case messages.Goodbye.TYPE:
-            return messages.Goodbye.parse(message)
-        case messages.Call.TYPE:
-            return messages.Call.parse(message)
-        case messages.Invocation.TYPE:
-            return messages.Invocation.parse(message)
-        case messages.Yield.TYPE:
-            return messages.Yield.parse(message)
-        case messages.Result.TYPE:
-            return messages.Result.parse(message)
-        case messages.Register.TYPE:
-            return messages.Register.parse(message)
-        case messages.Registered.TYPE:
-            return messages.Registered.parse(message)
-        case messages.Unregister.TYPE:
-            return messages.Unregister.parse(message)
-        case messages.Unregistered.TYPE:
-            return messages.Unregistered.parse(message)
-        case messages.Subscribe.TYPE:
-            return messages.Subscribe.parse(message)
-        case messages.Subscribed.TYPE:
-            return messages.Subscribed.parse(message)
-        case messages.Unsubscribe.TYPE:
-            return messages.Unsubscribe.parse(message)
-        case messages.Unsubscribed.TYPE:
-            return messages.Unsubscribed.parse(message)
-        case messages.Publish.TYPE:
-            return messages.Publish.parse(message)
-        case messages.Published.TYPE:
-            return messages.Published.parse(message)
-        case messages.Event.TYPE:
-            return messages.Event.parse(message)
-        case messages.Error.TYPE:
-            return messages.Error.parse(message)
-        case messages.Cancel.TYPE:
-            return messages.Cancel.parse(message)
-        case messages.Interrupt.TYPE:
-            return messages.Interrupt.parse(message)
-        case _:
-            raise ValueError("unknown message type")
+    cls = MESSAGE_TYPES.get(message_type)
+    if cls is None:
+        raise ValueError("unknown message type")
+
+    return cls.parse(message)
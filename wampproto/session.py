@@ -2,8 +2,8 @@ from wampproto import messages, serializers
 
 
 class WAMPSession:
-    def __init__(self, serializer: serializers.Serializer = serializers.JSONSerializer()):
-        self._serializer = serializer
+    def __init__(self, serializer: serializers.Serializer | None = None):
+        self._serializer = serializer if serializer is not None else serializers.JSONSerializer()
 
         # data structures for RPC
         self._call_requests: dict[int, int] = {}
@@ -41,6 +41,10 @@ class WAMPSession:
                 raise ValueError("send only supported for invocation error")
 
             self._invocation_requests.pop(msg.request_id, None)
+        elif isinstance(msg, messages.Cancel):
+            # the call stays pending, the router answers the cancel with an ERROR (or the RESULT if too late)
+            if msg.request_id not in self._call_requests:
+                raise ValueError("cannot cancel unknown call request")
         elif isinstance(msg, messages.Goodbye):
             pass
         else:
@@ -80,6 +84,11 @@ class WAMPSession:
                 raise ValueError("received INVOCATION for invalid registration_id")
 
             self._invocation_requests[msg.request_id] = msg.request_id
+        elif isinstance(msg, messages.Interrupt):
+            # the invocation stays pending until the callee sends an ERROR or YIELD for it. An
+            # INTERRUPT for an unknown invocation crossed its answer on the wire (or the call
+            # timed out meanwhile), callees ignore those.
+            pass
         elif isinstance(msg, messages.Published):
             try:
                 self._publish_requests.pop(msg.request_id)
@@ -0,0 +1,489 @@
+from __future__ import annotations
+
+import multiprocessing
+import time
+import zlib
+from dataclasses import dataclass
+from multiprocessing.connection import Connection
+from typing import Any, Callable
+
+import msgpack
+
+from wampproto import idgen, matching, messages, types, uris
+from wampproto.broker import Broker, OPTION_MATCH
+from wampproto.dealer import Dealer
+from wampproto.serializers.msgpack import MsgPackSerializer
+
+# prefix and wildcard subscriptions can match topics of any shard, they are all
+# kept by this shard which also gets the PUBLISH messages while any of them exist
+PATTERN_SHARD = 0
+PATTERN_MATCHES = (matching.MATCH_PREFIX, matching.MATCH_WILDCARD)
+
+OP_ADD_SESSION = 1
+OP_REMOVE_SESSION = 2
+OP_RECEIVE = 3
+OP_EXPIRE = 4
+
+
+def shard_of_uri(uri: str, shards: int) -> int:
+    """return the shard owning a topic or procedure, the same in every process"""
+    return zlib.crc32(uri.encode("utf-8")) % shards
+
+
+def shard_of_id(id_: int, shards: int) -> int:
+    """return the shard that issued a subscription, registration or invocation ID"""
+    return (id_ - 1) % shards
+
+
+@dataclass
+class Delivery:
+    message: messages.Message
+    recipients: list[int]
+
+
+class SessionDirectory:
+    """
+    Maps the sessions of a sharded router to the worker owning their connection,
+    e.g. the process running their transport, so the messages a shard produces
+    can be handed to the right worker.
+    """
+
+    def __init__(self):
+        self._owners: dict[int, int] = {}
+        self._sessions: dict[int, set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._owners)
+
+    def __contains__(self, session_id: int) -> bool:
+        return session_id in self._owners
+
+    def add(self, session_id: int, owner: int) -> None:
+        if session_id in self._owners:
+            raise ValueError("cannot add session twice")
+
+        self._owners[session_id] = owner
+        self._sessions.setdefault(owner, set()).add(session_id)
+
+    def remove(self, session_id: int) -> int:
+        owner = self._owners.pop(session_id, None)
+        if owner is None:
+            raise ValueError("cannot remove non-existing session")
+
+        sessions = self._sessions[owner]
+        sessions.discard(session_id)
+        if len(sessions) == 0:
+            del self._sessions[owner]
+
+        return owner
+
+    def owner_of(self, session_id: int) -> int | None:
+        return self._owners.get(session_id)
+
+    def sessions_of(self, owner: int) -> set[int]:
+        return set(self._sessions.get(owner, ()))
+
+    def group(self, results: dict[int, list[messages.Message]]) -> dict[int, dict[int, list[messages.Message]]]:
+        """split the outgoing messages of a router by the worker owning their recipient"""
+        grouped: dict[int, dict[int, list[messages.Message]]] = {}
+        for recipient, outgoing in results.items():
+            grouped.setdefault(self._owners[recipient], {})[recipient] = outgoing
+
+        return grouped
+
+
+class Shard:
+    """
+    Broker and Dealer holding the topics and procedures of one shard. The IDs they
+    issue are strided, so the shard owning a subscription, registration or
+    invocation is known from its ID alone.
+    """
+
+    def __init__(
+        self,
+        index: int,
+        shards: int,
+        clock: Callable[[], float] = time.monotonic,
+        uri_validator: uris.URIValidator | None = None,
+    ):
+        self.index = index
+        self.broker = Broker(uri_validator)
+        self.broker.idgen = idgen.StridedIDGenerator(index + 1, shards)
+        self.dealer = Dealer(clock, uri_validator)
+        self.dealer.idgen = idgen.StridedIDGenerator(index + 1, shards)
+
+    def execute(self, command: tuple) -> list[Delivery]:
+        op = command[0]
+        if op == OP_RECEIVE:
+            return self.receive(*command[1:])
+        elif op == OP_ADD_SESSION:
+            self.broker.add_session(command[1])
+            self.dealer.add_session(command[1])
+        elif op == OP_REMOVE_SESSION:
+            self.broker.remove_session(command[1])
+            return [Delivery(result.message, [result.recipient]) for result in self.dealer.remove_session(command[1])]
+        elif op == OP_EXPIRE:
+            return [Delivery(result.message, [result.recipient]) for result in self.dealer.expire(command[1])]
+        else:
+            raise ValueError(f"unknown shard operation {op}")
+
+        return []
+
+    def receive(
+        self, session_id: int, message: messages.Message, publication_id: int | None = None, acknowledge: bool = True
+    ) -> list[Delivery]:
+        """
+        Process a message routed to this shard. A PUBLISH delivered to several
+        shards is acknowledged by one of them only.
+        """
+        if isinstance(message, messages.Publish):
+            publication = self.broker.receive_publish(session_id, message, publication_id)
+            deliveries = [
+                Delivery(pub.event, pub.recipients)
+                for pub in (publication, *publication.pattern_publications)
+                if pub.event is not None
+            ]
+            if acknowledge and publication.ack is not None:
+                deliveries.append(Delivery(publication.ack.message, [publication.ack.recipient]))
+
+            return deliveries
+        elif isinstance(message, messages.Cancel):
+            return [
+                Delivery(result.message, [result.recipient])
+                for result in self.dealer.receive_cancel(session_id, message)
+            ]
+        elif isinstance(message, (messages.Subscribe, messages.Unsubscribe)):
+            result = self.broker.receive_message(session_id, message)
+        else:
+            result = self.dealer.receive_message(session_id, message)
+            if result is None:
+                return []
+
+        return [Delivery(result.message, [result.recipient])]
+
+
+class LocalShard:
+    """shard running in the process of the router"""
+
+    def __init__(self, shard: Shard):
+        self.shard = shard
+        self._reply: tuple[list[list[Delivery]], Exception | None] | None = None
+
+    def submit(self, commands: list[tuple]) -> None:
+        results = []
+        error = None
+        for command in commands:
+            try:
+                results.append(self.shard.execute(command))
+            except ValueError as e:
+                error = e
+                break
+
+        self._reply = (results, error)
+
+    def collect(self) -> tuple[list[list[Delivery]], Exception | None]:
+        reply, self._reply = self._reply, None
+        return reply
+
+    def close(self) -> None:
+        pass
+
+
+def _encode_deliveries(serializer: MsgPackSerializer, deliveries: list[Delivery]) -> list[list[Any]]:
+    return [[serializer.serialize(delivery.message), delivery.recipients] for delivery in deliveries]
+
+
+def run_shard(
+    conn: Connection,
+    index: int,
+    shards: int,
+    clock: Callable[[], float] = time.monotonic,
+    uri_validator: uris.URIValidator | None = None,
+) -> None:
+    """
+    Serve the requests of a ProcessShard until it is closed. A request is a list of
+    commands, the reply holds the deliveries of each command that succeeded and the
+    error that stopped the others, if any.
+    """
+    shard = Shard(index, shards, clock, uri_validator)
+    serializer = MsgPackSerializer()
+    while True:
+        try:
+            request = msgpack.unpackb(conn.recv_bytes())
+        except EOFError:
+            break
+
+        if request is None:
+            break
+
+        results = []
+        error = None
+        for command in request:
+            op = command[0]
+            try:
+                if op == OP_RECEIVE:
+                    command[2] = serializer.deserialize(command[2])
+                elif op == OP_ADD_SESSION:
+                    command = [op, types.SessionDetails(*command[1:])]
+
+                results.append(_encode_deliveries(serializer, shard.execute(command)))
+            except Exception as e:
+                error = str(e)
+                break
+
+        conn.send_bytes(msgpack.packb([results, error]))
+
+    conn.close()
+
+
+class ProcessShard:
+    """shard running in a worker process, commands and messages are exchanged over a pipe"""
+
+    def __init__(
+        self,
+        index: int,
+        shards: int,
+        clock: Callable[[], float] = time.monotonic,
+        uri_validator: uris.URIValidator | None = None,
+        context: Any = None,
+    ):
+        if context is None:
+            context = multiprocessing.get_context()
+
+        self._conn, child = context.Pipe()
+        self._process = context.Process(
+            target=run_shard,
+            args=(child, index, shards, clock, uri_validator),
+            name=f"wampproto-shard-{index}",
+            daemon=True,
+        )
+        self._process.start()
+        child.close()
+        self._serializer = MsgPackSerializer()
+
+    def submit(self, commands: list[tuple]) -> None:
+        request = []
+        for command in commands:
+            op = command[0]
+            if op == OP_RECEIVE:
+                _, session_id, message, publication_id, acknowledge = command
+                request.append([op, session_id, self._serializer.serialize(message), publication_id, acknowledge])
+            elif op == OP_ADD_SESSION:
+                details = command[1]
+                request.append([op, details.session_id, details.realm, details.authid, details.authrole])
+            else:
+                request.append(list(command))
+
+        self._conn.send_bytes(msgpack.packb(request))
+
+    def collect(self) -> tuple[list[list[Delivery]], Exception | None]:
+        results, error = msgpack.unpackb(self._conn.recv_bytes())
+        deliveries = [
+            [Delivery(self._serializer.deserialize(data), recipients) for data, recipients in result]
+            for result in results
+        ]
+        return deliveries, None if error is None else ValueError(error)
+
+    def close(self) -> None:
+        if not self._process.is_alive():
+            return
+
+        try:
+            self._conn.send_bytes(msgpack.packb(None))
+        except OSError:
+            pass
+
+        self._process.join(timeout=5)
+        if self._process.is_alive():
+            self._process.terminate()
+
+        self._conn.close()
+
+
+class ShardedRouter:
+    """
+    Broker and Dealer state partitioned across shards, optionally each in a worker
+    process of its own. Topics and procedures are owned by the shard their URI
+    hashes to, prefix and wildcard subscriptions by PATTERN_SHARD. Every session
+    exists on every shard.
+
+    Messages of a batch are sent to all the shards they concern at once and the
+    replies are merged in the order of the batch, so shards in worker processes
+    work in parallel. If a message raises, the ones before it have been applied,
+    as have the messages of the batch handled by other shards.
+
+    In processes, the clock and the URI validator are passed to the workers and
+    have to be picklable unless the "fork" start method is used.
+    """
+
+    def __init__(
+        self,
+        shards: int = 2,
+        processes: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+        uri_validator: uris.URIValidator | None = None,
+    ):
+        if shards < 1:
+            raise ValueError("a router needs at least one shard")
+
+        if processes:
+            self._shards = [ProcessShard(index, shards, clock, uri_validator) for index in range(shards)]
+        else:
+            self._shards = [LocalShard(Shard(index, shards, clock, uri_validator)) for index in range(shards)]
+
+        self.directory = SessionDirectory()
+        self._publication_ids = idgen.SessionScopeIDGenerator()
+        # prefix and wildcard subscriptions of each session, all kept by PATTERN_SHARD
+        self._pattern_subscriptions: dict[int, set[int]] = {}
+
+    @property
+    def shards(self) -> int:
+        return len(self._shards)
+
+    def __enter__(self) -> ShardedRouter:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for shard in self._shards:
+            shard.close()
+
+    def _broadcast(self, command: tuple) -> list[list[Delivery]]:
+        for shard in self._shards:
+            shard.submit([command])
+
+        replies = [shard.collect() for shard in self._shards]
+        for results, error in replies:
+            if error is not None:
+                raise error
+
+        return [results[0] for results, _ in replies]
+
+    def add_session(self, details: types.SessionDetails, owner: int = 0) -> None:
+        """add a session to all shards, owner is the worker holding its connection"""
+        self.directory.add(details.session_id, owner)
+        self._broadcast((OP_ADD_SESSION, details))
+
+    def remove_session(self, sid: int) -> dict[int, list[messages.Message]]:
+        """remove a session from all shards and return the messages ending its pending calls"""
+        self.directory.remove(sid)
+        self._pattern_subscriptions.pop(sid, None)
+        results: dict[int, list[messages.Message]] = {}
+        for deliveries in self._broadcast((OP_REMOVE_SESSION, sid)):
+            for delivery in deliveries:
+                for recipient in delivery.recipients:
+                    results.setdefault(recipient, []).append(delivery.message)
+
+        return results
+
+    def shard_of(self, message: messages.Message) -> int:
+        """return the shard a message (other than PUBLISH and CANCEL) is routed to"""
+        if isinstance(message, messages.Subscribe):
+            if message.options.get(OPTION_MATCH) in PATTERN_MATCHES:
+                return PATTERN_SHARD
+
+            return shard_of_uri(message.topic, len(self._shards))
+        elif isinstance(message, (messages.Register, messages.Call)):
+            return shard_of_uri(message.uri, len(self._shards))
+        elif isinstance(message, messages.Unsubscribe):
+            return shard_of_id(message.subscription_id, len(self._shards))
+        elif isinstance(message, messages.Unregister):
+            return shard_of_id(message.registration_id, len(self._shards))
+        elif isinstance(message, (messages.Yield, messages.Error)):
+            # request ID of the invocation
+            return shard_of_id(message.request_id, len(self._shards))
+
+        raise ValueError("message type not supported")
+
+    def _track_patterns(self, session_id: int, message: messages.Message, deliveries: list[Delivery]) -> None:
+        if isinstance(message, messages.Subscribe):
+            if message.options.get(OPTION_MATCH) not in PATTERN_MATCHES:
+                return
+
+            for delivery in deliveries:
+                if isinstance(delivery.message, messages.Subscribed):
+                    self._pattern_subscriptions.setdefault(session_id, set()).add(delivery.message.subscription_id)
+        elif isinstance(message, messages.Unsubscribe):
+            subscriptions = self._pattern_subscriptions.get(session_id)
+            if subscriptions is not None:
+                subscriptions.discard(message.subscription_id)
+                if len(subscriptions) == 0:
+                    del self._pattern_subscriptions[session_id]
+
+    def receive_message(self, session_id: int, message: messages.Message) -> dict[int, list[messages.Message]]:
+        return self.receive_batch(session_id, [message])
+
+    def receive_batch(self, session_id: int, batch: list[messages.Message]) -> dict[int, list[messages.Message]]:
+        """
+        Process several messages received from a session and return the outgoing
+        messages grouped by recipient, like Broker.receive_batch.
+        """
+        if session_id not in self.directory:
+            raise ValueError(f"session {session_id} doesn't exist")
+
+        requests: list[list[tuple]] = [[] for _ in self._shards]
+        # (shard, position in the request of that shard) of the commands of each message
+        plan: list[list[tuple[int, int]]] = []
+        for message in batch:
+            targets = []
+            if isinstance(message, messages.Publish):
+                publication_id = self._publication_ids.next()
+                primary = shard_of_uri(message.uri, len(self._shards))
+                targets.append((primary, len(requests[primary])))
+                requests[primary].append((OP_RECEIVE, session_id, message, publication_id, True))
+                if primary != PATTERN_SHARD and len(self._pattern_subscriptions) != 0:
+                    targets.append((PATTERN_SHARD, len(requests[PATTERN_SHARD])))
+                    requests[PATTERN_SHARD].append((OP_RECEIVE, session_id, message, publication_id, False))
+            elif isinstance(message, messages.Cancel):
+                # only the shard of the call knows it, the others have nothing to cancel
+                for index, request in enumerate(requests):
+                    targets.append((index, len(request)))
+                    request.append((OP_RECEIVE, session_id, message, None, True))
+            else:
+                index = self.shard_of(message)
+                targets.append((index, len(requests[index])))
+                requests[index].append((OP_RECEIVE, session_id, message, None, True))
+
+            plan.append(targets)
+
+        for shard, request in zip(self._shards, requests):
+            if len(request) != 0:
+                shard.submit(request)
+
+        replies = [
+            shard.collect() if len(request) != 0 else ([], None) for shard, request in zip(self._shards, requests)
+        ]
+
+        results: dict[int, list[messages.Message]] = {}
+        for message, targets in zip(batch, plan):
+            deliveries = []
+            for index, position in targets:
+                shard_results, error = replies[index]
+                if position >= len(shard_results):
+                    raise error
+
+                if isinstance(message, messages.Cancel):
+                    # the error of an invalid mode comes from every shard
+                    if len(deliveries) == 0:
+                        deliveries = shard_results[position]
+                else:
+                    deliveries.extend(shard_results[position])
+
+            self._track_patterns(session_id, message, deliveries)
+            for delivery in deliveries:
+                for recipient in delivery.recipients:
+                    results.setdefault(recipient, []).append(delivery.message)
+
+        return results
+
+    def expire(self, now: float | None = None) -> dict[int, list[messages.Message]]:
+        """time out the calls whose deadline has passed on any shard, see Dealer.expire"""
+        results: dict[int, list[messages.Message]] = {}
+        for deliveries in self._broadcast((OP_EXPIRE, now)):
+            for delivery in deliveries:
+                for recipient in delivery.recipients:
+                    results.setdefault(recipient, []).append(delivery.message)
+
+        return results
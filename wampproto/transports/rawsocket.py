@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from wampproto import messages, serializers
+from wampproto.serializers import registry
+
+MAGIC = 0x7F
+
+SERIALIZER_JSON = registry.JSON_SERIALIZER_ID
+SERIALIZER_MSGPACK = registry.MSGPACK_SERIALIZER_ID
+SERIALIZER_CBOR = registry.CBOR_SERIALIZER_ID
+
+# the maximum message size is announced as 2 ** (9 + exponent), exponent being 0 to 15
+MIN_MAX_MESSAGE_SIZE = 1 << 9
+DEFAULT_MAX_MESSAGE_SIZE = 1 << 24
+
+ERROR_SERIALIZER_UNSUPPORTED = 1
+ERROR_MAX_MESSAGE_SIZE_UNACCEPTABLE = 2
+ERROR_RESERVED_BITS_USED = 3
+ERROR_MAX_CONNECTION_COUNT_REACHED = 4
+
+FRAME_WAMP = 0
+FRAME_PING = 1
+FRAME_PONG = 2
+
+HEADER_SIZE = 4
+# the low 3 bits of the first header byte hold the frame type, the others are reserved
+FRAME_TYPE_MASK = 0x07
+MAX_FRAME_SIZE = (1 << 24) - 1
+
+
+class HandshakeError(Exception):
+    def __init__(self, code: int):
+        super().__init__(f"rawsocket handshake failed with error {code}")
+        self.code = code
+
+
+@dataclass
+class Handshake:
+    serializer: int
+    max_message_size: int = DEFAULT_MAX_MESSAGE_SIZE
+
+    def to_bytes(self) -> bytes:
+        exponent = max(0, (self.max_message_size - 1).bit_length() - 9)
+        if exponent > 15:
+            raise ValueError(f"max message size must be at most {DEFAULT_MAX_MESSAGE_SIZE}")
+
+        return bytes((MAGIC, exponent << 4 | self.serializer, 0, 0))
+
+    @classmethod
+    def from_bytes(cls, data: bytes | memoryview) -> Handshake:
+        if len(data) != HEADER_SIZE or data[0] != MAGIC:
+            raise ValueError("invalid rawsocket handshake")
+
+        if data[2] != 0 or data[3] != 0:
+            raise HandshakeError(ERROR_RESERVED_BITS_USED)
+
+        serializer = data[1] & 0x0F
+        if serializer == 0:
+            # a router rejecting the handshake replies with the error code instead of the size
+            raise HandshakeError(data[1] >> 4)
+
+        return cls(serializer, MIN_MAX_MESSAGE_SIZE << (data[1] >> 4))
+
+
+def handshake_error(code: int) -> bytes:
+    """return the handshake reply a router sends to reject a connection"""
+    return bytes((MAGIC, code << 4, 0, 0))
+
+
+@dataclass
+class Ping:
+    payload: memoryview
+
+
+@dataclass
+class Pong:
+    payload: memoryview
+
+
+def frame_header(length: int, frame_type: int = FRAME_WAMP) -> bytes:
+    if length > MAX_FRAME_SIZE:
+        raise ValueError(f"frame of {length} bytes exceeds the rawsocket limit of {MAX_FRAME_SIZE} bytes")
+
+    return bytes((frame_type,)) + length.to_bytes(3, "big")
+
+
+def encode_frame(payload: bytes | memoryview | str, frame_type: int = FRAME_WAMP) -> bytes:
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+
+    return frame_header(len(payload), frame_type) + payload
+
+
+def encode_frames(serializer: serializers.Serializer, wamp_messages: list[messages.Message]) -> bytes:
+    """serialize and frame several messages at once so they can be sent with a single write"""
+    chunks = []
+    for message in wamp_messages:
+        data = serializer.serialize(message)
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+
+        chunks.append(frame_header(len(data)))
+        chunks.append(data)
+
+    return b"".join(chunks)
+
+
+class FrameDecoder:
+    """
+    Incremental decoder of a RawSocket byte stream. Frames contained in the data
+    passed to feed are deserialized from memoryview slices of it without being
+    copied, only a frame split across two reads is assembled in a buffer of its
+    own. Messages deserialized in lazy mode and ping payloads may reference the
+    data passed to feed, so it must not be modified while they are in use.
+
+    With handshake=True the stream must start with a handshake, if no serializer
+    was given the one requested in the handshake is used for the frames after it.
+    """
+
+    def __init__(
+        self,
+        serializer: serializers.Serializer | None = None,
+        max_message_size: int = DEFAULT_MAX_MESSAGE_SIZE,
+        handshake: bool = False,
+    ):
+        if serializer is None and not handshake:
+            raise ValueError("serializer is required when not expecting a handshake")
+
+        self._serializer = serializer
+        self._max_message_size = max_message_size
+        # whether the stream starts with a handshake that hasn't been received yet
+        self._handshake = handshake
+        self._pending = bytearray()
+
+    @property
+    def serializer(self) -> serializers.Serializer | None:
+        return self._serializer
+
+    def _frame_length(self, header: memoryview | bytearray) -> int:
+        frame_type = header[0]
+        if frame_type & ~FRAME_TYPE_MASK != 0:
+            raise ValueError("rawsocket frame header uses reserved bits")
+
+        if frame_type not in (FRAME_WAMP, FRAME_PING, FRAME_PONG):
+            raise ValueError(f"unknown rawsocket frame type {frame_type}")
+
+        length = int.from_bytes(header[1:HEADER_SIZE], "big")
+        if frame_type == FRAME_WAMP and length > self._max_message_size:
+            raise ValueError(f"rawsocket frame of {length} bytes exceeds max message size {self._max_message_size}")
+
+        return length
+
+    def _missing(self, data: memoryview | bytearray) -> int:
+        """return how many more bytes the frame (or handshake) at the start of data needs"""
+        if self._handshake or len(data) < HEADER_SIZE:
+            return HEADER_SIZE - len(data)
+
+        return HEADER_SIZE + self._frame_length(data) - len(data)
+
+    def _process(self, frame: memoryview, results: list) -> None:
+        if self._handshake:
+            handshake = Handshake.from_bytes(frame)
+            self._handshake = False
+            if self._serializer is None:
+                try:
+                    self._serializer = serializers.get_rawsocket_serializer(handshake.serializer)
+                except ValueError:
+                    raise HandshakeError(ERROR_SERIALIZER_UNSUPPORTED) from None
+
+            results.append(handshake)
+            return
+
+        frame_type = frame[0]
+        payload = frame[HEADER_SIZE:]
+        if frame_type == FRAME_WAMP:
+            results.append(self._serializer.deserialize(payload))
+        elif frame_type == FRAME_PING:
+            results.append(Ping(payload))
+        else:
+            results.append(Pong(payload))
+
+    def feed(self, data: bytes | bytearray | memoryview) -> list[messages.Message | Handshake | Ping | Pong]:
+        """return the messages, handshake, pings and pongs completed by data, in order"""
+        view = memoryview(data)
+        results = []
+
+        # complete the frame buffered by a previous call first
+        if len(self._pending) != 0:
+            while (missing := self._missing(self._pending)) != 0:
+                take = min(missing, len(view))
+                self._pending += view[:take]
+                view = view[take:]
+                if take < missing:
+                    return results
+
+            # hand the buffer over instead of reusing it, messages may still reference it
+            frame, self._pending = self._pending, bytearray()
+            self._process(memoryview(frame), results)
+
+        offset = 0
+        while (remaining := len(view) - offset) >= HEADER_SIZE:
+            if self._handshake:
+                size = HEADER_SIZE
+            else:
+                size = HEADER_SIZE + self._frame_length(view[offset : offset + HEADER_SIZE])
+
+            if remaining < size:
+                break
+
+            self._process(view[offset : offset + size], results)
+            offset += size
+
+        if offset < len(view):
+            if len(view) - offset >= HEADER_SIZE:
+                # fail early rather than buffering a frame that will be rejected
+                self._missing(view[offset:])
+
+            self._pending += view[offset:]
+
+        return results
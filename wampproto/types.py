@@ -1,6 +1,14 @@
-from dataclasses import dataclass
+from __future__ import annotations
 
-from wampproto import messages
+from dataclasses import dataclass, field
+from typing import Any
+
+from wampproto import messages, serializers
+
+# position of the elements of an EVENT that differ between subscribers:
+# [EVENT, Subscription, Publication, Details, ...]
+EVENT_SUBSCRIPTION_INDEX = 1
+EVENT_DETAILS_INDEX = 3
 
 
 class SessionDetails:
@@ -49,3 +57,78 @@ class Publication:
     event: messages.Event | None = None
     recipients: list[int] = None
     ack: MessageWithRecipient | None = None
+    # one publication per prefix or wildcard subscription that matched the topic
+    pattern_publications: list[Publication] = field(default_factory=list)
+    # subscribers with an event queue that got the event, instead of being recipients
+    queued: list[int] = field(default_factory=list)
+    # subscribers whose queue overflowed with the disconnect policy
+    overflowed: list[int] = field(default_factory=list)
+
+    _serialized: dict[type, bytes | str] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # EVENT templates per serializer type, shared by the publications of one PUBLISH
+    _templates: dict[type, serializers.MessageTemplate] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _shared: bool = field(default=False, init=False, repr=False, compare=False)
+    # the encoded subscription id per serializer type, the same for every subscriber
+    _subscription_ids: dict[type, bytes | str] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def serialize(self, serializer: serializers.Serializer) -> bytes | str:
+        """
+        Return the serialized event, encoding it only once per serializer type so
+        the same bytes can be written to every recipient.
+        """
+        if self.event is None:
+            raise ValueError("publication has no event to serialize")
+
+        key = type(serializer)
+        data = self._serialized.get(key)
+        if data is None:
+            if self._shared:
+                # the arguments are encoded once for all the publications sharing them
+                data = self.template(serializer).fill(self.event.subscription_id, self.event.details)
+            else:
+                data = serializer.serialize(self.event)
+
+            self._serialized[key] = data
+
+        return data
+
+    def template(self, serializer: serializers.Serializer) -> serializers.MessageTemplate:
+        """
+        Return the event encoded once per serializer type with its subscription id and
+        details left to fill in, everything else, including args and kwargs, is shared.
+        """
+        if self.event is None:
+            raise ValueError("publication has no event to serialize")
+
+        key = type(serializer)
+        template = self._templates.get(key)
+        if template is None:
+            template = serializer.template(self.event.marshal(), (EVENT_SUBSCRIPTION_INDEX, EVENT_DETAILS_INDEX))
+            self._templates[key] = template
+
+        return template
+
+    def set_serialized(self, serializer: serializers.Serializer, data: bytes | str) -> None:
+        """use data, the event already serialized with serializer, e.g. replayed from a history"""
+        self._serialized[type(serializer)] = data
+
+    def share_templates(self, other: Publication) -> None:
+        """use the templates of other, whose event only differs in subscription id and details"""
+        self._templates = other._templates
+        self._shared = other._shared = True
+
+    def serialize_with_details(self, serializer: serializers.Serializer, details: dict[str, Any]) -> bytes | str:
+        """
+        Return the serialized event with its details replaced by the given ones, e.g. to
+        add per-subscriber publisher disclosure.
+        """
+        template = self.template(serializer)
+        key = type(serializer)
+        subscription_id = self._subscription_ids.get(key)
+        if subscription_id is None:
+            subscription_id = serializer.serialize_item(self.event.subscription_id)
+            self._subscription_ids[key] = subscription_id
+
+        return template.fill_encoded(subscription_id, serializer.serialize_item(details))
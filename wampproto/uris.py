@@ -1,5 +1,75 @@
+import functools
+import re
+
+from wampproto import matching
+
 INVALID_ARGUMENT = "wamp.error.invalid_argument"
 PROCEDURE_ALREADY_EXISTS = "wamp.error.procedure_already_exists"
+PROCEDURE_EXISTS_INVOCATION_POLICY_CONFLICT = "wamp.error.procedure_exists_with_different_invocation_policy"
 INVALID_URI = "wamp.error.invalid_uri"
 AUTHENTICATION_FAILED = "wamp.error.authentication_failed"
 CLOSE_REALM = "wamp.close.close_realm"
+GOODBYE_AND_OUT = "wamp.close.goodbye_and_out"
+NO_SUCH_PROCEDURE = "wamp.error.no_such_procedure"
+TIMEOUT = "wamp.error.timeout"
+CANCELED = "wamp.error.canceled"
+NO_SUCH_SUBSCRIPTION = "wamp.error.no_such_subscription"
+SUBSCRIPTION_GET_EVENTS = "wamp.subscription.get_events"
+
+# URI rules of the WAMP specification, loose rules only exclude whitespace, "." and "#"
+# from components, strict ones restrict them to lowercase letters, digits and "_"
+LOOSE_COMPONENT = r"[^\s\.#]"
+STRICT_COMPONENT = r"[0-9a-z_]"
+
+DEFAULT_VALIDATION_CACHE_SIZE = 4096
+
+
+def _compile_patterns(component: str) -> dict[str, re.Pattern]:
+    # used with fullmatch, "$" would also match before a trailing newline
+    return {
+        # every component non-empty
+        matching.MATCH_EXACT: re.compile(rf"({component}+\.)*({component}+)"),
+        # the last component may be empty or partial, e.g. "com.myapp."
+        matching.MATCH_PREFIX: re.compile(rf"({component}+\.)*({component}*)"),
+        # empty components stand for any component, e.g. "com..update"
+        matching.MATCH_WILDCARD: re.compile(rf"(({component}+\.)|\.)*({component}+)?"),
+    }
+
+
+LOOSE_PATTERNS = _compile_patterns(LOOSE_COMPONENT)
+STRICT_PATTERNS = _compile_patterns(STRICT_COMPONENT)
+
+
+class URIValidator:
+    """
+    Checks URIs against the strict or loose WAMP URI rules. Results are kept in an
+    LRU cache, so URIs that were seen before are answered without running a regex.
+    """
+
+    def __init__(self, strict: bool = False, cache_size: int = DEFAULT_VALIDATION_CACHE_SIZE):
+        self._strict = strict
+        self._cache_size = cache_size
+        self._patterns = STRICT_PATTERNS if strict else LOOSE_PATTERNS
+        self._is_valid = functools.lru_cache(maxsize=cache_size)(self._check)
+
+    @property
+    def strict(self) -> bool:
+        return self._strict
+
+    def __reduce__(self):
+        # the cache can't be pickled, e.g. to pass the validator to a worker process
+        return URIValidator, (self._strict, self._cache_size)
+
+    def _check(self, uri: str, match: str) -> bool:
+        pattern = self._patterns.get(match)
+        return pattern is not None and isinstance(uri, str) and uri != "" and pattern.fullmatch(uri) is not None
+
+    def is_valid(self, uri: str, match: str = matching.MATCH_EXACT) -> bool:
+        """
+        return whether uri follows the rules, URIs of procedures and topics are exact,
+        the URIs subscribed to with a prefix or wildcard match policy are patterns
+        """
+        return self._is_valid(uri, match)
+
+    def clear_cache(self) -> None:
+        self._is_valid.cache_clear()